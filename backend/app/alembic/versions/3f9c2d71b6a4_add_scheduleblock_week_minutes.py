@@ -0,0 +1,57 @@
+"""Add scheduleblock week minutes
+
+Revision ID: 3f9c2d71b6a4
+Revises: e8b6db953aaf
+Create Date: 2026-10-18 21:05:12.418903
+
+블록이 덮는 한 주의 분 범위를 생성 컬럼(int4range)으로 두고 GiST 인덱스로
+주어진 시간 구간과 겹치는 블록을 찾음
+생성 컬럼을 추가하면 테이블을 다시 쓰므로 그동안 테이블이 잠기고, 인덱스는 잠그지 않도록 CONCURRENTLY 로 만듦
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "3f9c2d71b6a4"
+down_revision = "e8b6db953aaf"
+branch_labels = None
+depends_on = None
+
+# app.models.scheduleblock.WEEK_MINUTES_SQL 과 같아야 함
+WEEK_MINUTES_SQL = """int4range(day * 1440 + start_time * 60 + start_minute, day * 1440 +
+CASE
+    WHEN end_time * 60 + end_minute + 1 <= start_time * 60 + start_minute THEN 1440
+    ELSE end_time * 60 + end_minute + 1
+END)"""
+
+
+def upgrade():
+    op.add_column(
+        "scheduleblock",
+        sa.Column(
+            "week_minutes",
+            postgresql.INT4RANGE(),
+            sa.Computed(WEEK_MINUTES_SQL),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_scheduleblock_week_minutes",
+            "scheduleblock",
+            ["week_minutes"],
+            postgresql_using="gist",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_scheduleblock_week_minutes",
+            table_name="scheduleblock",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("scheduleblock", "week_minutes")
@@ -0,0 +1,157 @@
+"""Fold hourly blocks into availability
+
+Revision ID: 5b1e0c9d2a47
+Revises: 7a34b5600fa0
+Create Date: 2026-10-18 10:27:12.318406
+
+비트맵을 쓰기 전에 행으로 저장된 라벨 없는 한 시간 칸(N시 0분~N시 59분)을 참여자의 availability.hours 에
+OR 로 합치고 지움. 남겨 두면 같은 칸을 다시 채울 때 비트로도 저장되어 한 칸이 두 곳에 있게 됨
+availability 행이 없는 참여자는 빈 주로 만들어 채우고, id 는 앱과 같이 create_uuid 로 만듦
+init_db 가 create_all 뒤에 이미 합친 DB 에는 합칠 행이 없으므로 아무것도 하지 않음
+downgrade 는 반대로 비트맵의 칸을 한 시간짜리 행으로 나누고 비트맵을 비움
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.core.availability import DAYS_PER_WEEK, iter_hours
+from app.core.security import create_uuid
+
+# revision identifiers, used by Alembic.
+revision = "5b1e0c9d2a47"
+down_revision = "7a34b5600fa0"
+branch_labels = None
+depends_on = None
+
+# app.core.availability.is_cell 과 같은 조건
+HOURLY_BLOCK = """
+    label IS NULL
+    AND start_time = end_time
+    AND start_minute = 0
+    AND end_minute = 59
+    AND table_id IS NOT NULL
+    AND user_id IS NOT NULL
+"""
+
+availability = sa.table(
+    "availability",
+    sa.column("id", sa.String()),
+    sa.column("table_id", sa.String()),
+    sa.column("user_id", sa.String()),
+    sa.column("hours", postgresql.ARRAY(sa.Integer())),
+)
+scheduleblock = sa.table(
+    "scheduleblock",
+    sa.column("id", sa.String()),
+    sa.column("table_id", sa.String()),
+    sa.column("user_id", sa.String()),
+    sa.column("day", sa.SmallInteger()),
+    sa.column("start_time", sa.SmallInteger()),
+    sa.column("start_minute", sa.SmallInteger()),
+    sa.column("end_time", sa.SmallInteger()),
+    sa.column("end_minute", sa.SmallInteger()),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    # (타임테이블, 참여자, 요일)마다 채워진 시간의 비트 마스크
+    op.execute(
+        f"""
+        CREATE TEMPORARY TABLE hourly_blocks ON COMMIT DROP AS
+        SELECT table_id, user_id, day, bit_or(1 << start_time) AS mask
+        FROM scheduleblock
+        WHERE {HOURLY_BLOCK}
+        GROUP BY table_id, user_id, day
+        """
+    )
+    missing = bind.execute(
+        sa.text(
+            """
+            SELECT DISTINCT h.table_id, h.user_id
+            FROM hourly_blocks AS h
+            WHERE NOT EXISTS (
+                SELECT 1 FROM availability AS a
+                WHERE a.table_id = h.table_id AND a.user_id = h.user_id
+            )
+            """
+        )
+    ).all()
+    if missing:
+        op.bulk_insert(
+            availability,
+            [
+                {
+                    "id": create_uuid(),
+                    "table_id": str(row.table_id),
+                    "user_id": str(row.user_id),
+                    "hours": [0] * DAYS_PER_WEEK,
+                }
+                for row in missing
+            ],
+        )
+    # hours 는 DB 에서 1부터 세는 배열이라 요일 d 는 hours[d + 1]
+    op.execute(
+        """
+        UPDATE availability AS a
+        SET hours = ARRAY(
+                SELECT a.hours[d + 1] | coalesce(h.mask, 0)
+                FROM generate_series(0, 6) AS d
+                LEFT JOIN hourly_blocks AS h
+                    ON h.table_id = a.table_id AND h.user_id = a.user_id AND h.day = d
+                ORDER BY d
+            ),
+            updated_at = now()
+        WHERE (a.table_id, a.user_id) IN (SELECT table_id, user_id FROM hourly_blocks)
+        """
+    )
+    op.execute(f"DELETE FROM scheduleblock WHERE {HOURLY_BLOCK}")
+
+
+def downgrade():
+    bind = op.get_bind()
+    filled = bind.execute(
+        sa.text(
+            """
+            SELECT table_id, user_id, hours FROM availability
+            WHERE 0 <> ANY(hours)
+            """
+        )
+    ).all()
+    # 같은 칸이 이미 행으로 있으면 uc_time_table 에 걸리므로 없는 칸만 행으로 만듦
+    existing = {
+        (row.table_id, row.user_id, row.day, row.start_time)
+        for row in bind.execute(
+            sa.text(
+                f"""
+                SELECT table_id, user_id, day, start_time FROM scheduleblock
+                WHERE {HOURLY_BLOCK}
+                """
+            )
+        )
+    }
+    blocks = [
+        {
+            "id": create_uuid(),
+            "table_id": str(row.table_id),
+            "user_id": str(row.user_id),
+            "day": day,
+            "start_time": hour,
+            "start_minute": 0,
+            "end_time": hour,
+            "end_minute": 59,
+        }
+        for row in filled
+        for day, mask in enumerate(row.hours)
+        for hour in iter_hours(mask)
+        if (row.table_id, row.user_id, day, hour) not in existing
+    ]
+    if blocks:
+        op.bulk_insert(scheduleblock, blocks)
+    op.execute(
+        """
+        UPDATE availability SET hours = '{0,0,0,0,0,0,0}'::integer[], updated_at = now()
+        WHERE 0 <> ANY(hours)
+        """
+    )
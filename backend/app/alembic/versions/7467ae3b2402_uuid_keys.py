@@ -0,0 +1,54 @@
+"""Store ids as uuid
+
+Revision ID: 7467ae3b2402
+Revises: 7c2782afb284
+Create Date: 2026-10-18 11:47:22.530913
+
+32자 hex 문자열 id 와 외래 키를 16바이트 uuid 로 바꿈
+기존 id 는 모두 create_uuid 가 만든 hex 라서 그대로 캐스팅되고, API 에는 예전과 같은 hex 로 보임
+컬럼 타입을 바꾸면 테이블과 인덱스를 다시 쓰므로 그동안 테이블이 잠김
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7467ae3b2402"
+down_revision = "7c2782afb284"
+branch_labels = None
+depends_on = None
+
+# (테이블, 컬럼, 참조 테이블)
+FOREIGN_KEYS = [
+    ("timetable", "create_user_id", "user"),
+    ("scheduleblock", "table_id", "timetable"),
+    ("scheduleblock", "user_id", "user"),
+    ("availability", "table_id", "timetable"),
+    ("availability", "user_id", "user"),
+]
+PRIMARY_KEYS = ["user", "timetable", "scheduleblock", "availability"]
+
+
+def alter_types(type_: str, using: str) -> None:
+    for table, column, referred in FOREIGN_KEYS:
+        op.drop_constraint(f"{table}_{column}_fkey", table, type_="foreignkey")
+    for table in PRIMARY_KEYS:
+        op.execute(
+            f'ALTER TABLE "{table}" ALTER COLUMN id TYPE {type_} USING {using % "id"}'
+        )
+    for table, column, referred in FOREIGN_KEYS:
+        op.execute(
+            f'ALTER TABLE "{table}" ALTER COLUMN {column} TYPE {type_} '
+            f"USING {using % column}"
+        )
+    for table, column, referred in FOREIGN_KEYS:
+        op.create_foreign_key(
+            f"{table}_{column}_fkey", table, referred, [column], ["id"]
+        )
+
+
+def upgrade():
+    alter_types("uuid", "%s::uuid")
+
+
+def downgrade():
+    alter_types("varchar", "replace(%s::text, '-', '')")
@@ -0,0 +1,144 @@
+"""Create tables
+
+Revision ID: 7a34b5600fa0
+Revises:
+Create Date: 2026-10-18 10:12:41.207315
+
+지금까지 init_db 의 create_all 이 만들던 스키마 그대로
+create_all 로 만든 DB 에서 처음 upgrade 하면 이미 있는 테이블은 건너뛰고 이 리비전으로 기록됨
+timetable.version 은 뒤의 리비전 b3d8f1e6a2c4 가 추가함
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "7a34b5600fa0"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "color" not in existing:
+        op.create_table(
+            "color",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("name", sa.String(length=128), nullable=True),
+            sa.Column("hex", sa.String(length=10), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_color_id"), "color", ["id"], unique=False)
+    if "user" not in existing:
+        op.create_table(
+            "user",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("email", sa.String(), nullable=True),
+            sa.Column("hashed_password", sa.String(), nullable=True),
+            sa.Column("kakao_id", sa.BigInteger(), nullable=True),
+            sa.Column("color_id", sa.Integer(), nullable=True),
+            sa.Column("nickname", sa.String(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("is_superuser", sa.Boolean(), nullable=True),
+            sa.ForeignKeyConstraint(["color_id"], ["color.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_user_email"), "user", ["email"], unique=True)
+        op.create_index(op.f("ix_user_id"), "user", ["id"], unique=False)
+    if "timetable" not in existing:
+        op.create_table(
+            "timetable",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("title", sa.String(), nullable=True),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("create_user_id", sa.String(), nullable=True),
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.text("now()"),
+                nullable=True,
+            ),
+            sa.ForeignKeyConstraint(["create_user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            op.f("ix_timetable_description"),
+            "timetable",
+            ["description"],
+            unique=False,
+        )
+        op.create_index(op.f("ix_timetable_id"), "timetable", ["id"], unique=False)
+        op.create_index(
+            op.f("ix_timetable_title"), "timetable", ["title"], unique=False
+        )
+    if "scheduleblock" not in existing:
+        op.create_table(
+            "scheduleblock",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("table_id", sa.String(), nullable=True),
+            sa.Column("user_id", sa.String(), nullable=True),
+            sa.Column("start_time", sa.SmallInteger(), nullable=True),
+            sa.Column("start_minute", sa.SmallInteger(), nullable=True),
+            sa.Column("end_time", sa.SmallInteger(), nullable=True),
+            sa.Column("end_minute", sa.SmallInteger(), nullable=True),
+            sa.Column("day", sa.SmallInteger(), nullable=True),
+            sa.Column("label", sa.String(), nullable=True),
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.text("now()"),
+                nullable=True,
+            ),
+            sa.ForeignKeyConstraint(["table_id"], ["timetable.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint(
+                "table_id",
+                "user_id",
+                "start_time",
+                "start_minute",
+                "end_time",
+                "end_minute",
+                "day",
+                name="uc_time_table",
+            ),
+        )
+        op.create_index(
+            op.f("ix_scheduleblock_id"), "scheduleblock", ["id"], unique=False
+        )
+    if "availability" not in existing:
+        op.create_table(
+            "availability",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("table_id", sa.String(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column(
+                "hours",
+                postgresql.ARRAY(sa.Integer(), zero_indexes=True),
+                nullable=False,
+            ),
+            sa.Column(
+                "updated_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.text("now()"),
+                nullable=True,
+            ),
+            sa.ForeignKeyConstraint(["table_id"], ["timetable.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("table_id", "user_id", name="uc_availability"),
+        )
+        op.create_index(
+            op.f("ix_availability_id"), "availability", ["id"], unique=False
+        )
+
+
+def downgrade():
+    op.drop_table("availability")
+    op.drop_table("scheduleblock")
+    op.drop_table("timetable")
+    op.drop_table("user")
+    op.drop_table("color")
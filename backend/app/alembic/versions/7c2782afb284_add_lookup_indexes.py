@@ -0,0 +1,62 @@
+"""Add lookup indexes
+
+Revision ID: 7c2782afb284
+Revises: b3d8f1e6a2c4
+Create Date: 2026-10-18 10:31:05.846120
+
+CRUD 모듈의 조회마다 맞춘 인덱스를 만들고, 기본 키와 겹치거나 쓰지 않는 인덱스를 지움
+운영 중인 테이블을 잠그지 않도록 CONCURRENTLY 로 만들고 지움
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7c2782afb284"
+down_revision = "b3d8f1e6a2c4"
+branch_labels = None
+depends_on = None
+
+# (이름, 테이블, 컬럼)
+LOOKUP_INDEXES = [
+    # crud.user.get_by_kakao_id, 카카오 로그인마다
+    ("ix_user_kakao_id", "user", ["kakao_id"]),
+    # crud.timetable.get_by_user_id, 내 타임테이블 목록
+    ("ix_timetable_create_user_id", "timetable", ["create_user_id"]),
+    # delete_day_by_user_id. table_id, (table_id, user_id),
+    # (table_id, user_id, start_time) 조회는 uc_time_table 이 맡음
+    (
+        "ix_scheduleblock_table_id_user_id_day",
+        "scheduleblock",
+        ["table_id", "user_id", "day"],
+    ),
+    # bump_user_timetable_versions, 유저가 참여한 타임테이블
+    ("ix_scheduleblock_user_id_table_id", "scheduleblock", ["user_id", "table_id"]),
+    ("ix_availability_user_id_table_id", "availability", ["user_id", "table_id"]),
+]
+
+# 기본 키와 같은 컬럼이거나 어느 조회도 쓰지 않고 쓰기만 느리게 하는 인덱스
+UNUSED_INDEXES = [
+    ("ix_color_id", "color", ["id"]),
+    ("ix_user_id", "user", ["id"]),
+    ("ix_timetable_id", "timetable", ["id"]),
+    ("ix_timetable_title", "timetable", ["title"]),
+    ("ix_timetable_description", "timetable", ["description"]),
+    ("ix_scheduleblock_id", "scheduleblock", ["id"]),
+    ("ix_availability_id", "availability", ["id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in LOOKUP_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+        for name, table, _ in UNUSED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in UNUSED_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+        for name, table, _ in LOOKUP_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
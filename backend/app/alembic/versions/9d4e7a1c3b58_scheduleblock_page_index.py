@@ -0,0 +1,48 @@
+"""Scheduleblock page index
+
+Revision ID: 9d4e7a1c3b58
+Revises: 3f9c2d71b6a4
+Create Date: 2026-10-18 23:02:51.117604
+
+스케쥴 블록 페이지를 ScheduleKey(user_id, day, start_time, id) 위치부터 읽도록
+(table_id, user_id, day) 인덱스를 (table_id, user_id, day, start_time, id) 로 바꿈
+요일 삭제는 새 인덱스의 앞 컬럼으로 그대로 찾음. 잠그지 않도록 CONCURRENTLY 로 만들고 지움
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9d4e7a1c3b58"
+down_revision = "3f9c2d71b6a4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_scheduleblock_table_id_user_id_day_start_time",
+            "scheduleblock",
+            ["table_id", "user_id", "day", "start_time", "id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_scheduleblock_table_id_user_id_day",
+            table_name="scheduleblock",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_scheduleblock_table_id_user_id_day",
+            "scheduleblock",
+            ["table_id", "user_id", "day"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_scheduleblock_table_id_user_id_day_start_time",
+            table_name="scheduleblock",
+            postgresql_concurrently=True,
+        )
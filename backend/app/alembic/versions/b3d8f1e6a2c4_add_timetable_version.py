@@ -0,0 +1,32 @@
+"""Add timetable version
+
+Revision ID: b3d8f1e6a2c4
+Revises: 5b1e0c9d2a47
+Create Date: 2026-10-18 10:29:41.205376
+
+스케쥴 블록을 바꿀 때마다 올리는 타임테이블 버전. 조회 응답의 ETag 를 만듦
+create_all 로 만든 DB 에는 version 이 있을 수도, 없을 수도 있으므로 없을 때만 추가함
+기존 타임테이블은 0 에서 시작함
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "b3d8f1e6a2c4"
+down_revision = "5b1e0c9d2a47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = sa.inspect(op.get_bind()).get_columns("timetable")
+    if "version" not in {column["name"] for column in columns}:
+        op.add_column(
+            "timetable",
+            sa.Column("version", sa.Integer(), server_default="0", nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_column("timetable", "version")
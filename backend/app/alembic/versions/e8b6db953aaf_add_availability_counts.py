@@ -0,0 +1,53 @@
+"""Add availability counts
+
+Revision ID: e8b6db953aaf
+Revises: 7467ae3b2402
+Create Date: 2026-10-18 16:53:47.005972
+
+타임테이블별 칸 참여자 수 집계와 참여자별 칸 비트셋
+기존 타임테이블은 처음 조회하거나 쓸 때 원본 행에서 세므로 따로 채우지 않음
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "e8b6db953aaf"
+down_revision = "7467ae3b2402"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "availabilitycount",
+        sa.Column("table_id", postgresql.UUID(), nullable=False),
+        sa.Column("slot_minutes", sa.SmallInteger(), nullable=False),
+        sa.Column(
+            "counts", postgresql.ARRAY(sa.Integer(), zero_indexes=True), nullable=False
+        ),
+        sa.Column("participant_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["table_id"], ["timetable.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("table_id"),
+    )
+    op.create_table(
+        "participantslots",
+        sa.Column("table_id", postgresql.UUID(), nullable=False),
+        sa.Column("user_id", postgresql.UUID(), nullable=False),
+        sa.Column("slots", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(["table_id"], ["timetable.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("table_id", "user_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("participantslots")
+    op.drop_table("availabilitycount")
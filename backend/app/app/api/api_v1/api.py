@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import root, scheduleblocks, timetables, users
+from app.api.api_v1.endpoints import metrics, root, scheduleblocks, timetables, users
 
 api_router = APIRouter()
 
@@ -8,3 +8,4 @@ api_router.include_router(root.router, tags=["root"])
 api_router.include_router(scheduleblocks.router, tags=["scheduleblocks"])
 api_router.include_router(timetables.router, tags=["timetables"])
 api_router.include_router(users.router, tags=["users"])
+api_router.include_router(metrics.router, tags=["metrics"])
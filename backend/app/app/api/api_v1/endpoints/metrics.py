@@ -0,0 +1,51 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from app import models
+from app.api import deps
+from app.core.rooms import manager
+from app.crud.crud_user import user_cache
+from app.db.pool import pool_stats
+from app.db.session import async_engine, engine
+
+router = APIRouter()
+
+
+@router.get("/metrics/user-cache", response_model=Dict[str, Any])
+def get_user_cache_metrics(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    로그인 유저 캐시의 크기와 적중/실패 횟수 조회
+
+    슈퍼유저 JWT 필요
+    """
+    return user_cache.stats()
+
+
+@router.get("/metrics/websocket", response_model=Dict[str, Any])
+def get_websocket_metrics(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    이 워커의 웹소켓 방/연결 수와 버린 메시지, 끊은 느린 연결 수 조회
+
+    슈퍼유저 JWT 필요
+    """
+    return manager.stats()
+
+
+@router.get("/metrics/db-pool", response_model=Dict[str, Any])
+def get_db_pool_metrics(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    이 워커의 동기/비동기 DB 커넥션 풀 상태와 checkout 대기 시간 조회
+
+    슈퍼유저 JWT 필요
+    """
+    return {
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine.sync_engine),
+    }
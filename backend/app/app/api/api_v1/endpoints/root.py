@@ -1,7 +1,8 @@
-from typing import List
-
 from fastapi import APIRouter, WebSocket
 from fastapi.responses import HTMLResponse
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.rooms import manager
 
 router = APIRouter()
 
@@ -54,38 +55,20 @@ def root() -> HTMLResponse:
     return HTMLResponse(html)
 
 
-class ConnectionManager:
-    def __init__(self) -> None:
-        self.connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket, timetable_id: str) -> None:
-        await websocket.accept()
-        self.connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket) -> None:
-        self.connections.append(websocket)
-
-    async def send_message_by_id(self, websocket: WebSocket, message: str) -> None:
-        await websocket.send_text(message)
-
-    async def send_message_to_all(self, timetable_id: str, message: str) -> None:
-        for connection in self.connections:
-            await connection.send_text(f"{timetable_id}: {message}")
-
-
-manager = ConnectionManager()
-
-
 @router.websocket("/ws/{timetable_id}")
 async def ws_connect(websocket: WebSocket, timetable_id: str) -> None:
-    await manager.connect(websocket=websocket, timetable_id=timetable_id)
+    """
+    타임테이블 방에 참여. 클라이언트가 보낸 텍스트는 "<timetable_id>: <text>" 로 방 전체에 전달되고,
+    스케쥴 블록이 바뀌어 커밋되면 type 이 "scheduleblocks" 인 JSON 변경 이벤트가 전달됨
+    변경 내용이 너무 커서 다른 워커로 보낼 수 없으면 type 이 "scheduleblocks_refetch" 인 이벤트가 대신 전달됨
+    """
+    client = await manager.connect(websocket=websocket, timetable_id=timetable_id)
     try:
         while True:
-            # 여기에 다른 사람의 제출을 기다렸다가 쏴주는 로직이 필요함 근데 db에 저장되고 call을 할 수 있을까?
-            # db 저장시 lock이 걸려도 괜찮을까?
-            # 방장에게만 쏴주어도 될까? 전체에게 쏴주어야 할까?
             data = await websocket.receive_text()
             await manager.send_message_to_all(timetable_id, data)
 
-    except Exception:
-        manager.disconnect(websocket)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(client)
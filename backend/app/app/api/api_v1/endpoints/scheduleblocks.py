@@ -1,11 +1,11 @@
 from typing import Any, List
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
-from app.models import scheduleblock
 
 router = APIRouter()
 
@@ -30,26 +30,17 @@ def create_scheduleblock(
 @router.post(
     "/scheduleblocks/all", status_code=201, response_model=List[schemas.ScheduleBlock]
 )
-def create_all_scheduleblocks(
+async def create_all_scheduleblocks(
     timetable_id: str,
     *,
-    db: Session = Depends(deps.get_db),
-    current_user: schemas.User = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: schemas.User = Depends(deps.get_async_current_user),
 ) -> Any:
     """
     특정 타임테이블에 특정 유저의 모든 스케쥴 블럭 생성하는 API
     """
 
-    get_db = crud.scheduleblock.get_all_by_user_id(
-        db, table_id=timetable_id, user_id=current_user.id
-    )
-
-    if get_db is not None:
-        _deleted = crud.scheduleblock.delete_all_by_user_id(
-            db, table_id=timetable_id, user_id=current_user.id
-        )
-
-    scheduleblocks = crud.scheduleblock.create_all_by_user_id(
+    scheduleblocks = await crud.async_scheduleblock.replace_all_by_user_id(
         db, table_id=timetable_id, user_id=current_user.id
     )
 
@@ -77,27 +68,18 @@ def delete_all_scheduleblocks(
 @router.post(
     "/scheduleblocks/day", status_code=201, response_model=List[schemas.ScheduleBlock]
 )
-def create_day_all_scheduleblocks(
+async def create_day_all_scheduleblocks(
     timetable_id: str,
     day: int,
     *,
-    db: Session = Depends(deps.get_db),
-    current_user: schemas.User = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: schemas.User = Depends(deps.get_async_current_user),
 ) -> Any:
     """
     특정 타임테이블에 특정 유저의 특정 요일 스케쥴 블럭을 모두 생성
     """
 
-    get_db = crud.scheduleblock.get_all_by_user_id(
-        db, table_id=timetable_id, user_id=current_user.id
-    )
-
-    if get_db is not None:
-        _deleted = crud.scheduleblock.delete_day_by_user_id(
-            db, table_id=timetable_id, user_id=current_user.id, day=day,
-        )
-
-    scheduleblocks = crud.scheduleblock.create_day_by_user_id(
+    scheduleblocks = await crud.async_scheduleblock.replace_day_by_user_id(
         db, table_id=timetable_id, user_id=current_user.id, day=day,
     )
 
@@ -126,27 +108,18 @@ def delete_day_scheduleblocks(
 @router.post(
     "/scheduleblocks/time", status_code=201, response_model=List[schemas.ScheduleBlock]
 )
-def create_time_all_scheduleblocks(
+async def create_time_all_scheduleblocks(
     timetable_id: str,
     start_time: int,
     *,
-    db: Session = Depends(deps.get_db),
-    current_user: schemas.User = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: schemas.User = Depends(deps.get_async_current_user),
 ) -> Any:
     """
     특정 타임테이블에 특정 유저의 특정 요일 스케쥴 블럭을 모두 생성
     """
 
-    get_db = crud.scheduleblock.get_all_by_user_id(
-        db, table_id=timetable_id, user_id=current_user.id
-    )
-
-    if get_db is not None:
-        _deleted = crud.scheduleblock.delete_time_by_user_id(
-            db, table_id=timetable_id, user_id=current_user.id, start_time=start_time,
-        )
-
-    scheduleblocks = crud.scheduleblock.create_time_by_user_id(
+    scheduleblocks = await crud.async_scheduleblock.replace_time_by_user_id(
         db, table_id=timetable_id, user_id=current_user.id, start_time=start_time,
     )
 
@@ -172,7 +145,9 @@ def delete_time_all_scheduleblocks(
     return scheduleblocks
 
 
-@router.patch("/scheduleblocks", status_code=201)
+@router.patch(
+    "/scheduleblocks", status_code=201, response_model=List[schemas.ScheduleBlock]
+)
 def update_scheduleblock_by_id(
     *,
     db: Session = Depends(deps.get_db),
@@ -181,30 +156,19 @@ def update_scheduleblock_by_id(
 ) -> Any:
     """ 스케쥴 블록 수정
     JWT 필요
-    """
-
-    scheduleblocks: List[scheduleblock.ScheduleBlock] = []
 
-    for scheduleblock_in in scheduleblocks_in:
-        scheduleblock_db = crud.scheduleblock.get(db, id=scheduleblock_in.id)
-
-        if scheduleblock_db is None:
-            raise HTTPException(status_code=404, detail="Scheduleblock not found")
-
-        if scheduleblock_db.user_id != current_user.id:
-            raise HTTPException(
-                status_code=403, detail="The user doesn't have enough privileges"
-            )
-
-        updated_scheduleblock = crud.scheduleblock.update(
-            db, db_obj=scheduleblock_db, obj_in=scheduleblock_in
-        )
+    한 번에 조회하고 한 번에 커밋함. 하나라도 없거나 본인 블록이 아니면 전부 수정하지 않음
+    """
 
-        scheduleblocks.append(updated_scheduleblock)
+    scheduleblocks = crud.scheduleblock.update_many_by_user_id(
+        db, objs_in=scheduleblocks_in, user_id=current_user.id
+    )
     return scheduleblocks
 
 
-@router.delete("/scheduleblocks/{scheduleblock_id}")
+@router.delete(
+    "/scheduleblocks/{scheduleblock_id}", response_model=schemas.ScheduleBlock
+)
 def delete_scheduleblock_by_id(
     scheduleblock_id: str,
     db: Session = Depends(deps.get_db),
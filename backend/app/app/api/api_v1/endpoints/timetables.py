@@ -1,10 +1,31 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.requests import Request
+from starlette.responses import Response
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.etag import check_etag, make_etag, query_tag
+from app.api.formats import (
+    FORMAT_PATTERN,
+    NDJSON,
+    SCHEDULEBLOCK_TABLE_RESPONSES,
+    format_etag_parts,
+    negotiate_format,
+    render_scheduleblocks,
+    set_vary,
+    stream_scheduleblocks,
+)
+from app.api.pagination import (
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    page_etag_parts,
+    set_next_link,
+)
+from app.db.session import SessionLocal
 
 router = APIRouter()
 
@@ -24,11 +45,13 @@ def get_my_timetables(
 
 
 @router.get("/timetables/{timetable_id}", response_model=schemas.TimeTable)
-def get_timetable_by_id(timetable_id: str, db: Session = Depends(deps.get_db)) -> Any:
+async def get_timetable_by_id(
+    timetable_id: str, db: AsyncSession = Depends(deps.get_async_db)
+) -> Any:
     """
     타임테이블 정보 보기
     """
-    timetables = crud.timetable.get(db, id=timetable_id)
+    timetables = await crud.async_timetable.get(db, id=timetable_id)
     if timetables is None:
         raise HTTPException(status_code=404, detail="Timetable not found")
     return timetables
@@ -37,33 +60,290 @@ def get_timetable_by_id(timetable_id: str, db: Session = Depends(deps.get_db)) -
 @router.get(
     "/timetables/{timetable_id}/scheduleblocks",
     response_model=List[schemas.ScheduleBlock],
+    responses=SCHEDULEBLOCK_TABLE_RESPONSES,
 )
-def get_scheduleblocks_by_timetable_id(
-    timetable_id: str, db: Session = Depends(deps.get_db)
+async def get_scheduleblocks_by_timetable_id(
+    timetable_id: str,
+    request: Request,
+    response: Response,
+    format: Optional[str] = Query(None, regex=FORMAT_PATTERN),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    expand: bool = False,
+    db: AsyncSession = Depends(deps.get_async_db),
 ) -> Any:
     """
     타임테이블의 스케쥴 블록 조회
+    ETag 를 If-None-Match 로 보내면 바뀐 게 없을 때 스케쥴 블록을 조회하지 않고 304 반환
+    format=columns(JSON) 또는 msgpack, 또는 같은 Accept 헤더로 열 단위 형식을 받을 수 있음
+    limit 을 주면 (user_id, day, start_time) 순서로 limit 개씩 나누어 반환하고,
+    다음 페이지가 있으면 Link 헤더(rel="next")로 cursor 를 붙인 주소를 알려 줌
+    format=ndjson 이면 cursor 다음의 블록을 끝까지 한 줄에 하나씩 스트리밍함
+    expand=true 이면 여러 시간에 걸친 블록을 "<id>-<시>" id 의 시간 칸 조각으로 펼쳐서 반환
     """
-    scheduleblock = crud.scheduleblock.get_all(db, table_id=timetable_id)
-    return scheduleblock
+    response_format = negotiate_format(request, format)
+    after = decode_cursor(cursor)
+    set_vary(response)
+    version = await crud.async_timetable.get_version(db, id=timetable_id)
+    if version is not None:
+        etag = make_etag(
+            version,
+            *format_etag_parts(response_format, expand),
+            *page_etag_parts(limit, after),
+        )
+        not_modified = check_etag(request, response, etag)
+        if not_modified:
+            set_vary(not_modified)
+            return not_modified
+    if response_format == NDJSON:
+        rendered = stream_scheduleblocks(
+            crud.async_scheduleblock.stream(
+                db, table_id=timetable_id, after=after, expand=expand
+            )
+        )
+    elif limit is not None:
+        scheduleblock, next_key = await crud.async_scheduleblock.get_page(
+            db, table_id=timetable_id, after=after, limit=limit
+        )
+        if expand:
+            scheduleblock = crud.async_scheduleblock.expand_blocks(scheduleblock)
+        rendered = render_scheduleblocks(response_format, timetable_id, scheduleblock)
+        set_next_link(request, rendered, next_key)
+    else:
+        scheduleblock = await crud.async_scheduleblock.get_all(
+            db, table_id=timetable_id
+        )
+        if expand:
+            scheduleblock = crud.async_scheduleblock.expand_blocks(scheduleblock)
+        rendered = render_scheduleblocks(response_format, timetable_id, scheduleblock)
+    rendered.headers.update(response.headers)
+    return rendered
 
 
 @router.get(
     "/timetables/{timetable_id}/scheduleblocks/me",
     response_model=List[schemas.ScheduleBlock],
+    responses=SCHEDULEBLOCK_TABLE_RESPONSES,
 )
-def get_my_scheduleblocks_by_timetable_id(
+async def get_my_scheduleblocks_by_timetable_id(
     timetable_id: str,
-    db: Session = Depends(deps.get_db),
-    current_user: schemas.User = Depends(deps.get_current_user),
+    request: Request,
+    response: Response,
+    format: Optional[str] = Query(None, regex=FORMAT_PATTERN),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    expand: bool = False,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: schemas.User = Depends(deps.get_async_current_user),
 ) -> Any:
     """
     로그인한 유저 본인의 타임테이블의 스케쥴 블록 조회
+    ETag 를 If-None-Match 로 보내면 바뀐 게 없을 때 스케쥴 블록을 조회하지 않고 304 반환
+    응답 형식, limit/cursor 페이지, expand 는 전체 조회와 같음
     """
-    scheduleblocks = crud.scheduleblock.get_all_by_user_id(
-        db, table_id=timetable_id, user_id=current_user.id
+    response_format = negotiate_format(request, format)
+    after = decode_cursor(cursor)
+    set_vary(response)
+    version = await crud.async_timetable.get_version(db, id=timetable_id)
+    if version is not None:
+        etag = make_etag(
+            version,
+            current_user.id,
+            *format_etag_parts(response_format, expand),
+            *page_etag_parts(limit, after),
+        )
+        not_modified = check_etag(request, response, etag)
+        if not_modified:
+            set_vary(not_modified)
+            return not_modified
+    if response_format == NDJSON:
+        rendered = stream_scheduleblocks(
+            crud.async_scheduleblock.stream(
+                db,
+                table_id=timetable_id,
+                user_id=current_user.id,
+                after=after,
+                expand=expand,
+            )
+        )
+    elif limit is not None:
+        scheduleblocks, next_key = await crud.async_scheduleblock.get_page(
+            db, table_id=timetable_id, user_id=current_user.id, after=after, limit=limit
+        )
+        if expand:
+            scheduleblocks = crud.async_scheduleblock.expand_blocks(scheduleblocks)
+        rendered = render_scheduleblocks(response_format, timetable_id, scheduleblocks)
+        set_next_link(request, rendered, next_key)
+    else:
+        scheduleblocks = await crud.async_scheduleblock.get_all_by_user_id(
+            db, table_id=timetable_id, user_id=current_user.id
+        )
+        if expand:
+            scheduleblocks = crud.async_scheduleblock.expand_blocks(scheduleblocks)
+        rendered = render_scheduleblocks(response_format, timetable_id, scheduleblocks)
+    rendered.headers.update(response.headers)
+    return rendered
+
+
+@router.get(
+    "/timetables/{timetable_id}/availability", response_model=schemas.Availability
+)
+def get_availability_by_timetable_id(
+    timetable_id: str,
+    request: Request,
+    response: Response,
+    slot_minutes: int = 60,
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    타임테이블의 요일/시간 칸별 가능한 참여자 수와 참여자 id 목록 조회
+    slot_minutes 는 하루(1440분)를 나누어 떨어지게 해야 함
+    """
+    timetable = crud.timetable.get(db, id=timetable_id)
+    if timetable is None:
+        raise HTTPException(status_code=404, detail="Timetable not found")
+    etag = make_etag(timetable.version, query_tag(slot_minutes=slot_minutes))
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+    availability = crud.scheduleblock.get_heatmap(
+        db, table_id=timetable_id, slot_minutes=slot_minutes
+    )
+    return availability
+
+
+def rebuild_availability_counts(table_id: str) -> None:
+    db = SessionLocal()
+    try:
+        crud.availability_count.rebuild(db, table_id=table_id)
+        db.commit()
+    finally:
+        db.close()
+
+
+@router.get(
+    "/timetables/{timetable_id}/availability/counts",
+    response_model=schemas.AvailabilityCounts,
+)
+def get_availability_counts_by_timetable_id(
+    timetable_id: str,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    타임테이블의 요일/시간 칸별 가능한 참여자 수만 조회
+    스케쥴 블록을 바꿀 때마다 미리 세어 두므로 참여자나 블록이 많아도 칸 수만큼만 읽음
+    칸 크기는 서버 설정(AVAILABILITY_COUNT_SLOT_MINUTES)을 따름
+    미리 센 값이 없으면 이번에는 원본 행에서 세고, 응답을 보낸 뒤 따로 저장함
+    """
+    timetable = crud.timetable.get(db, id=timetable_id)
+    if timetable is None:
+        raise HTTPException(status_code=404, detail="Timetable not found")
+    etag = make_etag(timetable.version, crud.availability_count.slot_minutes)
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+    counts = crud.availability_count.get(
+        db,
+        table_id=timetable_id,
+        on_stale=lambda table_id: background_tasks.add_task(
+            rebuild_availability_counts, table_id
+        ),
+    )
+    return counts
+
+
+@router.get(
+    "/timetables/{timetable_id}/availability/best",
+    response_model=List[schemas.MeetingWindow],
+)
+def get_best_windows_by_timetable_id(
+    timetable_id: str,
+    request: Request,
+    response: Response,
+    duration_minutes: int = 60,
+    step_minutes: int = 30,
+    limit: int = 5,
+    required_user_ids: List[str] = Query([]),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    duration_minutes 이상 함께 만날 수 있는 구간을 가능한 인원이 많은 순으로 limit 개 조회
+    required_user_ids 를 주면 그 참여자들이 모두 가능한 구간만 반환
+    """
+    timetable = crud.timetable.get(db, id=timetable_id)
+    if timetable is None:
+        raise HTTPException(status_code=404, detail="Timetable not found")
+    etag = make_etag(
+        timetable.version,
+        query_tag(
+            duration_minutes=duration_minutes,
+            step_minutes=step_minutes,
+            limit=limit,
+            required_user_ids=required_user_ids,
+        ),
+    )
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+    windows = crud.scheduleblock.get_best_windows(
+        db,
+        table_id=timetable_id,
+        duration_minutes=duration_minutes,
+        step_minutes=step_minutes,
+        required_user_ids=required_user_ids,
+        limit=limit,
+    )
+    return windows
+
+
+@router.get(
+    "/timetables/{timetable_id}/availability/free",
+    response_model=schemas.FreeParticipants,
+)
+def get_free_participants_by_timetable_id(
+    timetable_id: str,
+    request: Request,
+    response: Response,
+    day: int,
+    start_time: int,
+    start_minute: int,
+    end_time: int,
+    end_minute: int,
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    요일의 start_time:start_minute 부터 end_time:end_minute 까지(끝 분 포함) 가능한 참여자 조회
+    구간 전체가 가능한 참여자는 covering_user_ids, 일부만 가능한 참여자는 partial_user_ids 로 반환
+    """
+    timetable = crud.timetable.get(db, id=timetable_id)
+    if timetable is None:
+        raise HTTPException(status_code=404, detail="Timetable not found")
+    etag = make_etag(
+        timetable.version,
+        query_tag(
+            day=day,
+            start_time=start_time,
+            start_minute=start_minute,
+            end_time=end_time,
+            end_minute=end_minute,
+        ),
+    )
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+    participants = crud.scheduleblock.get_free_participants(
+        db,
+        table_id=timetable_id,
+        day=day,
+        start_time=start_time,
+        start_minute=start_minute,
+        end_time=end_time,
+        end_minute=end_minute,
     )
-    return scheduleblocks
+    return participants
 
 
 @router.post("/timetables", response_model=schemas.TimeTable, status_code=201)
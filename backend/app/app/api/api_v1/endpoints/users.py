@@ -19,7 +19,7 @@ def user_kakao(
     kakao_user: schemas.KakaoUser = Depends(deps.get_kakao_user),
 ) -> Any:
 
-    user = crud.user.get_by_kakao_id(db, kakao_id=kakao_user.get("id"))
+    user = crud.user.get_by_kakao_id(db, kakao_id=kakao_user.id)
 
     if user:
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -34,7 +34,7 @@ def user_kakao(
         return access_token
 
     created_user = crud.user.create_by_kakao_id(
-        db, kakao_id=kakao_user.get("id"), nickname="",
+        db, kakao_id=kakao_user.id, nickname="",
     )
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
@@ -0,0 +1,50 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# 브라우저가 캐시한 응답을 쓰기 전에 항상 If-None-Match 로 다시 확인하게 함
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    압축 등으로 바이트가 달라져도 같은 내용이면 같은 값이 되도록 약한 ETag 를 씀
+    """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def query_tag(**params: Any) -> str:
+    """
+    같은 버전이라도 쿼리 값에 따라 본문이 다른 응답의 ETag 에 넣는 값
+    클라이언트가 보낸 값이 헤더에 그대로 들어가지 않도록 해시함
+    """
+    data = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(data.encode()).hexdigest()[:16]
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [_opaque_tag(tag) for tag in if_none_match.split(",")]
+    return "*" in tags or _opaque_tag(etag) in tags
+
+
+def check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    If-None-Match 가 etag 와 맞으면 본문 없는 304 응답을 반환하고,
+    아니면 응답에 ETag 헤더만 붙이고 None 을 반환함
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,186 @@
+from operator import attrgetter
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Union
+
+import msgpack
+import orjson
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+from app.schemas.scheduleblock import ScheduleBlock, ScheduleBlockTable
+
+# 스케쥴 블록 목록 응답 형식. json 은 기존의 블록별 객체 배열
+# ndjson 은 json 과 같은 객체를 한 줄에 하나씩 DB 에서 읽는 대로 스트리밍함
+JSON = "json"
+COLUMNS = "columns"
+MSGPACK = "msgpack"
+NDJSON = "ndjson"
+FORMATS = (JSON, COLUMNS, MSGPACK, NDJSON)
+FORMAT_PATTERN = f"^({'|'.join(FORMATS)})$"
+
+JSON_MEDIA_TYPE = "application/json"
+COLUMNS_MEDIA_TYPE = "application/vnd.meetbowl.columns+json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MEDIA_TYPES = {COLUMNS: COLUMNS_MEDIA_TYPE, MSGPACK: MSGPACK_MEDIA_TYPE}
+ACCEPT_FORMATS = {
+    COLUMNS_MEDIA_TYPE: COLUMNS,
+    MSGPACK_MEDIA_TYPE: MSGPACK,
+    "application/msgpack": MSGPACK,
+    NDJSON_MEDIA_TYPE: NDJSON,
+    JSON_MEDIA_TYPE: JSON,
+}
+
+# 기본 json 응답의 키 순서는 response_model 과 같게 함
+BLOCK_FIELDS = tuple(ScheduleBlock.__fields__)
+_block_values = attrgetter(*BLOCK_FIELDS)
+
+COLUMN_FIELDS = (
+    "day",
+    "start_time",
+    "start_minute",
+    "end_time",
+    "end_minute",
+    "label",
+)
+
+# OpenAPI 문서에 같은 200 응답의 다른 형식으로 보여 줌
+SCHEDULEBLOCK_TABLE_RESPONSES: Dict[Union[int, str], Dict[str, Any]] = {
+    200: {
+        "description": "Accept 헤더나 format 으로 columns, msgpack 을 고르면 열 단위 형식으로, "
+        "ndjson 을 고르면 한 줄에 블록 하나씩 스트리밍으로 반환",
+        "content": {
+            **{
+                media_type: {"schema": ScheduleBlockTable.schema()}
+                for media_type in MEDIA_TYPES.values()
+            },
+            NDJSON_MEDIA_TYPE: {"schema": ScheduleBlock.schema()},
+        },
+    }
+}
+
+
+def _accepted(accept: str) -> List[str]:
+    """
+    Accept 헤더의 미디어 타입을 q 값이 큰 순서로 정렬. q=0 은 뺌
+    """
+    weighted = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type and q > 0:
+            weighted.append((-q, position, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(weighted)]
+
+
+def negotiate_format(request: Request, format: Optional[str] = None) -> str:
+    """
+    format 쿼리를 먼저 보고, 없으면 Accept 헤더에서 가장 선호하는 형식을 고름
+    아무것도 맞지 않으면 기존 json
+    """
+    if format:
+        return format
+    for media_type in _accepted(request.headers.get("accept", "")):
+        if media_type in ACCEPT_FORMATS:
+            return ACCEPT_FORMATS[media_type]
+    return JSON
+
+
+def format_etag_parts(format: str, expand: bool = False) -> List[str]:
+    # json 응답의 ETag 는 예전과 같게 두고, 다른 형식과 펼친 응답만 구분함
+    parts = [] if format == JSON else [format]
+    if expand:
+        parts.append("expand")
+    return parts
+
+
+def set_vary(response: Response) -> None:
+    response.headers["Vary"] = "Accept"
+
+
+def scheduleblock_dicts(blocks: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    조회한 행을 ScheduleBlock 스키마와 같은 dict 로 바꿈
+    행마다 pydantic 모델을 만들어 검증하고 jsonable_encoder 를 다시 돌리지 않음
+    """
+    return [dict(zip(BLOCK_FIELDS, _block_values(block))) for block in blocks]
+
+
+def scheduleblock_columns(table_id: str, blocks: Iterable[Any]) -> Dict[str, Any]:
+    """
+    스케쥴 블록 목록을 열 단위로 바꿈
+    블록마다 반복되는 table_id 는 한 번만, 유저 정보는 참여자 목록에 한 번만 넣고 인덱스로 가리킴
+    """
+    participant_index: Dict[str, int] = {}
+    user_ids: List[str] = []
+    nicknames: List[Optional[str]] = []
+    colors: List[Optional[str]] = []
+    ids: List[str] = []
+    participants: List[int] = []
+    columns: Dict[str, List[Any]] = {field: [] for field in COLUMN_FIELDS}
+    appends = [(columns[field].append, field) for field in COLUMN_FIELDS]
+
+    for block in blocks:
+        index = participant_index.get(block.user_id)
+        if index is None:
+            index = participant_index[block.user_id] = len(user_ids)
+            user_ids.append(block.user_id)
+            nicknames.append(block.nickname)
+            colors.append(block.color)
+        ids.append(block.id)
+        participants.append(index)
+        for append, field in appends:
+            append(getattr(block, field))
+
+    return {
+        "table_id": table_id,
+        "participants": {"user_id": user_ids, "nickname": nicknames, "color": colors},
+        "blocks": {"id": ids, "participant": participants, **columns},
+    }
+
+
+def render_scheduleblocks(
+    format: str, table_id: str, blocks: Iterable[Any]
+) -> Response:
+    """
+    조회한 행을 바로 응답 바이트로 만듦
+    Response 를 반환하면 FastAPI 가 response_model 검증을 건너뛰므로,
+    response_model 은 OpenAPI 문서에만 쓰이고 형식은 scheduleblock_dicts 가 맞춤
+    """
+    if format == JSON:
+        content = orjson.dumps(scheduleblock_dicts(blocks))
+        media_type = JSON_MEDIA_TYPE
+    elif format == MSGPACK:
+        content = msgpack.packb(
+            scheduleblock_columns(table_id, blocks), use_bin_type=True
+        )
+        media_type = MSGPACK_MEDIA_TYPE
+    else:
+        content = orjson.dumps(scheduleblock_columns(table_id, blocks))
+        media_type = COLUMNS_MEDIA_TYPE
+    response = Response(content=content, media_type=media_type)
+    set_vary(response)
+    return response
+
+
+async def _ndjson_lines(batches: AsyncIterator[List[Any]]) -> AsyncIterator[bytes]:
+    async for blocks in batches:
+        yield b"".join(
+            orjson.dumps(block) + b"\n" for block in scheduleblock_dicts(blocks)
+        )
+
+
+def stream_scheduleblocks(batches: AsyncIterator[List[Any]]) -> Response:
+    """
+    DB 에서 읽은 묶음마다 NDJSON 줄로 바꿔 바로 보냄
+    응답 전체를 만들지 않으므로 블록 수와 상관없이 한 묶음만큼의 메모리만 씀
+    """
+    response = StreamingResponse(_ndjson_lines(batches), media_type=NDJSON_MEDIA_TYPE)
+    set_vary(response)
+    return response
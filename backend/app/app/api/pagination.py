@@ -0,0 +1,49 @@
+import base64
+import uuid
+from typing import List, Optional
+
+import orjson
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.api.etag import query_tag
+from app.crud.crud_scheduleblock import ScheduleKey
+
+# limit 으로 한 번에 받을 수 있는 최대 블록 수
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(key: ScheduleKey) -> str:
+    """
+    다음 페이지를 읽을 키. 클라이언트는 내용을 보지 않고 cursor 로 그대로 돌려줌
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(list(key))).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[ScheduleKey]:
+    if not cursor:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        user_id, day, start_time, id = orjson.loads(data)
+        return ScheduleKey(uuid.UUID(user_id).hex, int(day), int(start_time), str(id))
+    except (AttributeError, TypeError, ValueError):
+        # base64, JSON, uuid 오류는 모두 ValueError
+        raise HTTPException(400, detail="Invalid cursor")
+
+
+def set_next_link(
+    request: Request, response: Response, next_key: Optional[ScheduleKey]
+) -> None:
+    # 다음 페이지가 있으면 같은 조건에 cursor 만 바꾼 주소를 Link 헤더로 알려 줌
+    if next_key is not None:
+        url = request.url.include_query_params(cursor=encode_cursor(next_key))
+        response.headers["Link"] = f'<{url}>; rel="next"'
+
+
+def page_etag_parts(limit: Optional[int], after: Optional[ScheduleKey]) -> List[str]:
+    # 나누지 않은 응답의 ETag 는 예전과 같게 두고, 페이지마다 다른 ETag 를 씀
+    if limit is None and after is None:
+        return []
+    return [query_tag(limit=limit, cursor=after)]
@@ -0,0 +1,35 @@
+"""
+벤치마크가 쓰는 유저와 타임테이블을 만드는 함수
+벤치마크는 테스트 패키지 없이도 돌아야 하므로 app.tests.utils 를 쓰지 않음
+"""
+import random
+import string
+from typing import Tuple
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.schemas.timetable import TimeTableCreate
+from app.schemas.user import UserCreate
+
+
+def random_string() -> str:
+    return "".join(random.choices(string.ascii_lowercase, k=32))
+
+
+def create_user(db: Session) -> str:
+    email = f"{random_string()}@{random_string()}.com"
+    user = crud.user.create(db, obj_in=UserCreate(email=email))
+    return user.id
+
+
+def create_timetable(db: Session) -> Tuple[str, str]:
+    """
+    주인 유저와 타임테이블을 만들고 (table_id, user_id) 를 반환
+    """
+    user_id = create_user(db)
+    timetable_in = TimeTableCreate(title=random_string(), description=random_string())
+    timetable = crud.timetable.create_with_user_id(
+        db, obj_in=timetable_in, user_id=user_id
+    )
+    return timetable.id, user_id
@@ -0,0 +1,106 @@
+"""
+블록 합치기를 켰을 때와 껐을 때의 행 수, 인덱스 크기, 쓰기 지연 시간 비교
+
+    python -m app.benchmarks.compaction --users 50
+
+유저마다 평일 9~18시를 라벨이 있는 한 시간 블록으로 하나씩 추가하는 흔한 입력을
+두 방식으로 같은 수만큼 넣고, 그 타임테이블의 행만 scheduleblock 과 같은 인덱스를 가진
+임시 테이블로 옮겨 크기를 잼
+
+* off: 블록마다 한 행 (SCHEDULEBLOCK_COMPACTION=False)
+* on: 같은 유저/요일/라벨의 맞닿은 블록을 한 행으로 합침
+"""
+import argparse
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.benchmarks._data import create_timetable, create_user
+from app.benchmarks.utils import report, summarize
+from app.db.session import SessionLocal
+from app.schemas.scheduleblock import ScheduleBlockCreate
+
+WEEKDAYS = range(1, 6)
+WORK_HOURS = range(9, 18)
+LABEL = "work"
+
+
+def add_week(db: Session, table_id: str, user_id: str) -> List[float]:
+    samples = []
+    for day in WEEKDAYS:
+        for hour in WORK_HOURS:
+            block_in = ScheduleBlockCreate(
+                table_id=table_id,
+                start_time=hour,
+                start_minute=0,
+                end_time=hour,
+                end_minute=59,
+                day=day,
+                label=LABEL,
+            )
+            started = time.perf_counter()
+            crud.scheduleblock.create_with_user_id(db, obj_in=block_in, user_id=user_id)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def sizes(db: Session, table_id: str, mode: str) -> Dict[str, int]:
+    table = f"bench_compaction_{mode}"
+    db.execute(
+        text(
+            f"DROP TABLE IF EXISTS {table};"
+            f"CREATE TABLE {table} (LIKE scheduleblock INCLUDING INDEXES);"
+            f"INSERT INTO {table} SELECT * FROM scheduleblock WHERE table_id = :table_id"
+        ),
+        {"table_id": table_id},
+    )
+    row: Any = db.execute(
+        text(
+            f"SELECT count(*), pg_table_size('{table}'), pg_indexes_size('{table}') "
+            f"FROM {table}"
+        )
+    ).one()
+    db.execute(text(f"DROP TABLE {table}"))
+    db.commit()
+    return {"rows": row[0], "table_bytes": row[1], "index_bytes": row[2]}
+
+
+def run(db: Session, mode: str, *, users: int) -> None:
+    table_id, _ = create_timetable(db)
+    samples: List[float] = []
+    crud.scheduleblock.compaction = mode == "on"
+    try:
+        for _ in range(users):
+            samples.extend(add_week(db, table_id, create_user(db)))
+    finally:
+        crud.scheduleblock.compaction = False
+    report(
+        "compaction",
+        mode=mode,
+        users=users,
+        blocks=len(samples),
+        **sizes(db, table_id, mode),
+        **summarize(samples),
+    )
+    crud.timetable.remove(db, id=table_id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--modes", nargs="+", default=["off", "on"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        for mode in args.modes:
+            run(db, mode, users=args.users)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
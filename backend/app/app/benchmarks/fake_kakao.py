@@ -0,0 +1,133 @@
+"""
+오프라인 로그인 벤치마크와 테스트용 가짜 카카오 OAuth 서버
+
+    python -m app.benchmarks.fake_kakao --port 8090 --latency 0.02 --error-rate 0.1
+
+KAKAO_AUTH_HOST, KAKAO_API_HOST 를 http://localhost:8090 으로 두면 실제 카카오 대신 이 서버를 씀
+
+* POST /oauth/token: code 가 "invalid" 로 시작하면 400, 아니면 access_token 발급
+* POST /v2/user/me: 발급한 토큰이면 code 마다 고정된 id 반환, 아니면 401
+* latency 초만큼 늦게 응답하고, error_rate 비율로 503 을 반환함
+"""
+import argparse
+import asyncio
+import random
+import threading
+import zlib
+from typing import Optional
+
+from aiohttp import web
+
+TOKEN_PREFIX = "fake-token-"
+
+
+class FakeKakaoState:
+    """
+    실행 중에도 바꿀 수 있는 응답 설정과 받은 요청 수
+    """
+
+    def __init__(self, *, latency: float = 0.0, error_rate: float = 0.0) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+
+
+def kakao_id(code: str) -> int:
+    return zlib.crc32(code.encode()) + 1
+
+
+async def _delay(state: FakeKakaoState) -> Optional[web.Response]:
+    state.requests += 1
+    if state.latency:
+        await asyncio.sleep(state.latency)
+    if state.error_rate and random.random() < state.error_rate:
+        return web.json_response({"msg": "service unavailable"}, status=503)
+    return None
+
+
+def create_app(state: FakeKakaoState) -> web.Application:
+    async def token(request: web.Request) -> web.Response:
+        error = await _delay(state)
+        if error is not None:
+            return error
+        code = request.query.get("code", "")
+        if not code or code.startswith("invalid"):
+            return web.json_response(
+                {"error": "invalid_grant", "error_code": "KOE320"}, status=400
+            )
+        return web.json_response(
+            {
+                "access_token": TOKEN_PREFIX + code,
+                "token_type": "bearer",
+                "expires_in": 21599,
+            }
+        )
+
+    async def me(request: web.Request) -> web.Response:
+        error = await _delay(state)
+        if error is not None:
+            return error
+        _, _, access_token = request.headers.get("Authorization", "").partition(" ")
+        prefix, _, code = access_token.partition(TOKEN_PREFIX)
+        if prefix or not code:
+            return web.json_response(
+                {"msg": "this access token does not exist"}, status=401
+            )
+        return web.json_response({"id": kakao_id(code)})
+
+    app = web.Application()
+    app.router.add_post("/oauth/token", token)
+    app.router.add_post("/v2/user/me", me)
+    return app
+
+
+class FakeKakaoServer:
+    """
+    별도 스레드의 이벤트 루프에서 가짜 카카오 서버를 띄움. port=0 이면 빈 포트를 고름
+    """
+
+    def __init__(self, state: FakeKakaoState, *, host: str = "127.0.0.1") -> None:
+        self.state = state
+        self.host = host
+        self.port = 0
+        self._loop = asyncio.new_event_loop()
+        self._runner = web.AppRunner(create_app(state))
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, port: int = 0) -> "FakeKakaoServer":
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(port), self._loop).result()
+        return self
+
+    async def _start(self, port: int) -> None:
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, port, shutdown_timeout=1.0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    def stop(self) -> None:
+        if not self._thread.is_alive():
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    state = FakeKakaoState(latency=args.latency, error_rate=args.error_rate)
+    web.run_app(create_app(state), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
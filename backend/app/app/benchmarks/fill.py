@@ -0,0 +1,110 @@
+"""
+168칸 전체 채우기 한 번의 지연 시간 비교
+
+    python -m app.benchmarks.fill --runs 50
+
+* rows: 칸마다 ScheduleBlock ORM 객체를 만들어 add_all, commit 후 다시 조회하던 방식
+* bitmap: POST /scheduleblocks/all 이 부르는 crud.async_scheduleblock.replace_all_by_user_id
+  (행 지우기, 비트맵 upsert ... RETURNING, 다시 조회, 버전 올리기를 한 트랜잭션에서)
+"""
+import argparse
+import asyncio
+from typing import Any, List
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.benchmarks._data import create_timetable
+from app.benchmarks.utils import measure, report
+from app.core.security import create_uuid
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.models.availability import Availability
+from app.models.color import Color
+from app.models.scheduleblock import ScheduleBlock
+from app.models.user import User
+
+
+def fill_rows(db: Session, table_id: str, user_id: str) -> List[Any]:
+    db.add_all(
+        [
+            ScheduleBlock(
+                id=create_uuid(),
+                table_id=table_id,
+                user_id=user_id,
+                start_time=start_time,
+                start_minute=0,
+                end_time=start_time,
+                end_minute=59,
+                day=day,
+            )
+            for day in range(7)
+            for start_time in range(24)
+        ]
+    )
+    db.commit()
+    return (
+        db.query(
+            ScheduleBlock.id,
+            ScheduleBlock.start_time,
+            ScheduleBlock.start_minute,
+            ScheduleBlock.end_time,
+            ScheduleBlock.end_minute,
+            ScheduleBlock.day,
+            ScheduleBlock.label,
+            ScheduleBlock.user_id,
+            ScheduleBlock.table_id,
+            Color.hex.label("color"),
+            User.nickname,
+        )
+        .outerjoin(ScheduleBlock.user)
+        .outerjoin(User.color)
+        .filter(ScheduleBlock.table_id == table_id, User.id == user_id)
+        .all()
+    )
+
+
+async def replace_all(table_id: str, user_id: str) -> List[Any]:
+    async with AsyncSessionLocal() as async_db:
+        return await crud.async_scheduleblock.replace_all_by_user_id(
+            async_db, table_id=table_id, user_id=user_id
+        )
+
+
+def clear(db: Session, table_id: str, user_id: str) -> None:
+    db.query(ScheduleBlock).filter(
+        ScheduleBlock.table_id == table_id, ScheduleBlock.user_id == user_id
+    ).delete()
+    db.query(Availability).filter(
+        Availability.table_id == table_id, Availability.user_id == user_id
+    ).delete()
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    table_id, user_id = create_timetable(db)
+
+    def setup() -> None:
+        clear(db, table_id, user_id)
+
+    rows = measure(
+        lambda: fill_rows(db, table_id, user_id), runs=args.runs, setup=setup
+    )
+    loop = asyncio.get_event_loop()
+    bitmap = measure(
+        lambda: loop.run_until_complete(replace_all(table_id, user_id)),
+        runs=args.runs,
+        setup=setup,
+    )
+    clear(db, table_id, user_id)
+
+    report("fill_all", path="rows", **rows)
+    report("fill_all", path="bitmap", **bitmap)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+스케쥴 블록 목록 응답 형식별 크기와 직렬화 시간
+
+    python -m app.benchmarks.formats --participants 10 100 --runs 20
+
+참여자마다 168칸을 모두 채운 타임테이블을 메모리에서 만들어 DB 조회 시간은 빼고 비교함
+
+* json: response_model 검증, jsonable_encoder, JSONResponse 까지 FastAPI 가 하던 그대로
+* json_fast: app.api.formats 가 행을 바로 dict 로 바꿔 orjson 으로 만드는 같은 json
+* columns: app.api.formats 의 열 단위 JSON
+* msgpack: 같은 열 단위 구조의 MessagePack
+"""
+import argparse
+import asyncio
+from typing import Any, List
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from starlette.responses import JSONResponse
+
+from app import schemas
+from app.api.formats import COLUMNS, JSON, MSGPACK, render_scheduleblocks
+from app.benchmarks.utils import measure, report
+from app.core.availability import DAYS_PER_WEEK, HOURS_PER_DAY, cell_id
+from app.core.security import create_uuid
+from app.crud.crud_scheduleblock import ScheduleCell
+
+RESPONSE_FIELD = create_response_field(
+    name="scheduleblocks", type_=List[schemas.ScheduleBlock]
+)
+
+
+def make_cells(table_id: str, participants: int) -> List[ScheduleCell]:
+    cells: List[ScheduleCell] = []
+    for index in range(participants):
+        availability_id, user_id = create_uuid(), create_uuid()
+        cells.extend(
+            ScheduleCell(
+                id=cell_id(availability_id, day, hour),
+                start_time=hour,
+                start_minute=0,
+                end_time=hour,
+                end_minute=59,
+                day=day,
+                label=None,
+                user_id=user_id,
+                table_id=table_id,
+                color="#112233",
+                nickname=f"참여자{index}",
+            )
+            for day in range(DAYS_PER_WEEK)
+            for hour in range(HOURS_PER_DAY)
+        )
+    return cells
+
+
+def render_json(cells: List[ScheduleCell]) -> bytes:
+    content = asyncio.get_event_loop().run_until_complete(
+        serialize_response(field=RESPONSE_FIELD, response_content=cells)
+    )
+    return JSONResponse(content).body
+
+
+def render(format: str, table_id: str, cells: List[ScheduleCell]) -> Any:
+    return render_scheduleblocks(format, table_id, cells).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participants", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    table_id = create_uuid()
+    for participants in args.participants:
+        cells = make_cells(table_id, participants)
+        renderers = {
+            "json": lambda: render_json(cells),
+            "json_fast": lambda: render(JSON, table_id, cells),
+            COLUMNS: lambda: render(COLUMNS, table_id, cells),
+            MSGPACK: lambda: render(MSGPACK, table_id, cells),
+        }
+        for format, renderer in renderers.items():
+            report(
+                "scheduleblock_formats",
+                format=format,
+                participants=participants,
+                blocks=len(cells),
+                bytes=len(renderer()),
+                **measure(renderer, runs=args.runs),
+            )
+
+
+if __name__ == "__main__":
+    main()
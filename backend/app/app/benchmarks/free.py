@@ -0,0 +1,135 @@
+"""
+"X 요일 몇 시 몇 분부터 몇 시 몇 분까지 가능한 사람" 조회의 지연 시간 비교
+
+    python -m app.benchmarks.free --participants 5000 --runs 50
+
+참여자마다 라벨이 있는 블록 몇 개와 시간 칸 비트맵 한 행을 가진 타임테이블을 만들고
+임의의 요일/분 구간을 조회함
+
+* scan: 타임테이블의 모든 블록과 칸을 읽어 파이썬에서 참여자별 분 비트셋을 만든 뒤 비교하던 방식
+* indexed: crud.scheduleblock.get_free_participants (week_minutes GiST 인덱스로 겹치는 행만 읽음)
+"""
+import argparse
+import random
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.benchmarks._data import create_timetable
+from app.benchmarks.utils import measure, report
+from app.core.availability import (
+    DAYS_PER_WEEK,
+    FULL_DAY,
+    MINUTES_PER_DAY,
+    MINUTES_PER_HOUR,
+    block_interval,
+    interval_fields,
+    window_participants,
+)
+from app.core.security import create_uuid
+from app.db.session import SessionLocal
+from app.models.availability import Availability
+from app.models.scheduleblock import ScheduleBlock
+from app.models.user import User
+
+
+def random_interval(max_minutes: int) -> Dict[str, int]:
+    start = random.randrange(MINUTES_PER_DAY - 1)
+    end = random.randint(start + 1, min(MINUTES_PER_DAY, start + max_minutes))
+    return interval_fields(start, end)
+
+
+def seed(db: Session, table_id: str, *, participants: int, blocks: int) -> List[str]:
+    user_ids = [create_uuid() for _ in range(participants)]
+    db.execute(insert(User), [{"id": user_id} for user_id in user_ids])
+    db.execute(
+        insert(ScheduleBlock),
+        [
+            {
+                "id": create_uuid(),
+                "table_id": table_id,
+                "user_id": user_id,
+                "day": random.randrange(DAYS_PER_WEEK),
+                "label": "bench",
+                **random_interval(4 * MINUTES_PER_HOUR),
+            }
+            for user_id in user_ids
+            for _ in range(blocks)
+        ],
+    )
+    db.execute(
+        insert(Availability),
+        [
+            {
+                "id": create_uuid(),
+                "table_id": table_id,
+                "user_id": user_id,
+                "hours": [
+                    random.getrandbits(24) & FULL_DAY for _ in range(DAYS_PER_WEEK)
+                ],
+            }
+            for user_id in user_ids
+        ],
+    )
+    db.commit()
+    return user_ids
+
+
+def scan(db: Session, table_id: str, window: Dict[str, int]) -> Any:
+    start, end = block_interval(
+        start_time=window["start_time"],
+        start_minute=window["start_minute"],
+        end_time=window["end_time"],
+        end_minute=window["end_minute"],
+    )
+    offset = window["day"] * MINUTES_PER_DAY
+    minute_bits = crud.scheduleblock.get_minute_bits(db, table_id=table_id)
+    return window_participants(minute_bits, offset + start, offset + end)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participants", type=int, default=5000)
+    parser.add_argument("--blocks", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    table_id, _ = create_timetable(db)
+    user_ids = seed(db, table_id, participants=args.participants, blocks=args.blocks)
+    windows: List[Dict[str, int]] = []
+
+    def next_window() -> None:
+        windows.append({"day": random.randrange(DAYS_PER_WEEK), **random_interval(180)})
+
+    try:
+        for path, fn in (
+            ("scan", lambda: scan(db, table_id, windows[-1])),
+            (
+                "indexed",
+                lambda: crud.scheduleblock.get_free_participants(
+                    db, table_id=table_id, **windows[-1]
+                ),
+            ),
+        ):
+            report(
+                "free_participants",
+                path=path,
+                participants=args.participants,
+                blocks=args.participants * args.blocks,
+                **measure(fn, runs=args.runs, setup=next_window),
+            )
+    finally:
+        db.rollback()
+        db.execute(delete(ScheduleBlock).where(ScheduleBlock.table_id == table_id))
+        db.execute(delete(Availability).where(Availability.table_id == table_id))
+        db.execute(delete(User).where(User.id.in_(user_ids)))
+        db.commit()
+        crud.timetable.remove(db, id=table_id)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+id 종류별 대량 insert 처리량과 인덱스 크기
+
+    python -m app.benchmarks.keys --rows 200000 --batch 1000
+
+scheduleblock 과 같은 모양(기본 키, table_id/user_id 외래 키 컬럼과 두 조회 인덱스)의
+테이블을 id 종류마다 만들어 같은 수의 행을 넣고 크기를 잰 뒤 지움
+
+* text_random: 예전처럼 무작위 uuid4 를 32자 hex 문자열로 저장
+* uuid_random: uuid 컬럼에 무작위 uuid4
+* uuid_v7: uuid 컬럼에 create_uuid 가 만드는 시간 순서 UUIDv7
+"""
+import argparse
+import random
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Tuple
+
+from psycopg2.extras import execute_values
+
+from app.benchmarks.utils import report
+from app.core.security import create_uuid
+from app.db.session import engine
+
+# 드라이버가 값을 바꾸는 비용은 같게 하고 저장 방식만 비교하도록
+# 모든 종류를 같은 hex 문자열로 보내고 DB 가 컬럼 타입으로 바꿈
+KEY_TYPES: Dict[str, Tuple[str, Callable[[], str]]] = {
+    "text_random": ("varchar", lambda: uuid.uuid4().hex),
+    "uuid_random": ("uuid", lambda: uuid.uuid4().hex),
+    "uuid_v7": ("uuid", create_uuid),
+}
+
+
+def create_table(cursor: Any, table: str, key_type: str) -> None:
+    cursor.execute(
+        f"DROP TABLE IF EXISTS {table};"
+        f"CREATE TABLE {table} ("
+        f"id {key_type} PRIMARY KEY, table_id {key_type}, user_id {key_type}, "
+        "day smallint);"
+        f"CREATE INDEX {table}_table_user_day ON {table} (table_id, user_id, day);"
+        f"CREATE INDEX {table}_user_table ON {table} (user_id, table_id);"
+    )
+
+
+def sizes(cursor: Any, table: str) -> Dict[str, int]:
+    cursor.execute(
+        "SELECT pg_table_size(%(name)s), pg_indexes_size(%(name)s), "
+        "pg_relation_size(%(pkey)s)",
+        {"name": table, "pkey": f"{table}_pkey"},
+    )
+    table_bytes, index_bytes, pkey_bytes = cursor.fetchone()
+    return {
+        "table_bytes": table_bytes,
+        "index_bytes": index_bytes,
+        "pkey_bytes": pkey_bytes,
+    }
+
+
+def run(name: str, *, rows: int, batch: int, tables: int, users: int) -> None:
+    key_type, new_id = KEY_TYPES[name]
+    table = f"bench_keys_{name}"
+    table_ids = [new_id() for _ in range(tables)]
+    user_ids = [new_id() for _ in range(users)]
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        create_table(cursor, table, key_type)
+        connection.commit()
+
+        elapsed = 0.0
+        for offset in range(0, rows, batch):
+            # id 는 넣는 순간에 만들어야 UUIDv7 의 시각이 실제 insert 순서를 따름
+            values: List[Tuple[str, str, str, int]] = [
+                (
+                    new_id(),
+                    random.choice(table_ids),
+                    random.choice(user_ids),
+                    random.randrange(7),
+                )
+                for _ in range(min(batch, rows - offset))
+            ]
+            started = time.perf_counter()
+            execute_values(
+                cursor,
+                f"INSERT INTO {table} (id, table_id, user_id, day) VALUES %s",
+                values,
+                page_size=batch,
+            )
+            connection.commit()
+            elapsed += time.perf_counter() - started
+
+        report(
+            "key_types",
+            key=name,
+            rows=rows,
+            batch=batch,
+            insert_seconds=elapsed,
+            rows_per_second=rows / elapsed,
+            **sizes(cursor, table),
+        )
+        cursor.execute(f"DROP TABLE {table}")
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--tables", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--keys", nargs="+", default=list(KEY_TYPES))
+    args = parser.parse_args()
+
+    for name in args.keys:
+        run(
+            name,
+            rows=args.rows,
+            batch=args.batch,
+            tables=args.tables,
+            users=args.users,
+        )
+
+
+if __name__ == "__main__":
+    main()
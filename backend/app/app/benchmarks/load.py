@@ -0,0 +1,281 @@
+"""
+실제 서버에 타임테이블 시나리오로 부하를 주고 라우트별 처리량과 지연 시간 측정
+
+    python -m app.benchmarks.load --participants 50 --rounds 5 --output load.json
+    python -m app.benchmarks.load --participants 50 --rounds 5 --baseline load.json
+
+app.main:app 을 별도 uvicorn 프로세스로 띄우고, 가짜 카카오 서버를 KAKAO_AUTH_HOST/KAKAO_API_HOST 로
+넘겨 실제 로그인 경로를 그대로 탐. DB 는 설정(POSTGRES_*)의 로컬 DB 를 씀
+
+1. 방장이 로그인해서 타임테이블을 만듦
+2. 참여자 participants 명이 동시에 로그인함
+3. 참여자마다 rounds 번: 모두 채우기, 요일 비우고 채우기, 시간 비우고 채우기,
+   라벨 블록을 만들어 30분 끌어 옮기기(PATCH), 스케쥴 블록 polls 번 폴링(If-None-Match), 모두 비우기
+
+라우트(메서드 + 경로 템플릿)마다 JSON 한 줄씩 출력하고 마지막 줄은 전체 합계(route=all)
+--output 을 주면 커밋과 옵션을 같이 파일로 저장하고, --baseline 으로 그 파일을 주면
+같은 라우트의 p50/p95/p99 변화율(1.0 이면 같음)을 같이 출력함
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from app.benchmarks.fake_kakao import FakeKakaoServer, FakeKakaoState
+from app.benchmarks.server import APP_DIR, run_server
+from app.benchmarks.utils import report, summarize
+from app.core.config import settings
+
+REDIRECT_URI = "http://localhost/login"
+PERCENTILES = ("p50_ms", "p95_ms", "p99_ms")
+
+
+class Recorder:
+    """
+    라우트별 응답 시간과 실패(400 이상) 수
+    """
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, route: str, seconds: float, status: int) -> None:
+        self.samples.setdefault(route, []).append(seconds)
+        if status >= 400:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    def results(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        all_samples = [
+            sample for samples in self.samples.values() for sample in samples
+        ]
+        routes = {
+            route: (samples, self.errors.get(route, 0))
+            for route, samples in sorted(self.samples.items())
+        }
+        routes["all"] = (all_samples, sum(self.errors.values()))
+        return {
+            route: {
+                "requests": len(samples),
+                "errors": errors,
+                "throughput_per_s": len(samples) / elapsed,
+                **summarize(samples),
+            }
+            for route, (samples, errors) in routes.items()
+        }
+
+
+class Client:
+    def __init__(
+        self, session: aiohttp.ClientSession, base_url: str, recorder: Recorder
+    ) -> None:
+        self.session = session
+        self.base_url = base_url
+        self.recorder = recorder
+        self.headers: Dict[str, str] = {}
+
+    async def request(
+        self, method: str, route: str, path: str, **kwargs: Any
+    ) -> aiohttp.ClientResponse:
+        """
+        route 는 결과를 모을 경로 템플릿, path 는 실제 경로. 응답 본문까지 읽은 시간을 잼
+        읽은 본문은 응답에 남으므로 돌려받은 응답의 json() 을 다시 불러도 됨
+        """
+        headers = {**self.headers, **kwargs.pop("headers", {})}
+        started = time.perf_counter()
+        async with self.session.request(
+            method, self.base_url + path, headers=headers, **kwargs
+        ) as response:
+            await response.read()
+        self.recorder.add(
+            f"{method} {route}", time.perf_counter() - started, response.status
+        )
+        return response
+
+    async def login(self, code: str) -> bool:
+        response = await self.request(
+            "POST",
+            "/users/login",
+            "/users/login",
+            json={"code": code, "redirect_uri": REDIRECT_URI},
+        )
+        if response.status >= 400:
+            return False
+        token = (await response.json())["access_token"]
+        self.headers = {"Authorization": f"Bearer {token}"}
+        return True
+
+
+def labeled_block(table_id: str, day: int, start: int) -> Dict[str, Any]:
+    end = start + 90
+    return {
+        "table_id": table_id,
+        "day": day,
+        "start_time": start // 60,
+        "start_minute": start % 60,
+        "end_time": (end - 1) // 60,
+        "end_minute": (end - 1) % 60,
+        "label": "load",
+    }
+
+
+async def participant(client: Client, table_id: str, args: argparse.Namespace) -> None:
+    table = {"timetable_id": table_id}
+    poll_route = "/timetables/{id}/scheduleblocks"
+    poll_path = f"/timetables/{table_id}/scheduleblocks"
+    etag: Optional[str] = None
+    for _ in range(args.rounds):
+        day = random.randrange(7)
+        hour = random.randrange(24)
+        await client.request(
+            "POST", "/scheduleblocks/all", "/scheduleblocks/all", params=table
+        )
+        for method in ("DELETE", "POST"):
+            await client.request(
+                method,
+                "/scheduleblocks/day",
+                "/scheduleblocks/day",
+                params={**table, "day": day},
+            )
+            await client.request(
+                method,
+                "/scheduleblocks/time",
+                "/scheduleblocks/time",
+                params={**table, "start_time": hour},
+            )
+
+        # 라벨 블록을 만들고 끌어서 30분 뒤로 옮김
+        start = random.randrange(0, 20 * 60, 10)
+        response = await client.request(
+            "POST",
+            "/scheduleblocks",
+            "/scheduleblocks",
+            json=labeled_block(table_id, day, start),
+        )
+        if response.status < 400:
+            block = await response.json()
+            await client.request(
+                "PATCH",
+                "/scheduleblocks",
+                "/scheduleblocks",
+                json=[{"id": block["id"], **labeled_block(table_id, day, start + 30)}],
+            )
+
+        for _ in range(args.polls):
+            headers = {} if etag is None else {"If-None-Match": etag}
+            response = await client.request(
+                "GET", poll_route, poll_path, headers=headers
+            )
+            etag = response.headers.get("ETag", etag)
+        await client.request(
+            "DELETE", "/scheduleblocks/all", "/scheduleblocks/all", params=table
+        )
+
+
+async def run(host: str, args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    base_url = f"http://{host}{settings.API_V1_STR}"
+    run_id = random.getrandbits(32)
+    recorder = Recorder()
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        owner = Client(session, base_url, recorder)
+        if not await owner.login(f"load-{run_id}-owner"):
+            raise RuntimeError("Owner login failed")
+        response = await owner.request(
+            "POST",
+            "/timetables",
+            "/timetables",
+            json={"title": f"load-{run_id}", "description": "load test"},
+        )
+        table_id = (await response.json())["id"]
+
+        started = time.perf_counter()
+        clients = [
+            Client(session, base_url, recorder) for _ in range(args.participants)
+        ]
+        logged_in = await asyncio.gather(
+            *(client.login(f"load-{run_id}-{i}") for i, client in enumerate(clients))
+        )
+        # 로그인에 실패한 참여자는 실패로만 세고 시나리오를 돌리지 않음
+        await asyncio.gather(
+            *(
+                participant(client, table_id, args)
+                for client, ok in zip(clients, logged_in)
+                if ok
+            )
+        )
+        return recorder.results(time.perf_counter() - started)
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            cwd=APP_DIR,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]
+) -> None:
+    for route, result in results.items():
+        base = baseline.get(route)
+        if base is None:
+            continue
+        for field in PERCENTILES:
+            if base[field]:
+                result[f"{field[:-3]}_change"] = result[field] / base[field]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participants", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--polls", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    kakao = FakeKakaoServer(FakeKakaoState()).start()
+    env = {"KAKAO_AUTH_HOST": kakao.url, "KAKAO_API_HOST": kakao.url}
+    try:
+        with run_server(workers=args.workers, env=env) as host:
+            results = asyncio.run(run(host, args))
+    finally:
+        kakao.stop()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f)["routes"])
+    options = {
+        "participants": args.participants,
+        "rounds": args.rounds,
+        "polls": args.polls,
+        "workers": args.workers,
+    }
+    for route, result in results.items():
+        report("load", route=route, **options, **result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"commit": current_commit(), "options": options, "routes": results},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+            f.write(os.linesep)
+
+
+if __name__ == "__main__":
+    main()
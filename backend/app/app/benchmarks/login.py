@@ -0,0 +1,146 @@
+"""
+가짜 카카오 서버를 상대로 한 카카오 로그인(토큰 교환 + 유저 조회) 처리량과 실패 동작 비교
+
+    python -m app.benchmarks.login --logins 500 --concurrency 50 --latency 0.02
+
+* requests: 예전 get_kakao_user 처럼 세션 없이 requests.post 두 번을 스레드 풀에서 실행
+* pooled: KakaoClient (aiohttp 연결 재사용, 이벤트 루프에서 동시에 처리)
+* flaky: pooled 와 같지만 가짜 서버가 error_rate 비율로 503 을 반환 (재시도로 복구되는 비율)
+* down: 가짜 서버를 내린 뒤, 서킷이 열려서 요청 없이 바로 실패하기까지 걸리는 시간
+"""
+import argparse
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import requests
+from fastapi import HTTPException
+
+from app.benchmarks.fake_kakao import FakeKakaoServer, FakeKakaoState
+from app.benchmarks.utils import report, summarize
+from app.core.kakao import KakaoClient
+
+REDIRECT_URI = "http://localhost/login"
+
+
+def create_client(url: str, *, concurrency: int) -> KakaoClient:
+    return KakaoClient(
+        app_key="benchmark",
+        auth_host=url,
+        api_host=url,
+        connect_timeout=1.0,
+        timeout=2.0,
+        max_connections=concurrency,
+        retries=2,
+        retry_backoff=0.01,
+        circuit_failures=5,
+        circuit_reset_seconds=30.0,
+    )
+
+
+def login_with_requests(url: str, code: str) -> Dict[str, Any]:
+    headers = {"Content-type": "application/x-www-form-urlencoded;charset=utf-8"}
+    params = {
+        "grant_type": "authorization_code",
+        "client_id": "benchmark",
+        "redirect_uri": REDIRECT_URI,
+        "code": code,
+    }
+    token = requests.post(f"{url}/oauth/token", headers=headers, params=params).json()
+    return requests.post(
+        f"{url}/v2/user/me",
+        headers={**headers, "Authorization": "Bearer " + token["access_token"]},
+    ).json()
+
+
+def run_threads(fn: Callable[[str], Any], *, logins: int, concurrency: int) -> Dict:
+    samples: List[float] = []
+
+    def timed(code: str) -> None:
+        started = time.perf_counter()
+        fn(code)
+        samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, (f"code-{i}" for i in range(logins))))
+    elapsed = time.perf_counter() - started
+    return {"throughput_per_s": logins / elapsed, "ok": logins, **summarize(samples)}
+
+
+async def run_client(client: KakaoClient, *, logins: int, concurrency: int) -> Dict:
+    samples: List[float] = []
+    failed = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(code: str) -> None:
+        nonlocal failed
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.get_user_by_code(code, REDIRECT_URI)
+            except HTTPException:
+                failed += 1
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(f"code-{i}") for i in range(logins)))
+    elapsed = time.perf_counter() - started
+    return {
+        "throughput_per_s": logins / elapsed,
+        "ok": logins - failed,
+        "failed": failed,
+        **summarize(samples),
+    }
+
+
+async def run_async(args: argparse.Namespace, server: FakeKakaoServer) -> None:
+    client = create_client(server.url, concurrency=args.concurrency)
+    options = {"logins": args.logins, "concurrency": args.concurrency}
+
+    await run_client(client, logins=args.concurrency, concurrency=args.concurrency)
+    report("login", scenario="pooled", **options, **await run_client(client, **options))
+
+    server.state.error_rate = args.error_rate
+    report(
+        "login",
+        scenario="flaky",
+        error_rate=args.error_rate,
+        **options,
+        **await run_client(client, **options),
+    )
+
+    server.stop()
+    report("login", scenario="down", **options, **await run_client(client, **options))
+    await client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    args = parser.parse_args()
+    # 재시도/실패 로그가 결과 출력을 덮지 않도록 끔
+    logging.getLogger("app.core.kakao").setLevel(logging.CRITICAL)
+
+    server = FakeKakaoServer(FakeKakaoState(latency=args.latency)).start()
+    report(
+        "login",
+        scenario="requests",
+        logins=args.logins,
+        concurrency=args.concurrency,
+        **run_threads(
+            lambda code: login_with_requests(server.url, code),
+            logins=args.logins,
+            concurrency=args.concurrency,
+        ),
+    )
+    asyncio.run(run_async(args, server))
+
+
+if __name__ == "__main__":
+    main()
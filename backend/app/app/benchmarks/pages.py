@@ -0,0 +1,82 @@
+"""
+스케쥴 블록 keyset 페이지 한 장을 읽는 지연 시간
+
+    python -m app.benchmarks.pages --participants 5000 --limit 100 --runs 50
+
+free 벤치마크와 같이 참여자마다 라벨이 있는 블록 몇 개와 시간 칸 비트맵 한 행을 가진 타임테이블을 만들고
+타임테이블 안의 임의의 위치(참여자, 요일, 시간)부터 limit 개를 읽음
+"""
+import argparse
+import random
+from typing import List
+
+from sqlalchemy import delete, text
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.benchmarks._data import create_timetable
+from app.benchmarks.free import seed
+from app.benchmarks.utils import measure, report
+from app.core.availability import DAYS_PER_WEEK, HOURS_PER_DAY
+from app.crud.crud_scheduleblock import ScheduleKey
+from app.db.session import SessionLocal
+from app.models.availability import Availability
+from app.models.scheduleblock import ScheduleBlock
+from app.models.user import User
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participants", type=int, default=5000)
+    parser.add_argument("--blocks", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    db: Session = SessionLocal()
+    table_id, _ = create_timetable(db)
+    user_ids = seed(db, table_id, participants=args.participants, blocks=args.blocks)
+    db.execute(text("ANALYZE scheduleblock, availability"))
+    cursors: List[ScheduleKey] = []
+
+    def next_cursor() -> None:
+        cursors.append(
+            ScheduleKey(
+                random.choice(user_ids),
+                random.randrange(DAYS_PER_WEEK),
+                random.randrange(HOURS_PER_DAY),
+                "",
+            )
+        )
+
+    try:
+        for position, setup in (("first", None), ("random", next_cursor)):
+            report(
+                "scheduleblock_pages",
+                position=position,
+                participants=args.participants,
+                blocks=args.participants * args.blocks,
+                limit=args.limit,
+                **measure(
+                    lambda: crud.scheduleblock.get_page(
+                        db,
+                        table_id,
+                        after=cursors[-1] if setup else None,
+                        limit=args.limit,
+                    ),
+                    runs=args.runs,
+                    setup=setup,
+                ),
+            )
+    finally:
+        db.rollback()
+        db.execute(delete(ScheduleBlock).where(ScheduleBlock.table_id == table_id))
+        db.execute(delete(Availability).where(Availability.table_id == table_id))
+        db.execute(delete(User).where(User.id.in_(user_ids)))
+        db.commit()
+        crud.timetable.remove(db, id=table_id)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
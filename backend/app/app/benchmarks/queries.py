@@ -0,0 +1,97 @@
+"""
+스케쥴 블록 조회 문을 호출마다 새로 만들 때와 미리 만들어 둔 문을 쓸 때의 비교
+
+    python -m app.benchmarks.queries --runs 2000
+
+* statement: DB 에 보내기 전까지 파이썬에서 하는 일(문 만들기와 컴파일 캐시 키 계산)
+* execute: 한 명이 한 칸을 채운 타임테이블을 실제로 조회하는 전체 시간
+
+rebuilt 는 예전처럼 호출마다 select().where(...) 를 만드는 방식,
+prebuilt 는 crud.scheduleblock 이 한 번만 만들어 두고 값만 넘기는 방식
+"""
+import argparse
+from typing import Any, Dict
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.benchmarks._data import create_timetable
+from app.benchmarks.utils import measure, report
+from app.db.session import SessionLocal
+from app.models.availability import Availability
+from app.models.scheduleblock import ScheduleBlock
+from app.models.user import User
+
+statements = crud.scheduleblock
+
+
+def rebuilt(table_id: str, user_id: str) -> Dict[str, Any]:
+    return {
+        "blocks": statements._select_blocks().where(
+            ScheduleBlock.table_id == table_id, User.id == user_id
+        ),
+        "availabilities": statements._select_availabilities().where(
+            Availability.table_id == table_id, User.id == user_id
+        ),
+    }
+
+
+def prebuilt() -> Dict[str, Any]:
+    return {
+        "blocks": statements._blocks_by_user,
+        "availabilities": statements._availabilities_by_user,
+    }
+
+
+def cache_keys(stmts: Dict[str, Any]) -> None:
+    # Session.execute 가 컴파일 캐시를 찾기 전에 하는 일
+    for stmt in stmts.values():
+        stmt._generate_cache_key()
+
+
+def execute(db: Session, stmts: Dict[str, Any], params: Dict[str, Any]) -> None:
+    for stmt in stmts.values():
+        db.execute(stmt, params).all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    table_id, user_id = create_timetable(db)
+    crud.scheduleblock.replace_day_by_user_id(
+        db, table_id=table_id, user_id=user_id, day=1
+    )
+    params = {"table_id": table_id, "user_id": user_id}
+
+    report(
+        "scheduleblock_queries",
+        path="rebuilt",
+        part="statement",
+        **measure(lambda: cache_keys(rebuilt(table_id, user_id)), runs=args.runs),
+    )
+    report(
+        "scheduleblock_queries",
+        path="prebuilt",
+        part="statement",
+        **measure(lambda: cache_keys(prebuilt()), runs=args.runs),
+    )
+    report(
+        "scheduleblock_queries",
+        path="rebuilt",
+        part="execute",
+        **measure(lambda: execute(db, rebuilt(table_id, user_id), {}), runs=args.runs),
+    )
+    report(
+        "scheduleblock_queries",
+        path="prebuilt",
+        part="execute",
+        **measure(lambda: execute(db, prebuilt(), params), runs=args.runs),
+    )
+    crud.scheduleblock.delete_all_by_user_id(db, table_id=table_id, user_id=user_id)
+
+
+if __name__ == "__main__":
+    main()
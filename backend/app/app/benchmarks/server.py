@@ -0,0 +1,63 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import app
+from app.core.config import settings
+
+# app 패키지가 들어 있는 backend/app 디렉터리
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(app.__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def run_server(
+    *, workers: int = 1, timeout: float = 30.0, env: Optional[Dict[str, str]] = None
+) -> Iterator[str]:
+    """
+    app.main:app 을 별도 프로세스의 uvicorn 으로 띄우고 host:port 를 반환
+    웹소켓처럼 TestClient 로 확인하기 어려운 동작을 실제 서버로 확인하거나 부하를 줄 때 씀
+    테스트에서 만든 JWT 가 통하도록 SECRET_KEY 를 같이 넘기고, env 로 설정을 바꿀 수 있음
+    """
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=APP_DIR,
+        env={**os.environ, "SECRET_KEY": settings.SECRET_KEY, **(env or {})},
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.1)
+        yield f"127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait(timeout=timeout)
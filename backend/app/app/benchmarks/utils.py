@@ -0,0 +1,49 @@
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+def percentile(samples: List[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """
+    초 단위 측정값을 밀리초 단위 통계로 정리
+    """
+    return {
+        "runs": len(samples),
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def measure(
+    fn: Callable[[], Any],
+    *,
+    runs: int,
+    warmup: int = 3,
+    setup: Optional[Callable[[], Any]] = None,
+) -> Dict[str, float]:
+    """
+    setup 은 매 실행 전에 부르며 측정 시간에 포함하지 않음
+    """
+    samples = []
+    for run in range(warmup + runs):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        if run >= warmup:
+            samples.append(elapsed)
+    return summarize(samples)
+
+
+def report(name: str, **results: Any) -> None:
+    print(json.dumps({"benchmark": name, **results}, sort_keys=True))
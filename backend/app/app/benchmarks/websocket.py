@@ -0,0 +1,126 @@
+"""
+웹소켓 방 브로드캐스트 지연 시간
+
+    python -m app.benchmarks.websocket --sockets 1000 --rooms 100 --rounds 200
+
+app.main:app 을 별도 uvicorn 프로세스로 띄우고 sockets 개의 연결을 rooms 개의 방에 고르게 나눔
+
+* room: 방 하나에서 한 명이 보낸 메시지를 그 방 모두가 받을 때까지 걸린 시간
+* all_rooms: 모든 방에서 한 명씩 동시에 보낸 메시지를 모든 연결이 받을 때까지 걸린 시간
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import aiohttp
+
+from app.benchmarks.server import run_server
+from app.benchmarks.utils import report, summarize
+from app.core.config import settings
+
+
+class Tracker:
+    """
+    메시지마다 아직 받지 못한 연결 수를 세고, 모두 받으면 끝난 시각을 기록
+    """
+
+    def __init__(self) -> None:
+        self.remaining: Dict[str, int] = {}
+        self.done: Dict[str, "asyncio.Future[float]"] = {}
+
+    def expect(self, message: str, count: int) -> "asyncio.Future[float]":
+        self.remaining[message] = count
+        self.done[message] = asyncio.get_event_loop().create_future()
+        return self.done[message]
+
+    def received(self, message: str) -> None:
+        self.remaining[message] -= 1
+        if not self.remaining[message]:
+            self.done.pop(message).set_result(time.perf_counter())
+            del self.remaining[message]
+
+
+async def read(ws: aiohttp.ClientWebSocketResponse, tracker: Tracker) -> None:
+    async for message in ws:
+        tracker.received(message.data.split(": ", 1)[1])
+
+
+async def run(host: str, args: argparse.Namespace) -> None:
+    url = f"ws://{host}{settings.API_V1_STR}/ws"
+    tracker = Tracker()
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        rooms: List[List[aiohttp.ClientWebSocketResponse]] = [
+            [] for _ in range(args.rooms)
+        ]
+        sockets = await asyncio.gather(
+            *(
+                session.ws_connect(f"{url}/room-{i % args.rooms}")
+                for i in range(args.sockets)
+            )
+        )
+        for i, ws in enumerate(sockets):
+            rooms[i % args.rooms].append(ws)
+        report(
+            "websocket",
+            scenario="connect",
+            sockets=args.sockets,
+            seconds=time.perf_counter() - started,
+        )
+        readers = [asyncio.ensure_future(read(ws, tracker)) for ws in sockets]
+
+        samples: List[float] = []
+        for turn in range(args.rounds):
+            room = rooms[turn % args.rooms]
+            message = f"room-{turn}"
+            done = tracker.expect(message, len(room))
+            started = time.perf_counter()
+            await room[0].send_str(message)
+            samples.append(await done - started)
+        report(
+            "websocket",
+            scenario="room",
+            sockets=args.sockets,
+            rooms=args.rooms,
+            **summarize(samples),
+        )
+
+        samples = []
+        for turn in range(args.rounds // 10 or 1):
+            futures = [
+                tracker.expect(f"all-{turn}-{i}", len(room))
+                for i, room in enumerate(rooms)
+            ]
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(room[0].send_str(f"all-{turn}-{i}") for i, room in enumerate(rooms))
+            )
+            samples.append(max(await asyncio.gather(*futures)) - started)
+        report(
+            "websocket",
+            scenario="all_rooms",
+            sockets=args.sockets,
+            rooms=args.rooms,
+            **summarize(samples),
+        )
+
+        await asyncio.gather(*(ws.close() for ws in sockets))
+        for reader in readers:
+            reader.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sockets", type=int, default=1000)
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    with run_server() as host:
+        asyncio.get_event_loop().run_until_complete(run(host, args))
+
+
+if __name__ == "__main__":
+    main()
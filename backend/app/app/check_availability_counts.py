@@ -0,0 +1,55 @@
+"""
+미리 세어 둔 칸별 참여자 수가 원본 스케쥴 블록과 비트맵에서 다시 센 값과 같은지 확인
+
+    python app/check_availability_counts.py [--repair] [--table-id ID ...]
+
+drift 가 있으면 타임테이블마다 경고를 남기고 종료 코드 1 로 끝남
+--repair 를 주면 drift 가 있는 타임테이블의 집계를 다시 만듦
+"""
+import argparse
+import logging
+import sys
+from typing import List
+
+from sqlalchemy import select
+
+from app import crud
+from app.db.session import SessionLocal
+from app.models.timetable import TimeTable
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def check(table_ids: List[str], *, repair: bool) -> int:
+    db = SessionLocal()
+    try:
+        if not table_ids:
+            table_ids = db.execute(select(TimeTable.id)).scalars().all()
+            db.rollback()
+        drifted = 0
+        for table_id in table_ids:
+            report = crud.availability_count.check(db, table_id=table_id, repair=repair)
+            if report["drift"]:
+                drifted += 1
+                logger.warning("Availability counts drifted: %s", report)
+        return drifted
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repair", action="store_true")
+    parser.add_argument("--table-id", dest="table_ids", nargs="*", default=[])
+    args = parser.parse_args()
+
+    logger.info("Checking availability counts")
+    drifted = check(args.table_ids, repair=args.repair)
+    logger.info("%d timetables drifted", drifted)
+    if drifted and not args.repair:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
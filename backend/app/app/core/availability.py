@@ -0,0 +1,369 @@
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+DAYS_PER_WEEK = 7
+HOURS_PER_DAY = 24
+FULL_DAY = (1 << HOURS_PER_DAY) - 1
+
+MINUTES_PER_HOUR = 60
+MINUTES_PER_DAY = MINUTES_PER_HOUR * HOURS_PER_DAY
+MINUTES_PER_WEEK = MINUTES_PER_DAY * DAYS_PER_WEEK
+
+# 한 시간짜리 칸 하나를 나타내는 블록의 분 범위 (start_minute=0, end_minute=59)
+CELL_START_MINUTE = 0
+CELL_END_MINUTE = 59
+
+CELL_ID_SEPARATOR = "-"
+
+
+def empty_week() -> List[int]:
+    return [0] * DAYS_PER_WEEK
+
+
+def full_week() -> List[int]:
+    return [FULL_DAY] * DAYS_PER_WEEK
+
+
+def hour_bit(hour: int) -> int:
+    return 1 << hour
+
+
+def iter_hours(mask: int) -> Iterator[int]:
+    hour = 0
+    while mask:
+        if mask & 1:
+            yield hour
+        mask >>= 1
+        hour += 1
+
+
+def count_cells(hours: List[int]) -> int:
+    return sum(bin(mask).count("1") for mask in hours)
+
+
+def is_cell(
+    *,
+    start_time: int,
+    start_minute: int,
+    end_time: int,
+    end_minute: int,
+    label: Optional[str] = None,
+) -> bool:
+    """
+    블록이 라벨 없는 한 시간 칸이면 비트맵에 저장할 수 있음
+    """
+    return (
+        label is None
+        and start_time == end_time
+        and start_minute == CELL_START_MINUTE
+        and end_minute == CELL_END_MINUTE
+    )
+
+
+def cell_id(availability_id: str, day: int, hour: int) -> str:
+    return CELL_ID_SEPARATOR.join((availability_id, str(day), str(hour)))
+
+
+def parse_cell_id(id: str) -> Optional[Tuple[str, int, int]]:
+    parts = id.rsplit(CELL_ID_SEPARATOR, 2)
+    if len(parts) != 3 or not parts[1].isdigit() or not parts[2].isdigit():
+        return None
+    availability_id, day, hour = parts[0], int(parts[1]), int(parts[2])
+    if day not in range(DAYS_PER_WEEK) or hour not in range(HOURS_PER_DAY):
+        return None
+    return availability_id, day, hour
+
+
+# 아래 함수들은 한 주를 분 단위 비트셋(int)으로 다룸. 비트 i는 주의 i번째 분
+# 파이썬 int 연산은 한 번에 64분씩 처리하므로 참여자 수에 대해서만 선형으로 늘어남
+
+
+def minute_range_bits(start: int, end: int) -> int:
+    return ((1 << (end - start)) - 1) << start
+
+
+def block_interval(
+    *, start_time: int, start_minute: int, end_time: int, end_minute: int
+) -> Tuple[int, int]:
+    """
+    블록이 하루 안에서 덮는 [start, end) 분. end_minute 까지 포함하며 자정을 넘는 블록은 그 날 끝까지로 자름
+    """
+    start = start_time * MINUTES_PER_HOUR + start_minute
+    end = end_time * MINUTES_PER_HOUR + end_minute + 1
+    if end <= start:
+        end = MINUTES_PER_DAY
+    return start, end
+
+
+def interval_fields(start: int, end: int) -> Dict[str, int]:
+    # block_interval 의 반대. 블록의 시간 필드로 바꿈
+    return {
+        "start_time": start // MINUTES_PER_HOUR,
+        "start_minute": start % MINUTES_PER_HOUR,
+        "end_time": (end - 1) // MINUTES_PER_HOUR,
+        "end_minute": (end - 1) % MINUTES_PER_HOUR,
+    }
+
+
+def cut_interval(
+    start: int, end: int, cut_start: int, cut_end: int
+) -> List[Tuple[int, int]]:
+    """
+    [start, end) 에서 [cut_start, cut_end) 를 뺀 나머지 구간. 가운데를 자르면 두 개가 됨
+    """
+    pieces = []
+    if start < cut_start:
+        pieces.append((start, min(end, cut_start)))
+    if cut_end < end:
+        pieces.append((max(start, cut_end), end))
+    return [
+        (piece_start, piece_end)
+        for piece_start, piece_end in pieces
+        if piece_start < piece_end
+    ]
+
+
+def hour_pieces(start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+    """
+    [start, end) 를 정시 경계에서 나눈 (시간, 시작 분, 끝 분)
+    """
+    hour = start // MINUTES_PER_HOUR
+    while hour * MINUTES_PER_HOUR < end:
+        hour_start = hour * MINUTES_PER_HOUR
+        yield hour, max(start, hour_start), min(end, hour_start + MINUTES_PER_HOUR)
+        hour += 1
+
+
+def piece_id(block_id: str, hour: int) -> str:
+    """
+    여러 시간에 걸친 블록 행을 시간 칸 단위로 펼친 조각의 id
+    칸 id("<availability_id>-<day>-<hour>")와 달리 구분자가 하나뿐임
+    """
+    return CELL_ID_SEPARATOR.join((block_id, str(hour)))
+
+
+def parse_piece_id(id: str) -> Optional[Tuple[str, int]]:
+    parts = id.split(CELL_ID_SEPARATOR)
+    if len(parts) != 2 or not parts[1].isdigit():
+        return None
+    block_id, hour = parts[0], int(parts[1])
+    if hour not in range(HOURS_PER_DAY):
+        return None
+    return block_id, hour
+
+
+def block_minute_bits(
+    *, day: int, start_time: int, start_minute: int, end_time: int, end_minute: int
+) -> int:
+    """
+    블록이 덮는 분 비트셋. 범위는 block_interval 과 같음
+    """
+    start, end = block_interval(
+        start_time=start_time,
+        start_minute=start_minute,
+        end_time=end_time,
+        end_minute=end_minute,
+    )
+    day_start = day * MINUTES_PER_DAY
+    return minute_range_bits(day_start + start, day_start + end)
+
+
+def _expand_hour_byte(byte: int) -> int:
+    bits = 0
+    for hour in iter_hours(byte):
+        bits |= minute_range_bits(0, MINUTES_PER_HOUR) << (hour * MINUTES_PER_HOUR)
+    return bits
+
+
+# 8시간 단위 비트마스크 -> 480분 비트셋 변환표
+_HOUR_BYTE_MINUTES = [_expand_hour_byte(byte) for byte in range(256)]
+_BYTE_MINUTES = 8 * MINUTES_PER_HOUR
+
+
+def cells_minute_bits(hours: List[int]) -> int:
+    bits = 0
+    for day, mask in enumerate(hours):
+        offset = day * MINUTES_PER_DAY
+        while mask:
+            bits |= _HOUR_BYTE_MINUTES[mask & 0xFF] << offset
+            mask >>= 8
+            offset += _BYTE_MINUTES
+    return bits
+
+
+def slot_count(slot_minutes: int) -> int:
+    return MINUTES_PER_WEEK // slot_minutes
+
+
+def window_bits(minute_bits: int, width: int) -> int:
+    """
+    비트 i가 1이면 i번째 분부터 width 분 동안 계속 채워져 있음
+    """
+    covered = minute_bits
+    covered_width = 1
+    while covered_width < width:
+        step = min(covered_width, width - covered_width)
+        covered &= covered >> step
+        covered_width += step
+    return covered
+
+
+def sample_bits(minute_bits: int, step_minutes: int) -> int:
+    """
+    step_minutes 간격의 분만 골라 칸 비트셋으로 줄임
+    """
+    flags = format(minute_bits, f"0{MINUTES_PER_WEEK}b")[::-1][::step_minutes]
+    return int(flags[::-1], 2)
+
+
+def slot_bits(minute_bits: int, slot_minutes: int) -> int:
+    """
+    분 비트셋을 slot_minutes 단위 칸 비트셋으로 줄임. 칸 전체가 채워져 있어야 1
+    """
+    return sample_bits(window_bits(minute_bits, slot_minutes), slot_minutes)
+
+
+def day_slot_bits(days: Iterable[int], slot_minutes: int) -> int:
+    """
+    요일 days 의 칸을 모두 켠 slot_minutes 단위 칸 비트셋
+    """
+    slots_per_day = MINUTES_PER_DAY // slot_minutes
+    day_bits = (1 << slots_per_day) - 1
+    bits = 0
+    for day in days:
+        bits |= day_bits << (day * slots_per_day)
+    return bits
+
+
+def iter_slots(bits: int, count: int) -> Iterator[int]:
+    flags = format(bits, f"0{count}b")[::-1]
+    slot = flags.find("1")
+    while slot != -1:
+        yield slot
+        slot = flags.find("1", slot + 1)
+
+
+def slot_users(user_slot_bits: Dict[str, int], count: int) -> List[List[str]]:
+    users: List[List[str]] = [[] for _ in range(count)]
+    for user_id, bits in user_slot_bits.items():
+        for slot in iter_slots(bits, count):
+            users[slot].append(user_id)
+    return users
+
+
+def window_participants(
+    user_minute_bits: Dict[str, int], start: int, end: int
+) -> Tuple[List[str], List[str]]:
+    """
+    [start, end) 분 구간을 모두 덮는 참여자와 일부만 겹치는 참여자. 각각 id 순으로 정렬
+    """
+    window = minute_range_bits(start, end)
+    covering: List[str] = []
+    partial: List[str] = []
+    for user_id, bits in user_minute_bits.items():
+        overlap = bits & window
+        if overlap == window:
+            covering.append(user_id)
+        elif overlap:
+            partial.append(user_id)
+    return sorted(covering), sorted(partial)
+
+
+class Window(NamedTuple):
+    start: int
+    end: int
+    user_ids: Tuple[str, ...]
+
+
+def day_window_starts(duration_minutes: int, step_minutes: int) -> int:
+    """
+    하루 안에서 끝나는 step_minutes 간격 시작 칸 비트셋
+    """
+    per_day = 0
+    for slot, start in enumerate(range(0, MINUTES_PER_DAY, step_minutes)):
+        if start + duration_minutes <= MINUTES_PER_DAY:
+            per_day |= 1 << slot
+    slots_per_day = MINUTES_PER_DAY // step_minutes
+    return sum(per_day << (day * slots_per_day) for day in range(DAYS_PER_WEEK))
+
+
+def slot_counts(bits_list: Iterable[int], count: int) -> List[int]:
+    """
+    칸마다 비트가 켜진 참여자 수. 비트 평면별 덧셈기로 참여자 한 명당 몇 번의 int 연산만 함
+    """
+    planes: List[int] = []
+    for bits in bits_list:
+        carry = bits
+        plane = 0
+        while carry:
+            if plane == len(planes):
+                planes.append(carry)
+                break
+            planes[plane], carry = planes[plane] ^ carry, planes[plane] & carry
+            plane += 1
+
+    counts = [0] * count
+    for plane, bits in enumerate(planes):
+        for slot in iter_slots(bits, count):
+            counts[slot] += 1 << plane
+    return counts
+
+
+def best_windows(
+    user_minute_bits: Dict[str, int],
+    *,
+    duration_minutes: int,
+    step_minutes: int,
+    required_user_ids: Sequence[str] = (),
+    limit: int,
+) -> List[Window]:
+    """
+    duration_minutes 이상 함께 비어 있는 구간을 가능한 인원이 많은 순으로 limit 개 반환
+    required_user_ids 는 모두 가능한 구간만 고름
+    같은 인원이 이어서 가능한 시작 칸들은 하나의 더 긴 구간으로 합침
+    """
+    count = slot_count(step_minutes)
+    starts = day_window_starts(duration_minutes, step_minutes)
+    user_start_bits = {
+        user_id: sample_bits(window_bits(bits, duration_minutes), step_minutes)
+        for user_id, bits in user_minute_bits.items()
+    }
+    for user_id in required_user_ids:
+        starts &= user_start_bits.get(user_id, 0)
+    user_start_bits = {
+        user_id: bits & starts for user_id, bits in user_start_bits.items()
+    }
+
+    counts = slot_counts(user_start_bits.values(), count)
+    # 비트 i가 1이면 i번째와 i+1번째 시작 칸의 가능한 인원 구성이 다름
+    changes = 0
+    for bits in user_start_bits.values():
+        changes |= bits ^ (bits >> 1)
+
+    slots_per_day = MINUTES_PER_DAY // step_minutes
+    runs: List[Tuple[int, int]] = []
+    for slot in range(count):
+        if not counts[slot]:
+            continue
+        if (
+            runs
+            and runs[-1][1] == slot - 1
+            and slot % slots_per_day
+            and not (changes >> (slot - 1)) & 1
+        ):
+            runs[-1] = (runs[-1][0], slot)
+        else:
+            runs.append((slot, slot))
+
+    runs.sort(key=lambda run: (-counts[run[0]], run[0] - run[1]))
+    return [
+        Window(
+            first * step_minutes,
+            last * step_minutes + duration_minutes,
+            tuple(
+                user_id
+                for user_id, bits in user_start_bits.items()
+                if (bits >> first) & 1
+            ),
+        )
+        for first, last in runs[:limit]
+    ]
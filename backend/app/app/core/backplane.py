@@ -0,0 +1,402 @@
+import asyncio
+import json
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import asyncpg
+
+from app.core.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover
+    aioredis = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+MEMORY = "memory"
+POSTGRES = "postgres"
+REDIS = "redis"
+BACKENDS = (MEMORY, POSTGRES, REDIS)
+
+# NOTIFY payload 는 8000 바이트보다 짧아야 함
+POSTGRES_PAYLOAD_LIMIT = 7999
+
+# (timetable_id, message) 를 받아서 이 워커의 방에 뿌리는 함수
+Deliver = Callable[[str, str], Any]
+# 다른 워커에서 바뀐 유저의 id 를 받는 함수
+UserChanged = Callable[[str], Any]
+
+# 채널로 보내는 이벤트의 종류. type 이 없는 이벤트는 방 메시지로 봄
+ROOM_EVENT = "room"
+USER_EVENT = "user"
+
+
+def encode_event(timetable_id: str, message: str, origin: Optional[str] = None) -> str:
+    """
+    채널로 보낼 메시지. origin 이 같은 워커는 이미 자기 방에 보냈으므로 다시 보내지 않음
+    """
+    return json.dumps(
+        {"origin": origin, "timetable_id": timetable_id, "message": message},
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+
+def encode_user_event(user_id: str, origin: Optional[str] = None) -> str:
+    """
+    유저가 바뀌거나 지워졌다는 이벤트. 받은 워커는 그 유저의 캐시를 지움
+    """
+    return json.dumps(
+        {"type": USER_EVENT, "origin": origin, "user_id": user_id},
+        separators=(",", ":"),
+    )
+
+
+def decode_event(payload: str) -> Tuple[Optional[str], str, Tuple[str, ...]]:
+    """
+    (origin, type, 값). 값은 방 메시지면 (timetable_id, message), 유저 이벤트면 (user_id,)
+    """
+    event = json.loads(payload)
+    kind = event.get("type", ROOM_EVENT)
+    if kind == USER_EVENT:
+        return event["origin"], kind, (event["user_id"],)
+    return event["origin"], kind, (event["timetable_id"], event["message"])
+
+
+class Backplane(ABC):
+    """
+    여러 워커의 ConnectionManager 를 잇는 pub/sub 채널
+    publish 한 메시지는 다른 모든 워커의 deliver 로, publish_user_changed 는 user_changed 로 전달됨
+    """
+
+    name = ""
+    # 한 번에 보낼 수 있는 payload 의 최대 바이트 수. None 이면 제한 없음
+    max_payload: Optional[int] = None
+
+    def __init__(self, *, channel: str) -> None:
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self.deliver: Optional[Deliver] = None
+        self.user_changed: Optional[UserChanged] = None
+        self.published = 0
+        self.received = 0
+        self.errors = 0
+        self.fallbacks = 0
+
+    async def start(
+        self, deliver: Deliver, user_changed: Optional[UserChanged] = None
+    ) -> None:
+        self.deliver = deliver
+        self.user_changed = user_changed
+
+    async def stop(self) -> None:
+        self.deliver = None
+        self.user_changed = None
+
+    def fits(self, payload: str) -> bool:
+        return self.max_payload is None or len(payload.encode()) <= self.max_payload
+
+    async def publish(
+        self, timetable_id: str, message: str, fallback: Optional[str] = None
+    ) -> None:
+        """
+        message 가 max_payload 를 넘으면 fallback 을 대신 보냄
+        fallback 이 없으면 보내지 못한 것으로 셈
+        """
+        payload = encode_event(timetable_id, message, self.origin)
+        if fallback is not None and not self.fits(payload):
+            payload = encode_event(timetable_id, fallback, self.origin)
+            self.fallbacks += 1
+        await self._send(payload)
+
+    async def publish_user_changed(self, user_id: str) -> None:
+        """
+        다른 워커에 유저 캐시를 지우라고 알림
+        """
+        await self._send(encode_user_event(user_id, self.origin))
+
+    async def _send(self, payload: str) -> None:
+        try:
+            await self._publish(payload)
+            self.published += 1
+        except Exception as e:
+            # 이 워커에는 이미 반영했으므로 다른 워커로 못 보낸 것만 기록함
+            self.errors += 1
+            logger.warning("Failed to publish to %s backplane: %r", self.name, e)
+
+    @abstractmethod
+    async def _publish(self, payload: str) -> None:
+        """
+        encode_event 나 encode_user_event 로 만든 payload 를 다른 워커에 보냄. 실패하면 예외를 올림
+        """
+
+    def _receive(self, payload: str) -> None:
+        try:
+            origin, kind, values = decode_event(payload)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            logger.warning("Ignoring malformed backplane event: %r", payload)
+            return
+        handler = self.user_changed if kind == USER_EVENT else self.deliver
+        if origin == self.origin or handler is None:
+            return
+        self.received += 1
+        handler(*values)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "channel": self.channel,
+            "published": self.published,
+            "received": self.received,
+            "errors": self.errors,
+            "fallbacks": self.fallbacks,
+        }
+
+
+class MemoryHub:
+    """
+    한 프로세스 안의 MemoryBackplane 들이 같이 쓰는 채널 목록
+    """
+
+    def __init__(self) -> None:
+        self.subscribers: Dict[str, List["MemoryBackplane"]] = {}
+
+
+memory_hub = MemoryHub()
+
+
+class MemoryBackplane(Backplane):
+    """
+    프로세스 안에서만 전달하는 채널. 워커가 하나일 때나 테스트에서 씀
+    같은 hub 를 쓰는 ConnectionManager 여러 개로 여러 워커를 흉내낼 수 있음
+    """
+
+    name = MEMORY
+
+    def __init__(self, *, channel: str, hub: MemoryHub = memory_hub) -> None:
+        super().__init__(channel=channel)
+        self.hub = hub
+
+    async def start(
+        self, deliver: Deliver, user_changed: Optional[UserChanged] = None
+    ) -> None:
+        await super().start(deliver, user_changed)
+        self.hub.subscribers.setdefault(self.channel, []).append(self)
+
+    async def stop(self) -> None:
+        subscribers = self.hub.subscribers.get(self.channel, [])
+        if self in subscribers:
+            subscribers.remove(self)
+        await super().stop()
+
+    async def _publish(self, payload: str) -> None:
+        for subscriber in list(self.hub.subscribers.get(self.channel, [])):
+            subscriber._receive(payload)
+
+
+class ReconnectingBackplane(Backplane):
+    """
+    구독 연결이 끊기면 reconnect_seconds 마다 다시 연결함
+    끊겨 있던 동안 보낸 메시지는 받지 못함
+    """
+
+    def __init__(self, *, channel: str, reconnect_seconds: float) -> None:
+        super().__init__(channel=channel)
+        self.reconnect_seconds = reconnect_seconds
+        self.task: Optional["asyncio.Future[Any]"] = None
+        self.connected: Optional["asyncio.Event"] = None
+        self.publish_lock: Optional["asyncio.Lock"] = None
+
+    async def start(
+        self, deliver: Deliver, user_changed: Optional[UserChanged] = None
+    ) -> None:
+        await super().start(deliver, user_changed)
+        # 이벤트 루프가 뜬 뒤에 만들어야 하므로 여기서 만듦
+        self.connected = asyncio.Event()
+        self.publish_lock = asyncio.Lock()
+        self.task = asyncio.ensure_future(self._subscribe_loop())
+        # 처음 연결은 기다려서 시작 직후에 보낸 메시지도 받도록 함
+        waiter = asyncio.ensure_future(self.connected.wait())
+        await asyncio.wait([waiter, self.task], return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self._close()
+        await super().stop()
+
+    async def _subscribe_loop(self) -> None:
+        while True:
+            try:
+                await self._subscribe()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Lost %s backplane subscription: %r", self.name, e)
+            if self.connected is not None:
+                self.connected.clear()
+            await asyncio.sleep(self.reconnect_seconds)
+
+    @abstractmethod
+    async def _subscribe(self) -> None:
+        """
+        연결해서 구독하고, 연결이 끊길 때까지 반환하지 않음
+        """
+
+    async def _close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["connected"] = self.connected is not None and self.connected.is_set()
+        return stats
+
+
+class PostgresBackplane(ReconnectingBackplane):
+    """
+    Postgres LISTEN/NOTIFY 로 전달하는 채널. 이미 쓰는 DB 외에 따로 필요한 서버가 없음
+    트랜잭션 안에서 pg_notify 를 부르면 커밋할 때 전달됨
+    """
+
+    name = POSTGRES
+    max_payload = POSTGRES_PAYLOAD_LIMIT
+
+    def __init__(self, *, dsn: str, channel: str, reconnect_seconds: float) -> None:
+        super().__init__(channel=channel, reconnect_seconds=reconnect_seconds)
+        self.dsn = dsn
+        self.listener: Optional[asyncpg.Connection] = None
+        self.publisher: Optional[asyncpg.Connection] = None
+
+    def _notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        self._receive(payload)
+
+    async def _subscribe(self) -> None:
+        lost = asyncio.get_event_loop().create_future()
+
+        def terminated(connection: asyncpg.Connection) -> None:
+            if not lost.done():
+                lost.set_result(None)
+
+        self.listener = await asyncpg.connect(self.dsn)
+        try:
+            self.listener.add_termination_listener(terminated)
+            await self.listener.add_listener(self.channel, self._notify)
+            assert self.connected is not None
+            self.connected.set()
+            await lost
+        finally:
+            listener, self.listener = self.listener, None
+            if not listener.is_closed():
+                listener.terminate()
+
+    async def _publish(self, payload: str) -> None:
+        if not self.fits(payload):
+            raise ValueError("payload is too large for NOTIFY")
+        assert self.publish_lock is not None, "backplane is not started"
+        async with self.publish_lock:
+            if self.publisher is None or self.publisher.is_closed():
+                self.publisher = await asyncpg.connect(self.dsn)
+            try:
+                await self.publisher.execute(
+                    "SELECT pg_notify($1, $2)", self.channel, payload
+                )
+            except (asyncpg.PostgresConnectionError, asyncpg.InterfaceError, OSError):
+                self.publisher.terminate()
+                self.publisher = None
+                raise
+
+    async def _close(self) -> None:
+        if self.publisher is not None:
+            await self.publisher.close()
+            self.publisher = None
+
+
+class RedisBackplane(ReconnectingBackplane):
+    """
+    Redis pub/sub 채널로 전달하는 채널. redis 패키지(redis extra)가 있어야 씀
+    Redis 와 프로토콜이 같은 서버(KeyDB, Valkey 등)에도 그대로 씀
+    """
+
+    name = REDIS
+
+    def __init__(
+        self,
+        *,
+        url: str,
+        channel: str,
+        reconnect_seconds: float,
+        client: Optional[Any] = None,
+    ) -> None:
+        """
+        client 를 넘기면 url 로 연결하지 않고 그 redis.asyncio.Redis 를 씀 (decode_responses=True)
+        """
+        if client is None and aioredis is None:
+            raise RuntimeError("The redis backend needs the redis package")
+        super().__init__(channel=channel, reconnect_seconds=reconnect_seconds)
+        self.url = url
+        self.client = client
+        self.owns_client = client is None
+
+    async def start(
+        self, deliver: Deliver, user_changed: Optional[UserChanged] = None
+    ) -> None:
+        if self.client is None:
+            # 연결 풀은 처음 쓸 때 연결하고, 끊기면 다음 명령에서 다시 연결함
+            self.client = aioredis.from_url(self.url, decode_responses=True)
+        await super().start(deliver, user_changed)
+
+    async def _subscribe(self) -> None:
+        assert self.client is not None
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.channel)
+            assert self.connected is not None
+            self.connected.set()
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    self._receive(message["data"])
+        finally:
+            await pubsub.reset()
+
+    async def _publish(self, payload: str) -> None:
+        assert self.client is not None, "backplane is not started"
+        await self.client.publish(self.channel, payload)
+
+    async def _close(self) -> None:
+        if self.client is not None and self.owns_client:
+            await self.client.close()
+            self.client = None
+
+
+def create_backplane(
+    backend: str = settings.BROADCAST_BACKEND,
+    *,
+    channel: str = settings.BROADCAST_CHANNEL,
+) -> Backplane:
+    if backend == MEMORY:
+        return MemoryBackplane(channel=channel)
+    if backend == POSTGRES:
+        return PostgresBackplane(
+            dsn=str(settings.SQLALCHEMY_DATABASE_URI),
+            channel=channel,
+            reconnect_seconds=settings.BROADCAST_RECONNECT_SECONDS,
+        )
+    if backend == REDIS:
+        if not settings.BROADCAST_REDIS_URL:
+            raise ValueError("BROADCAST_REDIS_URL is required for the redis backend")
+        return RedisBackplane(
+            url=settings.BROADCAST_REDIS_URL,
+            channel=channel,
+            reconnect_seconds=settings.BROADCAST_RECONNECT_SECONDS,
+        )
+    raise ValueError(f"backend must be one of {BACKENDS}")
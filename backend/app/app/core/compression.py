@@ -0,0 +1,180 @@
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None  # type: ignore
+
+GZIP = "gzip"
+BROTLI = "br"
+
+# 이미 압축된 형식이거나 본문이 없는 응답
+SKIP_STATUS_CODES = (204, 304)
+
+
+class Encoder(ABC):
+    """
+    스트리밍 응답도 조각마다 바로 보낼 수 있도록 조각마다 flush 함
+    """
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """
+        data 를 압축하고 지금까지 압축한 것을 모두 flush 해서 반환
+        """
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        """
+        남은 데이터와 스트림의 끝을 반환
+        """
+
+
+class GzipEncoder(Encoder):
+    def __init__(self, level: int) -> None:
+        # wbits=31 은 gzip 헤더와 트레일러를 붙임
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+class BrotliEncoder(Encoder):
+    def __init__(self, quality: int) -> None:
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    encodings: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            encodings[coding.lower()] = q
+    return encodings
+
+
+class CompressionMiddleware:
+    """
+    content_types 로 시작하는 응답 중 minimum_size 바이트 이상인 것만 br 이나 gzip 으로 압축
+    brotli 패키지가 없거나 brotli_quality 가 None 이면 gzip 만 씀
+    http 요청만 처리하므로 웹소켓은 그대로 지나감
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int,
+        content_types: Sequence[str],
+        gzip_level: int,
+        brotli_quality: Optional[int] = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = tuple(content_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality if brotli is not None else None
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        encodings = accepted_encodings(accept_encoding)
+        candidates: List[Tuple[float, int, str]] = []
+        if self.brotli_quality is not None:
+            candidates.append((encodings.get(BROTLI, 0.0), 1, BROTLI))
+        candidates.append((encodings.get(GZIP, 0.0), 0, GZIP))
+        q, _, encoding = max(candidates)
+        return encoding if q > 0 else None
+
+    def encoder(self, encoding: str) -> Encoder:
+        if encoding == BROTLI:
+            assert self.brotli_quality is not None
+            return BrotliEncoder(self.brotli_quality)
+        return GzipEncoder(self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            headers = Headers(scope=scope)
+            encoding = self.choose_encoding(headers.get("accept-encoding", ""))
+            if encoding is not None:
+                responder = CompressionResponder(self, encoding, send)
+                await self.app(scope, receive, responder.send)
+                return
+        await self.app(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(
+        self, middleware: CompressionMiddleware, encoding: str, send: Send
+    ) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.initial_message: Message = {}
+        self.started = False
+        self.encoder: Optional[Encoder] = None
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        if self.initial_message["status"] in SKIP_STATUS_CODES:
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(self.middleware.content_types)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # 첫 본문을 보고 압축할지 정한 뒤에 헤더를 보냄
+            self.initial_message = message
+            return
+        if message_type != "http.response.body":
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            if self._compressible(headers):
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    # 스트리밍 응답은 길이를 미리 알 수 없으므로 크기와 상관없이 압축함
+                    headers["Content-Encoding"] = self.encoding
+                    del headers["Content-Length"]
+                    self.encoder = self.middleware.encoder(self.encoding)
+                elif len(body) >= self.middleware.minimum_size:
+                    encoder = self.middleware.encoder(self.encoding)
+                    body = encoder.compress(body) + encoder.finish()
+                    headers["Content-Encoding"] = self.encoding
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+            await self._send(self.initial_message)
+
+        if self.encoder is not None:
+            compressed = self.encoder.compress(body)
+            if not more_body:
+                compressed += self.encoder.finish()
+            message = {**message, "body": compressed}
+        await self._send(message)
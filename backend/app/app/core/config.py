@@ -10,6 +10,33 @@ class Settings(BaseSettings):
     KAKAO_APP_KEY: str
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # 로그인한 유저 캐시. 다른 워커의 수정과 삭제는 backplane 으로 바로 지우고,
+    # 알림을 놓친 경우에도 USER_CACHE_TTL_SECONDS 안에 반영됨
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    # 웹소켓 연결마다 보내지 못하고 쌓아 둘 메시지 수와 한 번 보내는 제한 시간(초)
+    # 큐가 가득 차면 drop_oldest: 가장 오래된 메시지를 버림, evict: 연결을 끊음
+    WS_SEND_QUEUE_SIZE: int = 64
+    WS_SEND_TIMEOUT: float = 5.0
+    WS_OVERFLOW_POLICY: str = "drop_oldest"
+    # 여러 워커의 웹소켓 방을 잇는 채널: memory(한 프로세스), postgres(LISTEN/NOTIFY), redis(redis extra)
+    BROADCAST_BACKEND: str = "memory"
+    BROADCAST_CHANNEL: str = "timetable_events"
+    BROADCAST_REDIS_URL: Optional[str] = None
+    BROADCAST_RECONNECT_SECONDS: float = 1.0
+    # 응답 압축. COMPRESSION_MINIMUM_SIZE 바이트보다 작거나 content type 이 맞지 않으면 압축하지 않음
+    # brotli 패키지가 있으면 br 을 먼저 쓰고, COMPRESSION_BROTLI_QUALITY 를 비우면 gzip 만 씀
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_CONTENT_TYPES: List[str] = [
+        "application/json",
+        "application/vnd.meetbowl.columns+json",
+        "application/x-msgpack",
+        "application/x-ndjson",
+        "text/",
+    ]
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: Optional[int] = 4
     SERVER_NAME: str
     SERVER_HOST: AnyHttpUrl
     # BACKEND_CORS_ORIGINS is a JSON-formatted list of origins
@@ -23,6 +50,19 @@ class Settings(BaseSettings):
             return values.get("KAKAO_APP_KEY")
         return v
 
+    KAKAO_AUTH_HOST: AnyHttpUrl = "https://kauth.kakao.com"  # type: ignore
+    KAKAO_API_HOST: AnyHttpUrl = "https://kapi.kakao.com"  # type: ignore
+    # 카카오 요청 한 번의 연결/전체 제한 시간(초)
+    KAKAO_CONNECT_TIMEOUT: float = 2.0
+    KAKAO_TIMEOUT: float = 5.0
+    KAKAO_MAX_CONNECTIONS: int = 100
+    # 연결 실패, 시간 초과, 502/503/504 응답일 때 다시 시도할 횟수와 첫 대기 시간(초)
+    KAKAO_RETRIES: int = 2
+    KAKAO_RETRY_BACKOFF: float = 0.1
+    # 연속으로 이만큼 실패하면 KAKAO_CIRCUIT_RESET_SECONDS 동안 카카오에 요청하지 않음
+    KAKAO_CIRCUIT_FAILURES: int = 5
+    KAKAO_CIRCUIT_RESET_SECONDS: float = 30.0
+
     @validator("BACKEND_CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
         if isinstance(v, str) and not v.startswith("["):
@@ -45,6 +85,21 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     SQLALCHEMY_DATABASE_URI: Optional[PostgresDsn] = None
+    # 워커마다 동기/비동기 엔진이 풀을 하나씩 가지므로 워커 하나가 여는 최대 연결 수는
+    # 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    # DB_POOL_TIMEOUT 초 동안 빈 연결이 없으면 요청이 실패하고, DB_POOL_RECYCLE 초 지난 연결은 다시 엶
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    # Postgres 가 이보다 오래 걸린 문을 취소함(밀리초). 0 이면 제한하지 않음
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    # 타임테이블마다 미리 세어 두는 칸별 참여자 수의 칸 크기(분). 하루(1440분)를 나누어 떨어지게 해야 함
+    # 바꾸면 다음 조회나 쓰기에서 타임테이블마다 다시 셈
+    AVAILABILITY_COUNT_SLOT_MINUTES: int = 60
+    # 켜면 같은 유저/요일/라벨의 겹치거나 맞닿은 스케쥴 블록 행을 쓸 때 하나로 합침
+    # 시간 칸을 지우면 합친 행에서 그 시간만 잘라 냄
+    SCHEDULEBLOCK_COMPACTION: bool = False
 
     @validator("SQLALCHEMY_DATABASE_URI", pre=True)
     def assemble_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
@@ -58,6 +113,22 @@ class Settings(BaseSettings):
             path=f"/{values.get('POSTGRES_DB') or ''}",
         )
 
+    ASYNC_SQLALCHEMY_DATABASE_URI: Optional[PostgresDsn] = None
+
+    @validator("ASYNC_SQLALCHEMY_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(
+        cls, v: Optional[str], values: Dict[str, Any]
+    ) -> Any:
+        if isinstance(v, str):
+            return v
+        return PostgresDsn.build(
+            scheme="postgresql+asyncpg",
+            user=values.get("POSTGRES_USER"),
+            password=values.get("POSTGRES_PASSWORD"),
+            host=values.get("POSTGRES_SERVER"),
+            path=f"/{values.get('POSTGRES_DB') or ''}",
+        )
+
     SMTP_TLS: bool = True
     SMTP_PORT: Optional[int] = None
     SMTP_HOST: Optional[str] = None
@@ -0,0 +1,179 @@
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.core.availability import empty_week
+from app.core.rooms import manager
+
+# 세션의 info 에 커밋 전까지 모아 두는 변경 내용
+DELTAS_KEY = "scheduleblock_deltas"
+
+DELTA_EVENT_TYPE = "scheduleblocks"
+# 변경 이벤트가 backplane 으로 보내기에 너무 클 때 다른 워커에 대신 보내는 이벤트
+REFETCH_EVENT_TYPE = "scheduleblocks_refetch"
+BLOCK_EVENT_FIELDS = (
+    "id",
+    "day",
+    "start_time",
+    "start_minute",
+    "end_time",
+    "end_minute",
+    "label",
+)
+
+
+class ScheduleDelta:
+    """
+    한 트랜잭션에서 한 유저가 한 타임테이블에 추가/삭제한 블록과 칸
+    받는 쪽은 removed 를 먼저 지우고 added 를 더하면 되고, 같은 이벤트를 두 번 적용해도 결과가 같음
+    칸은 요일별 24비트 마스크로 보내며 칸의 id 는 "<availability_id>-<day>-<hour>" 임
+    version 은 커밋한 뒤의 타임테이블 version 으로, 건너뛴 이벤트가 있는지 확인할 때 씀
+    days 는 블록이나 칸이 바뀐 요일로, 커밋할 때 집계를 그 요일만 다시 계산하는 데 씀
+    다른 워커에 붙은 클라이언트는 변경 내용 대신 version 만 담은 "scheduleblocks_refetch" 이벤트를
+    받을 수 있고, 이때는 스케쥴 블록을 다시 읽어야 함
+    """
+
+    def __init__(self, table_id: str, user_id: str) -> None:
+        self.table_id = table_id
+        self.user_id = user_id
+        self.version: Optional[int] = None
+        self.availability_id: Optional[str] = None
+        self.added_hours = empty_week()
+        self.removed_hours = empty_week()
+        self.added_blocks: Dict[str, Dict[str, Any]] = {}
+        self.removed_block_ids: List[str] = []
+        self.days: Set[int] = set()
+
+    def _touch_days(self, masks: List[int]) -> None:
+        self.days.update(day for day, mask in enumerate(masks) if mask)
+
+    def add_hours(self, availability_id: str, masks: List[int]) -> None:
+        self.availability_id = availability_id
+        self._touch_days(masks)
+        self.added_hours = [old | mask for old, mask in zip(self.added_hours, masks)]
+
+    def remove_hours(self, availability_id: str, masks: List[int]) -> None:
+        self.availability_id = availability_id
+        self._touch_days(masks)
+        self.removed_hours = [
+            old | mask for old, mask in zip(self.removed_hours, masks)
+        ]
+        self.added_hours = [old & ~mask for old, mask in zip(self.added_hours, masks)]
+
+    def add_block(self, block: Any) -> None:
+        if isinstance(block, dict):
+            data = {field: block[field] for field in BLOCK_EVENT_FIELDS}
+        else:
+            data = {field: getattr(block, field) for field in BLOCK_EVENT_FIELDS}
+        self.added_blocks[data["id"]] = data
+        self.days.add(data["day"])
+
+    def remove_block(self, id: str, day: int) -> None:
+        self.added_blocks.pop(id, None)
+        self.days.add(day)
+        if id not in self.removed_block_ids:
+            self.removed_block_ids.append(id)
+
+    def is_empty(self) -> bool:
+        return not (
+            any(self.added_hours)
+            or any(self.removed_hours)
+            or self.added_blocks
+            or self.removed_block_ids
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        added: Dict[str, Any] = {}
+        removed: Dict[str, Any] = {}
+        if any(self.added_hours):
+            added["hours"] = self.added_hours
+        if self.added_blocks:
+            added["blocks"] = list(self.added_blocks.values())
+        if any(self.removed_hours):
+            removed["hours"] = self.removed_hours
+        if self.removed_block_ids:
+            removed["block_ids"] = self.removed_block_ids
+        event: Dict[str, Any] = {
+            "type": DELTA_EVENT_TYPE,
+            "timetable_id": self.table_id,
+            "user_id": self.user_id,
+            "version": self.version,
+            "added": added,
+            "removed": removed,
+        }
+        if self.availability_id is not None:
+            event["availability_id"] = self.availability_id
+        return event
+
+    def to_message(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"), ensure_ascii=False)
+
+    def to_refetch_message(self) -> str:
+        return json.dumps(
+            {
+                "type": REFETCH_EVENT_TYPE,
+                "timetable_id": self.table_id,
+                "user_id": self.user_id,
+                "version": self.version,
+            },
+            separators=(",", ":"),
+        )
+
+
+def _session_info(db: Any) -> Dict[str, Any]:
+    # AsyncSession 은 안쪽의 동기 Session 의 info 를 같이 씀
+    return getattr(db, "sync_session", db).info
+
+
+def record_delta(db: Any, *, table_id: str, user_id: str) -> ScheduleDelta:
+    deltas: Dict[Tuple[str, str], ScheduleDelta] = _session_info(db).setdefault(
+        DELTAS_KEY, {}
+    )
+    key = (table_id, user_id)
+    if key not in deltas:
+        deltas[key] = ScheduleDelta(table_id, user_id)
+    return deltas[key]
+
+
+def record_versions(db: Any, versions: List[Any]) -> None:
+    # versions 는 _bump_versions 가 반환한 (table_id, version) 행
+    deltas: Dict[Tuple[str, str], ScheduleDelta] = _session_info(db).get(DELTAS_KEY, {})
+    versions_by_table = dict(versions)
+    for (table_id, _), delta in deltas.items():
+        if table_id in versions_by_table:
+            delta.version = versions_by_table[table_id]
+
+
+def touched_participants(db: Any) -> List[Tuple[str, str, Set[int]]]:
+    """
+    이 트랜잭션에서 블록이나 칸이 바뀐 (table_id, user_id, 바뀐 요일)
+    잠금 순서가 같도록 (table_id, user_id) 로 정렬해서 반환
+    """
+    deltas: Dict[Tuple[str, str], ScheduleDelta] = _session_info(db).get(DELTAS_KEY, {})
+    return [
+        (table_id, user_id, delta.days)
+        for (table_id, user_id), delta in sorted(deltas.items())
+        if not delta.is_empty()
+    ]
+
+
+@event.listens_for(Session, "after_commit")
+def publish_deltas(session: Session) -> None:
+    """
+    커밋된 변경만 그 타임테이블의 웹소켓 방으로 보냄
+    """
+    deltas: Dict[Tuple[str, str], ScheduleDelta] = session.info.pop(DELTAS_KEY, {})
+    for delta in deltas.values():
+        if not delta.is_empty():
+            manager.publish_threadsafe(
+                delta.table_id, delta.to_message(), delta.to_refetch_message()
+            )
+
+
+@event.listens_for(Session, "after_transaction_end")
+def discard_deltas(session: Session, transaction: SessionTransaction) -> None:
+    # 롤백했거나 커밋하지 않고 닫은 트랜잭션의 변경은 버림
+    if transaction.parent is None:
+        session.info.pop(DELTAS_KEY, None)
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+from fastapi import HTTPException
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FORM_CONTENT_TYPE = "application/x-www-form-urlencoded;charset=utf-8"
+RETRY_STATUSES = (502, 503, 504)
+
+
+class KakaoUnavailable(Exception):
+    """
+    카카오 서버에 연결하지 못했거나, 제한 시간을 넘겼거나, 일시적인 오류 응답을 받음
+    """
+
+
+class CircuitBreaker:
+    """
+    연속으로 failure_threshold 번 실패하면 reset_seconds 동안 요청을 보내지 않고 바로 실패시킴
+    시간이 지나면 요청 하나만 시험 삼아 보내서 성공하면 닫고, 실패하면 다시 엶
+    이벤트 루프 한 곳에서만 쓰므로 잠금은 필요 없음
+    """
+
+    def __init__(self, *, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial:
+            self.trial = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.trial or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.trial = False
+
+    def end_trial(self) -> None:
+        """
+        시험 요청이 취소되거나 성공/실패로 세지 않는 예외로 끝나도 다음 요청이 다시 시험하게 함
+        """
+        self.trial = False
+
+
+class KakaoClient:
+    """
+    카카오 OAuth 토큰 교환과 유저 정보 조회용 비동기 클라이언트
+    연결은 한 세션에서 재사용하고, 요청마다 제한 시간, 재시도, 서킷 브레이커를 적용함
+    """
+
+    def __init__(
+        self,
+        *,
+        app_key: str,
+        auth_host: str,
+        api_host: str,
+        connect_timeout: float,
+        timeout: float,
+        max_connections: int,
+        retries: int,
+        retry_backoff: float,
+        circuit_failures: int,
+        circuit_reset_seconds: float,
+    ) -> None:
+        self.app_key = app_key
+        self.auth_host = str(auth_host).rstrip("/")
+        self.api_host = str(api_host).rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.circuit = CircuitBreaker(
+            failure_threshold=circuit_failures, reset_seconds=circuit_reset_seconds
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._post_with_retry = retry(
+            stop=stop_after_attempt(retries + 1),
+            wait=wait_exponential(multiplier=retry_backoff),
+            retry=retry_if_exception_type(KakaoUnavailable),
+            before_sleep=before_sleep_log(logger, logging.WARNING),
+            reraise=True,
+        )(self._post_once)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        세션은 실행 중인 이벤트 루프에 묶이므로 첫 요청 때 만듦
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(
+                    total=self.timeout, connect=self.connect_timeout
+                ),
+                headers={"Content-type": FORM_CONTENT_TYPE},
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _post_once(self, url: str, **kwargs: Any) -> Dict[str, Any]:
+        try:
+            async with self.session.post(url, **kwargs) as response:
+                if response.status in RETRY_STATUSES:
+                    raise KakaoUnavailable(f"{url} returned {response.status}")
+                try:
+                    return await response.json(content_type=None)
+                except ValueError:
+                    return {}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise KakaoUnavailable(f"{url} failed: {e!r}") from e
+
+    async def post(self, url: str, **kwargs: Any) -> Dict[str, Any]:
+        trial = self.circuit.state == "half-open"
+        if not self.circuit.allow():
+            raise HTTPException(
+                status_code=503, detail="Kakao login is temporarily unavailable"
+            )
+        try:
+            result = await self._post_with_retry(url, **kwargs)
+        except KakaoUnavailable as e:
+            logger.error(e)
+            self.circuit.record_failure()
+            raise HTTPException(
+                status_code=503, detail="Kakao login is temporarily unavailable"
+            )
+        finally:
+            if trial:
+                self.circuit.end_trial()
+        self.circuit.record_success()
+        return result
+
+    async def get_access_token(self, code: str, redirect_uri: str) -> Dict[str, Any]:
+        return await self.post(
+            f"{self.auth_host}/oauth/token",
+            params={
+                "grant_type": "authorization_code",
+                "client_id": self.app_key,
+                "redirect_uri": redirect_uri,
+                "code": code,
+            },
+        )
+
+    async def get_user(self, access_token: str) -> Dict[str, Any]:
+        return await self.post(
+            f"{self.api_host}/v2/user/me",
+            headers={"Authorization": "Bearer " + access_token},
+        )
+
+    async def get_user_by_code(self, code: str, redirect_uri: str) -> Dict[str, Any]:
+        kakao_access_token = await self.get_access_token(code, redirect_uri)
+        if not kakao_access_token.get("access_token"):
+            raise HTTPException(status_code=401, detail="Incorrect code")
+
+        kakao_user = await self.get_user(kakao_access_token["access_token"])
+        if not kakao_user.get("id"):
+            raise HTTPException(status_code=500, detail="Get kakao id error")
+
+        return kakao_user
+
+
+kakao_client = KakaoClient(
+    app_key=settings.KAKAO_APP_KEY,
+    auth_host=settings.KAKAO_AUTH_HOST,
+    api_host=settings.KAKAO_API_HOST,
+    connect_timeout=settings.KAKAO_CONNECT_TIMEOUT,
+    timeout=settings.KAKAO_TIMEOUT,
+    max_connections=settings.KAKAO_MAX_CONNECTIONS,
+    retries=settings.KAKAO_RETRIES,
+    retry_backoff=settings.KAKAO_RETRY_BACKOFF,
+    circuit_failures=settings.KAKAO_CIRCUIT_FAILURES,
+    circuit_reset_seconds=settings.KAKAO_CIRCUIT_RESET_SECONDS,
+)
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from starlette.websockets import WebSocket
+
+from app.core.backplane import Backplane, UserChanged, create_backplane
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 큐가 가득 찼을 때: 가장 오래된 메시지를 버리거나, 연결을 끊음
+DROP_OLDEST = "drop_oldest"
+EVICT = "evict"
+OVERFLOW_POLICIES = (DROP_OLDEST, EVICT)
+
+# 너무 느려서 끊는 연결의 close code (1013: Try Again Later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class RoomClient:
+    """
+    웹소켓 하나와 그 전송 큐
+    전용 태스크가 큐에서 꺼내 보내므로 느린 클라이언트가 다른 클라이언트의 전송을 막지 않음
+    """
+
+    def __init__(self, websocket: WebSocket, timetable_id: str, *, queue_size: int):
+        self.websocket = websocket
+        self.timetable_id = timetable_id
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.task: Optional["asyncio.Future[Any]"] = None
+
+    def put(self, message: str, *, overflow: str) -> bool:
+        """
+        큐에 넣지 못해서 연결을 끊어야 하면 False
+        """
+        if self.queue.full():
+            if overflow == EVICT:
+                return False
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+        return True
+
+
+class ConnectionManager:
+    """
+    timetable_id 별 방으로 웹소켓 연결을 묶어서 관리
+    한 이벤트 루프 안에서만 쓰므로 잠금은 필요 없음
+    publish 한 메시지는 backplane 을 거쳐 다른 워커의 같은 방에도 전달됨
+    """
+
+    def __init__(
+        self,
+        *,
+        queue_size: int,
+        send_timeout: float,
+        overflow: str,
+        backplane: Backplane,
+        user_changed: Optional[UserChanged] = None,
+    ):
+        """
+        user_changed 는 다른 워커에서 바뀌거나 지워진 유저의 id 를 받음 (유저 캐시 무효화)
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.backplane = backplane
+        self.user_changed = user_changed
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.overflow = overflow
+        self.rooms: Dict[str, Set[RoomClient]] = {}
+        self.dropped = 0
+        self.evicted = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self) -> None:
+        self.loop = asyncio.get_event_loop()
+        await self.backplane.start(self.broadcast, self.user_changed)
+
+    async def stop(self) -> None:
+        self.loop = None
+        await self.backplane.stop()
+
+    async def connect(self, websocket: WebSocket, timetable_id: str) -> RoomClient:
+        await websocket.accept()
+        client = RoomClient(websocket, timetable_id, queue_size=self.queue_size)
+        client.task = asyncio.ensure_future(self._send_loop(client))
+        self.rooms.setdefault(timetable_id, set()).add(client)
+        return client
+
+    def disconnect(self, client: RoomClient) -> None:
+        room = self.rooms.get(client.timetable_id)
+        if room is not None:
+            room.discard(client)
+            if not room:
+                del self.rooms[client.timetable_id]
+        if client.task is not None:
+            client.task.cancel()
+        self.dropped += client.dropped
+        client.dropped = 0
+
+    async def _send_loop(self, client: RoomClient) -> None:
+        try:
+            while True:
+                message = await client.queue.get()
+                await asyncio.wait_for(
+                    client.websocket.send_text(message), timeout=self.send_timeout
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 끊겼거나 send_timeout 안에 보내지 못한 연결은 방에서 뺌
+            logger.info("Closing websocket in %s: %r", client.timetable_id, e)
+            client.task = None
+            self.disconnect(client)
+            await self._close(client, SLOW_CONSUMER_CLOSE_CODE)
+
+    async def _close(self, client: RoomClient, code: int) -> None:
+        try:
+            await client.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def _evict(self, client: RoomClient) -> None:
+        self.evicted += 1
+        self.disconnect(client)
+        asyncio.ensure_future(self._close(client, SLOW_CONSUMER_CLOSE_CODE))
+
+    def broadcast(self, timetable_id: str, message: str) -> int:
+        """
+        방의 모든 연결의 큐에 메시지를 넣고 바로 반환함. 실제 전송은 연결마다 동시에 진행됨
+        """
+        room = self.rooms.get(timetable_id)
+        if not room:
+            return 0
+        for client in list(room):
+            if not client.put(message, overflow=self.overflow):
+                self._evict(client)
+        return len(room)
+
+    async def publish(
+        self, timetable_id: str, message: str, fallback: Optional[str] = None
+    ) -> None:
+        """
+        이 워커의 방에 바로 뿌리고, 다른 워커에는 backplane 으로 보냄
+        message 가 backplane 으로 보내기에 너무 크면 다른 워커에는 fallback 을 보냄
+        """
+        self.broadcast(timetable_id, message)
+        await self.backplane.publish(timetable_id, message, fallback)
+
+    def publish_threadsafe(
+        self, timetable_id: str, message: str, fallback: Optional[str] = None
+    ) -> None:
+        """
+        스레드 풀에서 도는 동기 API 에서도 부를 수 있는 publish. 보낼 때까지 기다리지 않음
+        start 전이면(스크립트, 앱 없이 도는 테스트) 아무것도 하지 않음
+        """
+        self._run_threadsafe(lambda: self.publish(timetable_id, message, fallback))
+
+    def publish_user_changed_threadsafe(self, user_id: str) -> None:
+        """
+        다른 워커에 유저 캐시를 지우라고 알림. publish_threadsafe 처럼 기다리지 않음
+        """
+        self._run_threadsafe(lambda: self.backplane.publish_user_changed(user_id))
+
+    def _run_threadsafe(self, coroutine: Callable[[], Awaitable[Any]]) -> None:
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            asyncio.ensure_future(coroutine())
+        else:
+            loop.call_soon_threadsafe(asyncio.ensure_future, coroutine())
+
+    async def send_message_by_id(self, websocket: WebSocket, message: str) -> None:
+        await websocket.send_text(message)
+
+    async def send_message_to_all(self, timetable_id: str, message: str) -> None:
+        await self.publish(timetable_id, f"{timetable_id}: {message}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rooms": len(self.rooms),
+            "connections": sum(len(room) for room in self.rooms.values()),
+            "queue_size": self.queue_size,
+            "overflow": self.overflow,
+            "dropped": self.dropped
+            + sum(client.dropped for room in self.rooms.values() for client in room),
+            "evicted": self.evicted,
+            "backplane": self.backplane.stats(),
+        }
+
+
+manager = ConnectionManager(
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    send_timeout=settings.WS_SEND_TIMEOUT,
+    overflow=settings.WS_OVERFLOW_POLICY,
+    backplane=create_backplane(),
+)
@@ -1,6 +1,12 @@
-from .crud_scheduleblock import scheduleblock
-from .crud_timetable import timetable
-from .crud_user import user
+from app.db.session import AsyncInnerSession, SessionLocal
+
+from .crud_availability_count import availability_count, listen_for_schedule_commits
+from .crud_scheduleblock import async_scheduleblock, scheduleblock
+from .crud_timetable import async_timetable, timetable
+from .crud_user import async_user, user
+
+# 앱의 세션(SessionLocal, AsyncSessionLocal)이 스케쥴 블록을 바꾸고 커밋하면 칸 참여자 수 집계도 고침
+listen_for_schedule_commits(SessionLocal, AsyncInnerSession)
 
 # For a new basic set of CRUD operations you could just do
 
@@ -0,0 +1,342 @@
+from itertools import islice
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+
+from sqlalchemy import bindparam, delete, event, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.availability import (
+    DAYS_PER_WEEK,
+    MINUTES_PER_DAY,
+    day_slot_bits,
+    iter_slots,
+    slot_bits,
+    slot_count,
+    slot_counts,
+)
+from app.core.config import settings
+from app.core.deltas import touched_participants
+from app.crud.crud_scheduleblock import scheduleblock
+from app.models.availability_count import AvailabilityCount, ParticipantSlots
+from app.models.timetable import TimeTable
+
+
+class CountsRow(NamedTuple):
+    """
+    저장하지 않고 원본 행에서 바로 센 집계. AvailabilityCount 행과 같은 필드를 가짐
+    """
+
+    slot_minutes: int
+    counts: List[int]
+    participant_count: int
+
+
+def slots_to_bytes(bits: int, count: int) -> bytes:
+    return bits.to_bytes((count + 7) // 8, "little")
+
+
+def slots_from_bytes(data: bytes) -> int:
+    return int.from_bytes(data, "little")
+
+
+class CRUDAvailabilityCount:
+    """
+    타임테이블별 칸 참여자 수 집계
+
+    스케쥴 블록을 바꾸는 트랜잭션은 커밋 직전에 바뀐 참여자의 바뀐 요일 칸만 다시 계산해서
+    이전 칸과 다른 칸의 수만 고치므로, 읽을 때는 참여자나 블록 수와 상관없이 칸 수만큼만 읽음
+    집계 행이 없거나 칸 크기가 설정과 다르면 쓰기에서는 원본 행에서 다시 만들고,
+    조회에서는 원본 행에서 센 값을 저장하지 않고 반환함
+    """
+
+    def __init__(self, slot_minutes: int) -> None:
+        if slot_minutes <= 0 or MINUTES_PER_DAY % slot_minutes:
+            raise ValueError("Slot minutes must divide a day (1440 minutes)")
+        self.slot_minutes = slot_minutes
+        self.count = slot_count(slot_minutes)
+
+        counts = AvailabilityCount.__table__.c
+        participants = ParticipantSlots.__table__.c
+        # 버전을 올린 트랜잭션과 같은 잠금(FOR NO KEY UPDATE)을 씀. FOR UPDATE 는 다른 쓰기가
+        # 블록/칸 행의 외래 키로 잡은 KEY SHARE 와 충돌해서, 버전 행을 기다리는 그 쓰기와 교착됨
+        # 집계 행도 뒤이은 UPDATE 가 잡는 것과 같은 잠금을 씀
+        self._lock_timetable = (
+            select(TimeTable.id)
+            .where(TimeTable.id == bindparam("table_id"))
+            .with_for_update(key_share=True)
+        )
+        self._counts_by_table = select(
+            counts.slot_minutes, counts.counts, counts.participant_count
+        ).where(counts.table_id == bindparam("table_id"))
+        self._lock_counts = self._counts_by_table.with_for_update(key_share=True)
+        self._participants_by_table = select(
+            participants.user_id, participants.slots
+        ).where(participants.table_id == bindparam("table_id"))
+        self._participant_slots = select(participants.slots).where(
+            participants.table_id == bindparam("table_id"),
+            participants.user_id == bindparam("user_id"),
+        )
+        self._insert_participants = insert(ParticipantSlots)
+        upsert_participant = pg_insert(ParticipantSlots)
+        self._upsert_participant = upsert_participant.on_conflict_do_update(
+            index_elements=[participants.table_id, participants.user_id],
+            set_={"slots": upsert_participant.excluded.slots},
+        )
+        # 집계 행은 ORM 객체로 읽지 않으므로 세션의 객체를 맞출 필요가 없음
+        self._delete_participant = (
+            delete(ParticipantSlots)
+            .where(
+                participants.table_id == bindparam("table_id"),
+                participants.user_id == bindparam("user_id"),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        self._delete_participants = (
+            delete(ParticipantSlots)
+            .where(participants.table_id == bindparam("table_id"))
+            .execution_options(synchronize_session=False)
+        )
+        self._update_counts = (
+            update(AvailabilityCount)
+            .where(counts.table_id == bindparam("counts_table_id"))
+            .values(
+                counts=bindparam("new_counts", type_=counts.counts.type),
+                participant_count=bindparam("new_participant_count"),
+                updated_at=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        upsert_counts = pg_insert(AvailabilityCount)
+        self._upsert_counts = upsert_counts.on_conflict_do_update(
+            index_elements=[counts.table_id],
+            set_={
+                "slot_minutes": upsert_counts.excluded.slot_minutes,
+                "counts": upsert_counts.excluded.counts,
+                "participant_count": upsert_counts.excluded.participant_count,
+                "updated_at": func.now(),
+            },
+        )
+
+    def _is_current(self, row: Any) -> bool:
+        return row is not None and row.slot_minutes == self.slot_minutes
+
+    def _user_slots(
+        self,
+        db: Session,
+        table_id: str,
+        user_id: Optional[str] = None,
+        days: Optional[Set[int]] = None,
+    ) -> Dict[str, int]:
+        minute_bits = scheduleblock.get_minute_bits(
+            db, table_id=table_id, user_id=user_id, days=days
+        )
+        return {
+            user_id: slot_bits(bits, self.slot_minutes)
+            for user_id, bits in minute_bits.items()
+        }
+
+    def _to_dict(self, table_id: str, row: Any) -> Dict[str, Any]:
+        slots_per_day = MINUTES_PER_DAY // self.slot_minutes
+        counts = iter(row.counts)
+        return {
+            "table_id": table_id,
+            "slot_minutes": self.slot_minutes,
+            "participant_count": row.participant_count,
+            "days": [
+                {"day": day, "counts": list(islice(counts, slots_per_day))}
+                for day in range(DAYS_PER_WEEK)
+            ],
+        }
+
+    def _count(self, user_slots: Dict[str, int]) -> CountsRow:
+        return CountsRow(
+            self.slot_minutes,
+            slot_counts(user_slots.values(), self.count),
+            len(user_slots),
+        )
+
+    def rebuild(self, db: Session, *, table_id: str) -> Any:
+        """
+        원본 스케쥴 블록과 비트맵에서 집계를 다시 만듦. 커밋은 호출한 쪽에서 함
+        타임테이블 행을 잠가서 같은 타임테이블의 쓰기, 다른 rebuild 와 겹치지 않게 함
+        """
+        db.execute(self._lock_timetable, {"table_id": table_id})
+        user_slots = self._user_slots(db, table_id=table_id)
+        counted = self._count(user_slots)
+        db.execute(self._delete_participants, {"table_id": table_id})
+        if user_slots:
+            db.execute(
+                self._insert_participants,
+                [
+                    {
+                        "table_id": table_id,
+                        "user_id": user_id,
+                        "slots": slots_to_bytes(bits, self.count),
+                    }
+                    for user_id, bits in user_slots.items()
+                ],
+            )
+        db.execute(self._upsert_counts, {"table_id": table_id, **counted._asdict()})
+        return counted
+
+    def refresh(
+        self,
+        db: Session,
+        *,
+        table_id: str,
+        user_id: str,
+        days: Optional[Set[int]] = None,
+    ) -> None:
+        """
+        한 참여자의 칸을 다시 계산해서 달라진 칸의 수만 고침. 커밋은 호출한 쪽에서 함
+        days 를 주면 그 요일만 원본 행에서 다시 읽고, 다른 요일은 저장된 칸을 그대로 씀
+        """
+        params = {"table_id": table_id, "user_id": user_id}
+        row: Any = db.execute(self._lock_counts, params).first()
+        if not self._is_current(row):
+            self.rebuild(db, table_id=table_id)
+            return
+
+        stored = db.execute(self._participant_slots, params).scalar()
+        old_bits = 0 if stored is None else slots_from_bytes(stored)
+        new = self._user_slots(db, table_id=table_id, user_id=user_id, days=days).get(
+            user_id
+        )
+        if days is not None:
+            kept = old_bits & ~day_slot_bits(days, self.slot_minutes)
+            if new is not None or kept:
+                new = kept | (new or 0)
+            elif stored is not None:
+                # 칸 하나를 다 채우지 못하는 짧은 블록만 다른 요일에 남았을 수 있으므로
+                # 참여자로 남는지는 한 주 전체를 보고 정함
+                new = self._user_slots(db, table_id=table_id, user_id=user_id).get(
+                    user_id
+                )
+        new_bits = 0 if new is None else new
+        if (stored is None) == (new is None) and old_bits == new_bits:
+            return
+
+        counts = list(row.counts)
+        for slot in iter_slots(old_bits & ~new_bits, self.count):
+            counts[slot] -= 1
+        for slot in iter_slots(new_bits & ~old_bits, self.count):
+            counts[slot] += 1
+        participant_count = row.participant_count
+        if new is None:
+            db.execute(self._delete_participant, params)
+            participant_count -= 1
+        else:
+            db.execute(
+                self._upsert_participant,
+                {**params, "slots": slots_to_bytes(new_bits, self.count)},
+            )
+            if stored is None:
+                participant_count += 1
+        db.execute(
+            self._update_counts,
+            {
+                "counts_table_id": table_id,
+                "new_counts": counts,
+                "new_participant_count": participant_count,
+            },
+        )
+
+    def get(
+        self,
+        db: Session,
+        *,
+        table_id: str,
+        on_stale: Optional[Callable[[str], Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        저장된 집계. 집계가 낡았으면 원본 행에서 센 값을 반환하고 잠그거나 쓰지 않음
+        다시 만드는 것은 다음 쓰기나, 넘겨받은 on_stale(table_id) 가 응답 뒤에 함
+        """
+        row: Any = db.execute(self._counts_by_table, {"table_id": table_id}).first()
+        if not self._is_current(row):
+            row = self._count(self._user_slots(db, table_id=table_id))
+            if on_stale is not None:
+                on_stale(table_id)
+        return self._to_dict(table_id, row)
+
+    def check(
+        self, db: Session, *, table_id: str, repair: bool = False
+    ) -> Dict[str, Any]:
+        """
+        원본 행에서 다시 센 값과 저장된 집계를 비교한 결과
+        집계 행이 아직 없거나 칸 크기가 바뀐 경우(stale)는 다음 조회에서 다시 세므로 drift 로 보지 않음
+        repair 이면 drift 가 있을 때 집계를 다시 만들고 커밋함
+        """
+        params = {"table_id": table_id}
+        db.execute(self._lock_timetable, params)
+        row: Any = db.execute(self._counts_by_table, params).first()
+        user_slots = self._user_slots(db, table_id=table_id)
+        expected = slot_counts(user_slots.values(), self.count)
+        stored_slots = {
+            participant.user_id: slots_from_bytes(participant.slots)
+            for participant in db.execute(self._participants_by_table, params)
+        }
+
+        stale = not self._is_current(row)
+        drifted_slots: List[int] = []
+        drifted_participants: List[str] = []
+        if not stale:
+            drifted_slots = [
+                slot for slot in range(self.count) if row.counts[slot] != expected[slot]
+            ]
+            drifted_participants = sorted(
+                user_id
+                for user_id in set(user_slots) | set(stored_slots)
+                if user_slots.get(user_id) != stored_slots.get(user_id)
+            )
+        stored_participant_count = None if row is None else row.participant_count
+        drift = not stale and bool(
+            drifted_slots
+            or drifted_participants
+            or stored_participant_count != len(user_slots)
+        )
+        if drift and repair:
+            self.rebuild(db, table_id=table_id)
+            db.commit()
+        else:
+            db.rollback()
+        return {
+            "table_id": table_id,
+            "slot_minutes": self.slot_minutes,
+            "stale": stale,
+            "drift": drift,
+            "repaired": drift and repair,
+            "drifted_slots": drifted_slots,
+            "drifted_participants": drifted_participants,
+            "stored_participant_count": stored_participant_count,
+            "expected_participant_count": len(user_slots),
+        }
+
+
+availability_count = CRUDAvailabilityCount(settings.AVAILABILITY_COUNT_SLOT_MINUTES)
+
+
+def refresh_availability_counts(session: Session) -> None:
+    """
+    스케쥴 블록이나 칸이 바뀐 참여자의 집계를 바뀐 요일만 같은 트랜잭션에서 고침
+    """
+    participants = touched_participants(session)
+    if not participants:
+        return
+    session.flush()
+    for table_id, user_id, days in participants:
+        availability_count.refresh(
+            session, table_id=table_id, user_id=user_id, days=days
+        )
+
+
+def listen_for_schedule_commits(*targets: Any) -> None:
+    """
+    targets(sessionmaker 나 Session 클래스)로 만든 세션이 커밋할 때 집계를 고치게 함
+    AsyncSession 은 sync_session_class 로 넘긴 동기 Session 클래스를 targets 에 넣어야 함
+    여기에 넣지 않은 세션으로 스케쥴 블록을 바꾸면 집계가 낡으므로 check_availability_counts 로 고쳐야 함
+    """
+    for target in targets:
+        if not event.contains(target, "before_commit", refresh_availability_counts):
+            event.listen(target, "before_commit", refresh_availability_counts)
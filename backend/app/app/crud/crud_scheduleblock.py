@@ -1,45 +1,269 @@
-from typing import List, Any
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
 from fastapi import HTTPException
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import (
+    SmallInteger,
+    String,
+    bindparam,
+    cast,
+    delete,
+    literal,
+    null,
+    select,
+    true,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, array, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Delete, Select, Update, func
 
+from app.core.availability import (
+    CELL_END_MINUTE,
+    CELL_ID_SEPARATOR,
+    CELL_START_MINUTE,
+    DAYS_PER_WEEK,
+    FULL_DAY,
+    HOURS_PER_DAY,
+    MINUTES_PER_DAY,
+    MINUTES_PER_HOUR,
+    best_windows,
+    block_interval,
+    block_minute_bits,
+    cell_id,
+    cells_minute_bits,
+    count_cells,
+    cut_interval,
+    empty_week,
+    full_week,
+    hour_bit,
+    hour_pieces,
+    interval_fields,
+    is_cell,
+    iter_hours,
+    minute_range_bits,
+    parse_cell_id,
+    parse_piece_id,
+    piece_id,
+    slot_bits,
+    slot_count,
+    slot_users,
+    window_participants,
+)
+from app.core.config import settings
+from app.core.deltas import record_delta, record_versions
 from app.core.security import create_uuid
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.crud.crud_timetable import bump_versions
+from app.models.availability import Availability
 from app.models.color import Color
 from app.models.scheduleblock import ScheduleBlock
+from app.models.timetable import TimeTable
 from app.models.user import User
 from app.schemas.scheduleblock import ScheduleBlockCreate, ScheduleBlockUpdate
 
+BLOCK_FIELDS = (
+    "table_id",
+    "start_time",
+    "start_minute",
+    "end_time",
+    "end_minute",
+    "day",
+    "label",
+)
 
-class CRUDScheduleblock(
-    CRUDBase[ScheduleBlock, ScheduleBlockCreate, ScheduleBlockUpdate]
-):
-    def create_with_user_id(
-        self, db: Session, *, obj_in: ScheduleBlockCreate, user_id: str
-    ) -> ScheduleBlock:
-        obj_in_data = jsonable_encoder(obj_in)
-        if obj_in.start_time not in range(0, 24) or obj_in.end_time not in range(0, 24):
-            raise HTTPException(400, detail="Time data must be in 0~23")
-        if obj_in.start_minute not in range(0, 60) or obj_in.end_minute not in range(
-            0, 60
-        ):
-            raise HTTPException(400, detail="Minute data must be in 0~59")
 
-        if obj_in.day not in range(0, 7):
-            raise HTTPException(
-                400, detail="Day data must be in 0~6, 0: Sunday, 6: Saturday"
-            )
+class ScheduleCell(NamedTuple):
+    """
+    비트맵에 저장된 한 시간 칸을 스케쥴 블록 형태로 펼친 것
+    """
 
-        db_obj = ScheduleBlock(id=create_uuid(), user_id=user_id, **obj_in_data)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+    id: str
+    start_time: int
+    start_minute: int
+    end_time: int
+    end_minute: int
+    day: int
+    label: Optional[str]
+    user_id: str
+    table_id: str
+    color: Optional[str]
+    nickname: Optional[str]
 
-    def get_all(self, db: Session, table_id: str) -> List[ScheduleBlock]:
-        db_obj = (
-            db.query(
+
+class BlockPiece(ScheduleCell):
+    """
+    여러 시간에 걸친 블록 행의 한 시간 부분. id 는 "<block_id>-<hour>"
+    """
+
+    __slots__ = ()
+
+
+class RowChanges(NamedTuple):
+    """
+    블록 행을 합치거나 자를 때 지울 행 id(-> 요일), 고칠 행과 새로 만들 행의 값
+    uc_time_table 에 걸리지 않도록 지우기, 고치기, 만들기 순서로 실행함
+    """
+
+    deleted: Dict[str, int]
+    updates: List[Dict[str, Any]]
+    inserts: List[Dict[str, Any]]
+
+
+def row_interval(row: Any) -> Tuple[int, int]:
+    return block_interval(
+        start_time=row.start_time,
+        start_minute=row.start_minute,
+        end_time=row.end_time,
+        end_minute=row.end_minute,
+    )
+
+
+def row_values(row: Any) -> Dict[str, Any]:
+    return {field: getattr(row, field) for field in BLOCK_FIELDS}
+
+
+class ScheduleKey(NamedTuple):
+    """
+    페이지를 나누는 정렬 키. 같은 유저/요일/시작 시간의 블록과 칸은 id 로 구분함
+    """
+
+    user_id: str
+    day: int
+    start_time: int
+    id: str
+
+
+# 모든 블록보다 앞에 오는 키. 첫 페이지는 이 키 다음부터 읽음
+FIRST_KEY = ScheduleKey(user_id="0" * 32, day=-1, start_time=-1, id="")
+
+
+def schedule_key(row: Any) -> ScheduleKey:
+    return ScheduleKey(row.user_id, row.day, row.start_time, row.id)
+
+
+def _hex_id(column: Any) -> Any:
+    # 블록 id 와 칸 id 를 한 컬럼으로 합치므로 HexUUID 가 아닌 문자열로 만듦
+    return func.replace(cast(column, String), "-", "")
+
+
+def validate_day(day: int) -> None:
+    if day not in range(0, DAYS_PER_WEEK):
+        raise HTTPException(
+            400, detail="Day data must be in 0~6, 0: Sunday, 6: Saturday"
+        )
+
+
+def validate_time(time: int) -> None:
+    if time not in range(0, 24):
+        raise HTTPException(400, detail="Time data must be in 0~23")
+
+
+def validate_block(obj_in_data: Dict[str, Any]) -> None:
+    validate_time(obj_in_data["start_time"])
+    validate_time(obj_in_data["end_time"])
+    if obj_in_data["start_minute"] not in range(0, 60) or obj_in_data[
+        "end_minute"
+    ] not in range(0, 60):
+        raise HTTPException(400, detail="Minute data must be in 0~59")
+    validate_day(obj_in_data["day"])
+
+
+class ScheduleblockStatements:
+    """
+    동기/비동기 CRUD 가 같이 쓰는 SQL 문 생성과 결과 변환
+    세션에 묶이지 않은 select()/insert()/delete() 문만 만들고 실행은 각 클래스가 함
+    """
+
+    model: Type[ScheduleBlock]
+
+    def __init__(self, model: Type[ScheduleBlock]) -> None:
+        # CRUDBase/AsyncCRUDBase 의 __init__ 도 model 만 저장하므로 여기서 저장하고 따로 부르지 않음
+        self.model = model
+        # 요청마다 다시 실행하는 조회는 값만 bindparam 으로 받는 문을 한 번만 만들어 둠
+        # 문을 새로 만들면 SQLAlchemy 가 호출마다 문을 짓고 캐시 키를 다시 계산하지만,
+        # 같은 문 객체는 캐시 키가 저장되어 있어 컴파일 캐시를 바로 찾음
+        self._blocks_by_table = self._select_blocks().where(
+            self.model.table_id == bindparam("table_id")
+        )
+        self._blocks_by_user = self._select_blocks().where(
+            self.model.table_id == bindparam("table_id"),
+            self.model.user_id == bindparam("user_id"),
+        )
+        self._blocks_by_ids = self._select_blocks().where(
+            self.model.id.in_(bindparam("ids", expanding=True))
+        )
+        self._availabilities_by_table = self._select_availabilities().where(
+            Availability.table_id == bindparam("table_id")
+        )
+        self._availabilities_by_user = self._select_availabilities().where(
+            Availability.table_id == bindparam("table_id"),
+            Availability.user_id == bindparam("user_id"),
+        )
+        self._availability_by_id = self._select_availabilities().where(
+            Availability.id == bindparam("availability_id")
+        )
+        self._upsert_cells = self._select_upserted_cells()
+        # 한 요일의 [window_start, window_end) 분 구간과 겹치는 블록 행과, 그 구간의 시간 칸이
+        # 하나라도 켜진 참여자의 그 요일 칸 마스크
+        self._blocks_in_window = select(
+            self.model.user_id,
+            self.model.start_time,
+            self.model.start_minute,
+            self.model.end_time,
+            self.model.end_minute,
+        ).where(
+            self.model.table_id == bindparam("table_id"),
+            self.model.week_minutes.overlaps(
+                func.int4range(bindparam("window_start"), bindparam("window_end"))
+            ),
+        )
+        day_hours = Availability.hours[bindparam("day")]
+        self._cells_in_window = select(
+            Availability.user_id, day_hours.label("mask")
+        ).where(
+            Availability.table_id == bindparam("table_id"),
+            day_hours.op("&")(bindparam("window_hours")) != 0,
+        )
+        # 켜면 블록 행을 쓸 때 같은 유저/요일/라벨의 겹치거나 맞닿은 행을 하나로 합침
+        self.compaction = settings.SCHEDULEBLOCK_COMPACTION
+        self._rows_for_update = (
+            select(self.model.id, *[getattr(self.model, f) for f in BLOCK_FIELDS])
+            .where(
+                self.model.table_id == bindparam("table_id"),
+                self.model.user_id == bindparam("user_id"),
+            )
+            .with_for_update()
+        )
+        self._delete_by_ids = (
+            delete(self.model)
+            .where(self.model.id.in_(bindparam("ids", expanding=True)))
+            .execution_options(synchronize_session=False)
+        )
+        self._ordered_by_table = self._select_ordered()
+        self._ordered_by_user = self._select_ordered(
+            self.model.user_id == bindparam("user_id"),
+            Availability.user_id == bindparam("user_id"),
+        )
+
+    def _select_blocks(self) -> Select:
+        return (
+            select(
                 self.model.id,
                 self.model.start_time,
                 self.model.start_minute,
@@ -54,59 +278,51 @@ class CRUDScheduleblock(
             )
             .outerjoin(self.model.user)
             .outerjoin(User.color)
-            .filter(self.model.table_id == table_id)
-            .all()
         )
-        return db_obj
 
-    def get_all_by_user_id(
-        self, db: Session, table_id: str, user_id: str
-    ) -> List[ScheduleBlock]:
-        db_obj = (
-            db.query(
-                self.model.id,
-                self.model.start_time,
-                self.model.start_minute,
-                self.model.end_time,
-                self.model.end_minute,
-                self.model.day,
-                self.model.label,
-                self.model.user_id,
-                self.model.table_id,
+    def _select_availabilities(self) -> Select:
+        return (
+            select(
+                Availability.id,
+                Availability.hours,
+                Availability.user_id,
+                Availability.table_id,
                 Color.hex.label("color"),
                 User.nickname,
             )
-            .outerjoin(self.model.user)
+            .outerjoin(Availability.user)
             .outerjoin(User.color)
-            .filter(self.model.table_id == table_id, User.id == user_id)
-            .all()
         )
-        return db_obj
 
-    def create_all_by_user_id(
-        self, db: Session, table_id: str, user_id: str
-    ) -> List[ScheduleBlock]:
-        db_objs = [
-            ScheduleBlock(
-                id=create_uuid(),
-                table_id=table_id,
-                user_id=user_id,
-                start_time=start_time,
-                start_minute=0,
-                end_time=start_time,
-                end_minute=59,
-                day=day,
-            )
-            for day, start_time in [
-                [day, start_time] for day in range(7) for start_time in range(24)
-            ]
+    def _select_ordered(self, *criteria: Any) -> Select:
+        """
+        블록 행과 비트맵의 칸을 DB 에서 한 결과로 펼쳐 ScheduleKey 순서로 반환하는 문
+        ScheduleKey 로 이어서 읽으므로(keyset) 앞 페이지를 건너뛰느라 다시 읽지 않고,
+        LIMIT 없이 서버 측 커서로 읽으면 메모리에 결과 전체를 올리지 않고 스트리밍할 수 있음
+        criteria 는 블록, 칸 순서로 받은 유저 조건. 값은 _ordered_params 로 넘김
+
+        키 조건과 LIMIT 은 합치기 전에 두 쪽에 각각 걸어서, 블록은
+        ix_scheduleblock_table_id_user_id_day_start_time 을 키 위치부터 읽고
+        칸은 키의 유저부터 비트맵 행을 읽어 펼치므로 앞 페이지의 행을 읽거나 정렬하지 않음
+        """
+        after: List[Any] = [
+            bindparam(f"after_{field}", type_=type_)
+            for field, type_ in zip(
+                ScheduleKey._fields,
+                (self.model.user_id.type, SmallInteger(), SmallInteger(), String()),
+            )
         ]
+        limit: Any = bindparam("limit")
 
-        db.add_all(db_objs)
-        db.commit()
-        db_obj = (
-            db.query(
-                self.model.id,
+        block_id = _hex_id(self.model.id)
+        block_key: List[Any] = [
+            self.model.user_id,
+            self.model.day,
+            self.model.start_time,
+        ]
+        blocks = (
+            select(
+                block_id.label("id"),
                 self.model.start_time,
                 self.model.start_minute,
                 self.model.end_time,
@@ -120,135 +336,1367 @@ class CRUDScheduleblock(
             )
             .outerjoin(self.model.user)
             .outerjoin(User.color)
-            .filter(self.model.table_id == table_id, User.id == user_id)
-            .all()
+            .where(
+                self.model.table_id == bindparam("table_id"),
+                *criteria[:1],
+                # 앞의 조건은 인덱스 범위, 뒤의 조건은 같은 시작 시간의 행을 id 로 거름
+                tuple_(*block_key) >= tuple_(*after[:3]),
+                tuple_(*block_key, block_id) > tuple_(*after),
+            )
+            .order_by(*block_key, block_id)
+            .limit(limit)
+            .subquery("blocks")
         )
-        return db_obj
-
-    def delete_all_by_user_id(self, db: Session, table_id: str, user_id: str) -> Any:
-        db_obj = (
-            db.query(self.model)
-            .filter(self.model.table_id == table_id, self.model.user_id == user_id)
-            .delete()
+        days = (
+            func.generate_series(0, DAYS_PER_WEEK - 1)
+            .table_valued("value")
+            .render_derived(name="days")
         )
+        hours = (
+            func.generate_series(0, HOURS_PER_DAY - 1)
+            .table_valued("value")
+            .render_derived(name="hours")
+        )
+        day, hour = days.c.value, hours.c.value
+        cell_id = (
+            _hex_id(Availability.id)
+            + CELL_ID_SEPARATOR
+            + cast(day, String)
+            + CELL_ID_SEPARATOR
+            + cast(hour, String)
+        )
+        cell_key = [Availability.user_id, day, hour]
+        cells = (
+            select(
+                cell_id.label("id"),
+                hour.label("start_time"),
+                literal(CELL_START_MINUTE).label("start_minute"),
+                hour.label("end_time"),
+                literal(CELL_END_MINUTE).label("end_minute"),
+                day.label("day"),
+                null().label("label"),
+                Availability.user_id,
+                Availability.table_id,
+                Color.hex.label("color"),
+                User.nickname,
+            )
+            .select_from(Availability)
+            .join(days, true())
+            .join(hours, true())
+            .outerjoin(Availability.user)
+            .outerjoin(User.color)
+            .where(
+                Availability.table_id == bindparam("table_id"),
+                *criteria[1:],
+                # 펼치기 전에 uc_availability 로 키의 유저부터 읽음
+                Availability.user_id >= after[0],
+                Availability.hours[day].op("&")(literal(1).op("<<")(hour)) != 0,
+                tuple_(*cell_key, cell_id) > tuple_(*after),
+            )
+            .order_by(*cell_key, cell_id)
+            .limit(limit)
+            .subquery("cells")
+        )
+        ordered = union_all(select(blocks), select(cells)).subquery("scheduleblocks")
+        key = [getattr(ordered.c, field) for field in ScheduleKey._fields]
+        return select(ordered).order_by(*key).limit(limit)
 
-        db.commit()
+    def _ordered_params(
+        self,
+        *,
+        table_id: str,
+        user_id: Optional[str],
+        after: Optional[ScheduleKey],
+        limit: Optional[int],
+    ) -> Dict[str, Any]:
+        # limit 이 None 이면 LIMIT NULL 로 끝까지 읽음
+        params: Dict[str, Any] = {
+            "table_id": table_id,
+            "user_id": user_id,
+            "limit": limit,
+        }
+        for field, value in zip(ScheduleKey._fields, after or FIRST_KEY):
+            params[f"after_{field}"] = value
+        return params
 
-        return db_obj
+    def _ordered(self, user_id: Optional[str]) -> Select:
+        return self._ordered_by_table if user_id is None else self._ordered_by_user
 
-    def create_day_by_user_id(
-        self, db: Session, table_id: str, user_id: str, day: int
-    ) -> List[ScheduleBlock]:
-        db_objs = [
-            ScheduleBlock(
-                id=create_uuid(),
-                table_id=table_id,
-                user_id=user_id,
-                start_time=start_time,
-                start_minute=0,
-                end_time=start_time,
-                end_minute=59,
-                day=day,
+    def _page(
+        self, rows: List[Any], limit: int
+    ) -> Tuple[List[Any], Optional[ScheduleKey]]:
+        # limit + 1 개를 읽어서 다음 페이지가 있을 때만 다음 키를 돌려줌
+        if len(rows) <= limit:
+            return rows, None
+        return rows[:limit], schedule_key(rows[limit - 1])
+
+    def _plan_compaction(
+        self, rows: List[Any], days: Set[int]
+    ) -> Tuple[Dict[str, str], List[Dict[str, Any]]]:
+        """
+        days 의 행을 같은 요일/라벨끼리 모아 겹치거나 맞닿은 것을 가장 긴 구간 하나로 합치는 계획
+        (합쳐져서 지울 행 id -> 남길 행 id, 구간이 늘어난 남길 행의 값)
+        """
+        # uc_time_table 은 라벨을 보지 않으므로 다른 라벨의 행과 시간이 같아지면 합치지 않음
+        taken = {(row.day, row_interval(row)) for row in rows}
+        groups: Dict[Tuple[int, Optional[str]], List[Any]] = {}
+        for row in rows:
+            if row.day in days:
+                groups.setdefault((row.day, row.label), []).append(row)
+
+        merged_into: Dict[str, str] = {}
+        updates: List[Dict[str, Any]] = []
+        for (day, _), group in groups.items():
+            runs: List[Tuple[int, int, List[Any]]] = []
+            for row in sorted(group, key=row_interval):
+                start, end = row_interval(row)
+                if runs and start <= runs[-1][1]:
+                    run_start, run_end, run = runs[-1]
+                    runs[-1] = (run_start, max(run_end, end), run + [row])
+                else:
+                    runs.append((start, end, [row]))
+            for start, end, run in runs:
+                if len(run) == 1:
+                    continue
+                covering = [row for row in run if row_interval(row) == (start, end)]
+                if covering:
+                    kept = covering[0]
+                elif (day, (start, end)) in taken:
+                    continue
+                else:
+                    kept = run[0]
+                    updates.append(
+                        {
+                            "id": kept.id,
+                            **row_values(kept),
+                            **interval_fields(start, end),
+                        }
+                    )
+                for row in run:
+                    if row is not kept:
+                        merged_into[row.id] = kept.id
+        return merged_into, updates
+
+    def _plan_cut(
+        self,
+        rows: List[Any],
+        *,
+        start: int,
+        end: int,
+        day: Optional[int] = None,
+        block_id: Optional[str] = None,
+    ) -> RowChanges:
+        """
+        행마다 하루의 [start, end) 분을 잘라 냄. 다 잘리면 지우고, 가운데가 잘리면 두 행으로 나눔
+        day, block_id 를 주면 그 요일, 그 행만 자름
+        """
+        changes = RowChanges({}, [], [])
+        for row in rows:
+            if (day is not None and row.day != day) or (
+                block_id is not None and row.id != block_id
+            ):
+                continue
+            row_start, row_end = row_interval(row)
+            if row_end <= start or end <= row_start:
+                continue
+            pieces = cut_interval(row_start, row_end, start, end)
+            if not pieces:
+                changes.deleted[row.id] = row.day
+                continue
+            values = row_values(row)
+            changes.updates.append(
+                {"id": row.id, **values, **interval_fields(*pieces[0])}
             )
-            for start_time in range(24)
+            for piece in pieces[1:]:
+                changes.inserts.append(
+                    {"id": create_uuid(), **values, **interval_fields(*piece)}
+                )
+        return changes
+
+    def _record_changes(
+        self, db: Any, *, table_id: str, user_id: str, changes: RowChanges
+    ) -> None:
+        delta = record_delta(db, table_id=table_id, user_id=user_id)
+        for id, day in changes.deleted.items():
+            delta.remove_block(id, day)
+        for values in changes.updates:
+            delta.remove_block(values["id"], values["day"])
+            delta.add_block(values)
+        for values in changes.inserts:
+            delta.add_block(values)
+
+    def _hour_cut(self, hour: int) -> Optional[Tuple[int, int]]:
+        # 합친 행은 여러 시간에 걸치므로 시간 칸을 지울 때 그 시간만 잘라 내야 함
+        if not self.compaction:
+            return None
+        return hour * MINUTES_PER_HOUR, (hour + 1) * MINUTES_PER_HOUR
+
+    def _bulk_update(self, updates: List[Dict[str, Any]]) -> Update:
+        """
+        여러 행을 UPDATE ... FROM (SELECT unnest(...)) 한 문장으로 수정
+        asyncpg 는 배열 파라미터의 타입을 추측하지 않으므로 배열 타입으로 명시해서 캐스트함
+        """
+        columns = [
+            func.unnest(
+                cast(
+                    bindparam(
+                        f"{field}_values",
+                        [update_data[field] for update_data in updates],
+                        type_=ARRAY(self.model.__table__.c[field].type),
+                    ),
+                    ARRAY(self.model.__table__.c[field].type),
+                )
+            ).label(field)
+            for field in ("id",) + BLOCK_FIELDS
         ]
+        values = select(columns).alias("values")
+        return (
+            update(self.model)
+            .where(self.model.id == values.c.id)
+            .values({field: values.c[field] for field in BLOCK_FIELDS})
+            .execution_options(synchronize_session=False)
+        )
 
-        db.add_all(db_objs)
-        db.commit()
-        db_obj = (
-            db.query(
-                self.model.id,
-                self.model.start_time,
-                self.model.start_minute,
-                self.model.end_time,
-                self.model.end_minute,
-                self.model.day,
-                self.model.label,
-                self.model.user_id,
-                self.model.table_id,
+    def _lock_availability(self, *, table_id: str, user_id: str) -> Select:
+        return (
+            select(Availability)
+            .where(Availability.table_id == table_id, Availability.user_id == user_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+
+    def _select_upserted_cells(self) -> Select:
+        """
+        비트맵 행을 만들거나 칸을 켜는 upsert 한 문장으로 처리하고,
+        같은 왕복 안에서 유저 닉네임과 색상까지 붙여서 반환하는 문
+        값은 _upsert_params 로 넘김
+        """
+        columns = Availability.__table__.c
+        stmt = insert(Availability).values(
+            id=bindparam("new_id", type_=columns.id.type),
+            table_id=bindparam("new_table_id", type_=columns.table_id.type),
+            user_id=bindparam("new_user_id", type_=columns.user_id.type),
+            hours=bindparam("new_hours", type_=columns.hours.type),
+        )
+        upserted = (
+            stmt.on_conflict_do_update(
+                constraint="uc_availability",
+                set_={
+                    "hours": array(
+                        [
+                            Availability.hours[day].op("|")(stmt.excluded.hours[day])
+                            for day in range(DAYS_PER_WEEK)
+                        ]
+                    ),
+                    "updated_at": func.now(),
+                },
+            )
+            .returning(
+                Availability.id,
+                Availability.hours,
+                Availability.user_id,
+                Availability.table_id,
+            )
+            .cte("upserted")
+        )
+        return (
+            select(
+                upserted.c.id,
+                upserted.c.hours,
+                upserted.c.user_id,
+                upserted.c.table_id,
                 Color.hex.label("color"),
                 User.nickname,
             )
-            .outerjoin(self.model.user)
-            .outerjoin(User.color)
-            .filter(self.model.table_id == table_id, User.id == user_id)
-            .all()
+            .select_from(upserted)
+            .outerjoin(User, User.id == upserted.c.user_id)
+            .outerjoin(Color, Color.id == User.color_id)
         )
-        return db_obj
 
-    def delete_day_by_user_id(
-        self, db: Session, table_id: str, user_id: str, day: int
-    ) -> Any:
-        db_obj = (
-            db.query(self.model)
-            .filter(
+    def _upsert_params(
+        self, *, table_id: str, user_id: str, masks: List[int]
+    ) -> Dict[str, Any]:
+        return {
+            "new_id": create_uuid(),
+            "new_table_id": table_id,
+            "new_user_id": user_id,
+            "new_hours": masks,
+        }
+
+    def _delete_blocks(
+        self, *, table_id: str, user_id: str, criteria: List[Any]
+    ) -> Delete:
+        return (
+            delete(self.model)
+            .where(
                 self.model.table_id == table_id,
                 self.model.user_id == user_id,
-                self.model.day == day,
+                *criteria,
             )
-            .delete()
+            .returning(self.model.id, self.model.day)
+            .execution_options(synchronize_session=False)
         )
 
-        db.commit()
+    def _bump_versions(self, table_ids: Iterable[str]) -> Update:
+        # 여러 타임테이블을 잠글 때 교착을 피하도록 항상 id 순서로 잠금
+        return bump_versions(TimeTable.id.in_(sorted(set(table_ids)))).returning(
+            TimeTable.id, TimeTable.version
+        )
+
+    def _record_deleted(
+        self, db: Any, *, table_id: str, user_id: str, rows: List[Any]
+    ) -> None:
+        # rows 는 _delete_blocks 가 반환한 (id, day)
+        delta = record_delta(db, table_id=table_id, user_id=user_id)
+        for row in rows:
+            delta.remove_block(row.id, row.day)
+
+    def _cell(self, row: Any, day: int, hour: int) -> ScheduleCell:
+        return ScheduleCell(
+            id=cell_id(row.id, day, hour),
+            start_time=hour,
+            start_minute=CELL_START_MINUTE,
+            end_time=hour,
+            end_minute=CELL_END_MINUTE,
+            day=day,
+            label=None,
+            user_id=row.user_id,
+            table_id=row.table_id,
+            color=row.color,
+            nickname=row.nickname,
+        )
+
+    def _expand_cells(self, rows: List[Any]) -> List[ScheduleCell]:
+        return [
+            self._cell(row, day, hour)
+            for row in rows
+            for day, mask in enumerate(row.hours)
+            for hour in iter_hours(mask)
+        ]
+
+    def _piece(self, row: Any, hour: int, start: int, end: int) -> BlockPiece:
+        return BlockPiece(
+            id=piece_id(row.id, hour),
+            day=row.day,
+            label=row.label,
+            user_id=row.user_id,
+            table_id=row.table_id,
+            color=row.color,
+            nickname=row.nickname,
+            **interval_fields(start, end),
+        )
+
+    def expand_blocks(self, rows: Iterable[Any]) -> List[Any]:
+        """
+        여러 시간에 걸친 블록 행을 정시 경계에서 나눈 시간 칸 단위 조각으로 펼침
+        조각 id 로 지우거나 고치면 원래 행에서 그 시간만 잘라 냄
+        """
+        expanded: List[Any] = []
+        for row in rows:
+            if isinstance(row, ScheduleCell) or parse_cell_id(row.id) is not None:
+                expanded.append(row)
+                continue
+            pieces = list(hour_pieces(*row_interval(row)))
+            if len(pieces) == 1:
+                expanded.append(row)
+            else:
+                expanded.extend(self._piece(row, *piece) for piece in pieces)
+        return expanded
+
+
+class CRUDScheduleblock(
+    ScheduleblockStatements,
+    CRUDBase[ScheduleBlock, ScheduleBlockCreate, ScheduleBlockUpdate],
+):
+    # mypy 는 다중 상속에서 CRUDBase 의 Type[ModelType] 을 ScheduleBlock 으로 바꿔 비교하지 못함
+    model: Type[ScheduleBlock]
+
+    def _fill_cells(
+        self, db: Session, *, table_id: str, user_id: str, masks: List[int]
+    ) -> Any:
+        row = db.execute(
+            self._upsert_cells,
+            self._upsert_params(table_id=table_id, user_id=user_id, masks=masks),
+        ).one()
+        record_delta(db, table_id=table_id, user_id=user_id).add_hours(row.id, masks)
+        return row
+
+    def _clear_cells(
+        self, db: Session, *, table_id: str, user_id: str, masks: List[int]
+    ) -> int:
+        availability = (
+            db.execute(self._lock_availability(table_id=table_id, user_id=user_id))
+            .scalars()
+            .first()
+        )
+        if availability is None:
+            return 0
+        cleared = [old & mask for old, mask in zip(availability.hours, masks)]
+        availability.hours = [
+            old & ~mask for old, mask in zip(availability.hours, masks)
+        ]
+        db.flush()
+        record_delta(db, table_id=table_id, user_id=user_id).remove_hours(
+            availability.id, cleared
+        )
+        return count_cells(cleared)
+
+    def _delete_rows(
+        self, db: Session, *, table_id: str, user_id: str, criteria: List[Any]
+    ) -> int:
+        rows = db.execute(
+            self._delete_blocks(table_id=table_id, user_id=user_id, criteria=criteria)
+        ).all()
+        self._record_deleted(db, table_id=table_id, user_id=user_id, rows=rows)
+        return len(rows)
+
+    def _touch(self, db: Session, *table_ids: str) -> None:
+        record_versions(db, db.execute(self._bump_versions(table_ids)).all())
 
+    def _add_block(
+        self, db: Session, *, user_id: str, obj_in_data: Dict[str, Any]
+    ) -> Union[ScheduleBlock, ScheduleCell]:
+        """
+        한 시간 칸은 비트맵에 켜고, 그 외의 블록은 행으로 추가함
+        커밋은 호출한 쪽에서 함
+        """
+        if is_cell(
+            start_time=obj_in_data["start_time"],
+            start_minute=obj_in_data["start_minute"],
+            end_time=obj_in_data["end_time"],
+            end_minute=obj_in_data["end_minute"],
+            label=obj_in_data.get("label"),
+        ):
+            masks = empty_week()
+            masks[obj_in_data["day"]] = hour_bit(obj_in_data["start_time"])
+            row = self._fill_cells(
+                db, table_id=obj_in_data["table_id"], user_id=user_id, masks=masks
+            )
+            return self._cell(row, obj_in_data["day"], obj_in_data["start_time"])
+
+        db_obj = ScheduleBlock(id=create_uuid(), user_id=user_id, **obj_in_data)
+        db.add(db_obj)
+        record_delta(db, table_id=db_obj.table_id, user_id=user_id).add_block(db_obj)
         return db_obj
 
-    def create_time_by_user_id(
-        self, db: Session, table_id: str, user_id: str, start_time: int
-    ) -> List[ScheduleBlock]:
-        db_objs = [
-            ScheduleBlock(
-                id=create_uuid(),
-                table_id=table_id,
-                user_id=user_id,
-                start_time=start_time,
-                start_minute=0,
-                end_time=start_time,
-                end_minute=59,
-                day=day,
+    def _finish_add(
+        self, db: Session, added: Union[ScheduleBlock, ScheduleCell], *table_ids: str
+    ) -> Any:
+        kept_id = None
+        if self.compaction and isinstance(added, ScheduleBlock):
+            db.flush()
+            kept_id = self._compact(
+                db, table_id=added.table_id, user_id=added.user_id, days={added.day}
+            ).get(added.id)
+        self._touch(db, *table_ids)
+        db.commit()
+        if kept_id is not None:
+            # 새 블록이 이미 있던 행에 합쳐졌으면 그 행을 반환
+            return super().get(db, id=kept_id)
+        if isinstance(added, ScheduleBlock):
+            db.refresh(added)
+        return added
+
+    def create_with_user_id(
+        self, db: Session, *, obj_in: ScheduleBlockCreate, user_id: str
+    ) -> Any:
+        obj_in_data = jsonable_encoder(obj_in)
+        validate_block(obj_in_data)
+
+        added = self._add_block(db, user_id=user_id, obj_in_data=obj_in_data)
+        return self._finish_add(db, added, obj_in_data["table_id"])
+
+    def get(self, db: Session, id: Any) -> Optional[Any]:
+        parsed = parse_cell_id(id)
+        if parsed is None:
+            piece = parse_piece_id(id)
+            if piece is None:
+                return super().get(db, id=id)
+            block_id, hour = piece
+            row = db.execute(self._blocks_by_ids, {"ids": [block_id]}).first()
+            if row is None:
+                return None
+            pieces = {piece[0]: piece for piece in hour_pieces(*row_interval(row))}
+            if hour not in pieces:
+                return None
+            return self._piece(row, *pieces[hour])
+
+        availability_id, day, hour = parsed
+        row = db.execute(
+            self._availability_by_id, {"availability_id": availability_id}
+        ).first()
+        if row is None or not row.hours[day] & hour_bit(hour):
+            return None
+        return self._cell(row, day, hour)
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: Any,
+        obj_in: Union[ScheduleBlockUpdate, Dict[str, Any]],
+    ) -> Any:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        obj_in_data = {
+            field: update_data.get(field, getattr(db_obj, field))
+            for field in BLOCK_FIELDS
+        }
+
+        # 합치기를 켜면 고친 행을 다른 행과 합쳐야 하므로 지우고 새로 추가함
+        if (
+            isinstance(db_obj, ScheduleBlock)
+            and not self.compaction
+            and not is_cell(
+                start_time=obj_in_data["start_time"],
+                start_minute=obj_in_data["start_minute"],
+                end_time=obj_in_data["end_time"],
+                end_minute=obj_in_data["end_minute"],
+                label=obj_in_data["label"],
+            )
+        ):
+            record_delta(
+                db, table_id=db_obj.table_id, user_id=db_obj.user_id
+            ).remove_block(db_obj.id, db_obj.day)
+            record_delta(
+                db, table_id=obj_in_data["table_id"], user_id=db_obj.user_id
+            ).add_block({"id": db_obj.id, **obj_in_data})
+            self._touch(db, db_obj.table_id, obj_in_data["table_id"])
+            return super().update(db, db_obj=db_obj, obj_in=obj_in_data)
+
+        self._remove_block(db, db_obj=db_obj)
+        # 같은 시간의 새 행이 uc_time_table 에 걸리지 않도록 지운 것을 먼저 반영
+        db.flush()
+        added = self._add_block(db, user_id=db_obj.user_id, obj_in_data=obj_in_data)
+        return self._finish_add(db, added, db_obj.table_id, obj_in_data["table_id"])
+
+    def _update_rows(self, db: Session, updates: List[Dict[str, Any]]) -> None:
+        db.execute(self._bulk_update(updates))
+
+    def _apply_changes(
+        self, db: Session, *, table_id: str, user_id: str, changes: RowChanges
+    ) -> None:
+        if changes.deleted:
+            db.execute(self._delete_by_ids, {"ids": list(changes.deleted)})
+        if changes.updates:
+            self._update_rows(db, changes.updates)
+        if changes.inserts:
+            db.execute(
+                insert(self.model),
+                [{**values, "user_id": user_id} for values in changes.inserts],
+            )
+        self._record_changes(db, table_id=table_id, user_id=user_id, changes=changes)
+
+    def _compact(
+        self, db: Session, *, table_id: str, user_id: str, days: Set[int]
+    ) -> Dict[str, str]:
+        """
+        days 의 블록 행을 합침. 합쳐져 지운 행 id -> 남긴 행 id 를 반환
+        """
+        rows = db.execute(
+            self._rows_for_update, {"table_id": table_id, "user_id": user_id}
+        ).all()
+        merged_into, updates = self._plan_compaction(rows, days)
+        row_days = {row.id: row.day for row in rows}
+        changes = RowChanges({id: row_days[id] for id in merged_into}, updates, [])
+        self._apply_changes(db, table_id=table_id, user_id=user_id, changes=changes)
+        return merged_into
+
+    def _cut_rows(
+        self,
+        db: Session,
+        *,
+        table_id: str,
+        user_id: str,
+        cut: Tuple[int, int],
+        day: Optional[int] = None,
+        block_id: Optional[str] = None,
+    ) -> int:
+        rows = db.execute(
+            self._rows_for_update, {"table_id": table_id, "user_id": user_id}
+        ).all()
+        changes = self._plan_cut(
+            rows, start=cut[0], end=cut[1], day=day, block_id=block_id
+        )
+        self._apply_changes(db, table_id=table_id, user_id=user_id, changes=changes)
+        return len(changes.deleted) + len(changes.updates)
+
+    def update_many_by_user_id(
+        self, db: Session, *, objs_in: List[ScheduleBlockUpdate], user_id: str
+    ) -> List[Any]:
+        """
+        여러 블록을 한 번에 수정. 전부 조회하고 권한을 확인한 뒤 한 트랜잭션으로 반영하며,
+        하나라도 없거나 다른 유저의 블록이면 아무것도 바꾸지 않음
+        """
+        ids = [obj_in.id for obj_in in objs_in]
+        if len(set(ids)) != len(ids):
+            raise HTTPException(400, detail="Duplicate scheduleblock id")
+        parsed_ids = {id: parse_cell_id(id) for id in ids}
+        # 조각 id 는 여러 블록을 한 번에 고칠 때 받지 않으므로 찾을 수 없는 블록으로 처리
+        row_ids = [
+            id
+            for id, parsed in parsed_ids.items()
+            if parsed is None and parse_piece_id(id) is None
+        ]
+        availability_ids = {
+            parsed[0] for parsed in parsed_ids.values() if parsed is not None
+        }
+
+        rows: Dict[str, ScheduleBlock] = {}
+        if row_ids:
+            rows = {
+                row.id: row
+                for row in db.query(self.model)
+                .filter(self.model.id.in_(row_ids))
+                .with_for_update()
+                .all()
+            }
+        availabilities: Dict[str, Availability] = {}
+        if availability_ids:
+            availabilities = {
+                availability.id: availability
+                for availability in db.query(Availability)
+                .filter(Availability.id.in_(availability_ids))
+                .with_for_update()
+                .populate_existing()
+                .all()
+            }
+
+        current: Dict[str, Dict[str, Any]] = {}
+        for id, parsed in parsed_ids.items():
+            if parsed is None:
+                row = rows.get(id)
+                if row is None:
+                    raise HTTPException(
+                        status_code=404, detail="Scheduleblock not found"
+                    )
+                current[id] = {field: getattr(row, field) for field in BLOCK_FIELDS}
+                owner_id = row.user_id
+            else:
+                availability_id, day, hour = parsed
+                availability = availabilities.get(availability_id)
+                if availability is None or not availability.hours[day] & hour_bit(hour):
+                    raise HTTPException(
+                        status_code=404, detail="Scheduleblock not found"
+                    )
+                current[id] = {
+                    "table_id": availability.table_id,
+                    "start_time": hour,
+                    "start_minute": CELL_START_MINUTE,
+                    "end_time": hour,
+                    "end_minute": CELL_END_MINUTE,
+                    "day": day,
+                    "label": None,
+                }
+                owner_id = availability.user_id
+            if owner_id != user_id:
+                raise HTTPException(
+                    status_code=403, detail="The user doesn't have enough privileges"
+                )
+
+        updates: List[Dict[str, Any]] = []
+        deleted_row_ids: List[str] = []
+        new_rows: List[ScheduleBlock] = []
+        clear_masks: Dict[str, List[int]] = {}
+        fill_masks: Dict[str, List[int]] = {}
+        results: List[Tuple[str, Any]] = []
+        table_ids: Set[str] = set()
+        row_days: Dict[str, Set[int]] = {}
+        for obj_in in objs_in:
+            obj_in_data = {
+                **current[obj_in.id],
+                **obj_in.dict(exclude_unset=True, exclude={"id"}),
+            }
+            validate_block(obj_in_data)
+            table_ids.update((current[obj_in.id]["table_id"], obj_in_data["table_id"]))
+            parsed = parsed_ids[obj_in.id]
+            if parsed is not None:
+                availability_id, day, hour = parsed
+                clear_masks.setdefault(availability_id, empty_week())[day] |= hour_bit(
+                    hour
+                )
+
+            if is_cell(
+                start_time=obj_in_data["start_time"],
+                start_minute=obj_in_data["start_minute"],
+                end_time=obj_in_data["end_time"],
+                end_minute=obj_in_data["end_minute"],
+                label=obj_in_data["label"],
+            ):
+                if parsed is None:
+                    deleted_row_ids.append(obj_in.id)
+                fill_masks.setdefault(obj_in_data["table_id"], empty_week())[
+                    obj_in_data["day"]
+                ] |= hour_bit(obj_in_data["start_time"])
+                results.append(
+                    (
+                        "cell",
+                        (
+                            obj_in_data["table_id"],
+                            obj_in_data["day"],
+                            obj_in_data["start_time"],
+                        ),
+                    )
+                )
+            elif parsed is None:
+                updates.append({"id": obj_in.id, **obj_in_data})
+                results.append(("row", obj_in.id))
+                row_days.setdefault(obj_in_data["table_id"], set()).add(
+                    obj_in_data["day"]
+                )
+                record_delta(
+                    db, table_id=current[obj_in.id]["table_id"], user_id=user_id
+                ).remove_block(obj_in.id, current[obj_in.id]["day"])
+                record_delta(
+                    db, table_id=obj_in_data["table_id"], user_id=user_id
+                ).add_block({"id": obj_in.id, **obj_in_data})
+            else:
+                db_obj = ScheduleBlock(id=create_uuid(), user_id=user_id, **obj_in_data)
+                new_rows.append(db_obj)
+                results.append(("row", db_obj.id))
+                row_days.setdefault(obj_in_data["table_id"], set()).add(
+                    obj_in_data["day"]
+                )
+                record_delta(
+                    db, table_id=obj_in_data["table_id"], user_id=user_id
+                ).add_block(db_obj)
+
+        for availability_id, masks in clear_masks.items():
+            availability = availabilities[availability_id]
+            availability.hours = [
+                old & ~mask for old, mask in zip(availability.hours, masks)
+            ]
+            record_delta(
+                db, table_id=availability.table_id, user_id=user_id
+            ).remove_hours(availability_id, masks)
+        db.flush()
+        if updates:
+            self._update_rows(db, updates)
+        if deleted_row_ids:
+            db.query(self.model).filter(self.model.id.in_(deleted_row_ids)).delete(
+                synchronize_session=False
             )
-            for day in range(7)
+            for id in deleted_row_ids:
+                record_delta(
+                    db, table_id=current[id]["table_id"], user_id=user_id
+                ).remove_block(id, current[id]["day"])
+        if new_rows:
+            db.add_all(new_rows)
+            db.flush()
+        filled = {
+            table_id: self._fill_cells(
+                db, table_id=table_id, user_id=user_id, masks=masks
+            )
+            for table_id, masks in fill_masks.items()
+        }
+        merged_into: Dict[str, str] = {}
+        if self.compaction:
+            for table_id, days in sorted(row_days.items()):
+                merged_into.update(
+                    self._compact(db, table_id=table_id, user_id=user_id, days=days)
+                )
+        result_row_ids = [
+            merged_into.get(key, key) for kind, key in results if kind == "row"
         ]
+        blocks: Dict[str, Any] = {}
+        if result_row_ids:
+            blocks = {
+                block.id: block
+                for block in db.execute(
+                    self._blocks_by_ids, {"ids": result_row_ids}
+                ).all()
+            }
+        self._touch(db, *table_ids)
+        db.commit()
+
+        return [
+            blocks[merged_into.get(key, key)]
+            if kind == "row"
+            else self._cell(filled[key[0]], key[1], key[2])
+            for kind, key in results
+        ]
+
+    def _remove_block(self, db: Session, *, db_obj: Any) -> None:
+        if isinstance(db_obj, BlockPiece):
+            # BlockPiece 의 id 는 _piece 가 만든 조각 id 라서 항상 나뉨
+            piece = parse_piece_id(db_obj.id)
+            assert piece is not None
+            self._cut_rows(
+                db,
+                table_id=db_obj.table_id,
+                user_id=db_obj.user_id,
+                cut=row_interval(db_obj),
+                day=db_obj.day,
+                block_id=piece[0],
+            )
+        elif isinstance(db_obj, ScheduleCell):
+            masks = empty_week()
+            masks[db_obj.day] = hour_bit(db_obj.start_time)
+            self._clear_cells(
+                db, table_id=db_obj.table_id, user_id=db_obj.user_id, masks=masks
+            )
+        else:
+            db.delete(db_obj)
+            record_delta(
+                db, table_id=db_obj.table_id, user_id=db_obj.user_id
+            ).remove_block(db_obj.id, db_obj.day)
 
-        db.add_all(db_objs)
+    def remove(self, db: Session, *, id: Any) -> Optional[Any]:
+        """
+        블록, 조각 또는 칸을 지우고 지운 것을 반환. 없는 id 면 아무것도 하지 않고 None
+        """
+        obj = self.get(db, id=id)
+        if obj is None:
+            return None
+        self._remove_block(db, db_obj=obj)
+        self._touch(db, obj.table_id)
         db.commit()
-        db_obj = (
+        return obj
+
+    def get_all(self, db: Session, table_id: str) -> List[Any]:
+        params = {"table_id": table_id}
+        blocks = db.execute(self._blocks_by_table, params).all()
+        availabilities = db.execute(self._availabilities_by_table, params).all()
+        return blocks + self._expand_cells(availabilities)
+
+    def _get_blocks_by_user_id(
+        self, db: Session, table_id: str, user_id: str
+    ) -> List[Any]:
+        return db.execute(
+            self._blocks_by_user, {"table_id": table_id, "user_id": user_id}
+        ).all()
+
+    def get_all_by_user_id(
+        self, db: Session, table_id: str, user_id: str
+    ) -> List[ScheduleBlock]:
+        blocks = self._get_blocks_by_user_id(db, table_id=table_id, user_id=user_id)
+        availabilities = db.execute(
+            self._availabilities_by_user, {"table_id": table_id, "user_id": user_id}
+        ).all()
+        return blocks + self._expand_cells(availabilities)
+
+    def get_page(
+        self,
+        db: Session,
+        table_id: str,
+        *,
+        user_id: Optional[str] = None,
+        after: Optional[ScheduleKey] = None,
+        limit: int,
+    ) -> Tuple[List[Any], Optional[ScheduleKey]]:
+        """
+        after 다음부터 limit 개의 블록과 칸, 그리고 다음 페이지가 있으면 그 앞의 키
+        user_id 를 주면 그 참여자의 것만 봄
+        """
+        rows = db.execute(
+            self._ordered(user_id),
+            self._ordered_params(
+                table_id=table_id, user_id=user_id, after=after, limit=limit + 1
+            ),
+        ).all()
+        return self._page(rows, limit)
+
+    def get_minute_bits(
+        self,
+        db: Session,
+        table_id: str,
+        user_id: Optional[str] = None,
+        days: Optional[Set[int]] = None,
+    ) -> Dict[str, int]:
+        """
+        참여자별 한 주 분 단위 비트셋. user_id 를 주면 그 참여자만 봄
+        days 를 주면 그 요일의 블록과 칸만 켜고, 나머지 요일은 비어 있음
+        """
+        minute_bits: Dict[str, int] = {}
+        block_criteria = [self.model.table_id == table_id]
+        availability_criteria = [Availability.table_id == table_id]
+        if user_id is not None:
+            block_criteria.append(self.model.user_id == user_id)
+            availability_criteria.append(Availability.user_id == user_id)
+        if days is not None:
+            block_criteria.append(self.model.day.in_(sorted(days)))
+        blocks = (
             db.query(
-                self.model.id,
+                self.model.user_id,
+                self.model.day,
                 self.model.start_time,
                 self.model.start_minute,
                 self.model.end_time,
                 self.model.end_minute,
-                self.model.day,
-                self.model.label,
-                self.model.user_id,
-                self.model.table_id,
-                Color.hex.label("color"),
-                User.nickname,
             )
-            .outerjoin(self.model.user)
-            .outerjoin(User.color)
-            .filter(self.model.table_id == table_id, User.id == user_id)
+            .filter(*block_criteria)
             .all()
         )
-        return db_obj
+        for block in blocks:
+            minute_bits[block.user_id] = minute_bits.get(
+                block.user_id, 0
+            ) | block_minute_bits(
+                day=block.day,
+                start_time=block.start_time,
+                start_minute=block.start_minute,
+                end_time=block.end_time,
+                end_minute=block.end_minute,
+            )
+        availabilities = (
+            db.query(Availability.user_id, Availability.hours)
+            .filter(*availability_criteria)
+            .all()
+        )
+        for availability in availabilities:
+            hours = availability.hours
+            if days is not None:
+                hours = [mask if day in days else 0 for day, mask in enumerate(hours)]
+            minute_bits[availability.user_id] = minute_bits.get(
+                availability.user_id, 0
+            ) | cells_minute_bits(hours)
+        return minute_bits
+
+    def get_heatmap(
+        self, db: Session, table_id: str, slot_minutes: int
+    ) -> Dict[str, Any]:
+        if slot_minutes <= 0 or MINUTES_PER_DAY % slot_minutes:
+            raise HTTPException(
+                400, detail="Slot minutes must divide a day (1440 minutes)"
+            )
+
+        minute_bits = self.get_minute_bits(db, table_id=table_id)
+        count = slot_count(slot_minutes)
+        users = slot_users(
+            {
+                user_id: slot_bits(bits, slot_minutes)
+                for user_id, bits in minute_bits.items()
+            },
+            count,
+        )
+        slots_per_day = MINUTES_PER_DAY // slot_minutes
+        days = [
+            {
+                "day": day,
+                "slots": [
+                    {
+                        "start_time": slot * slot_minutes // MINUTES_PER_HOUR,
+                        "start_minute": slot * slot_minutes % MINUTES_PER_HOUR,
+                        "count": len(users[day * slots_per_day + slot]),
+                        "user_ids": users[day * slots_per_day + slot],
+                    }
+                    for slot in range(slots_per_day)
+                ],
+            }
+            for day in range(DAYS_PER_WEEK)
+        ]
+        return {
+            "table_id": table_id,
+            "slot_minutes": slot_minutes,
+            "participant_count": len(minute_bits),
+            "days": days,
+        }
+
+    def get_best_windows(
+        self,
+        db: Session,
+        table_id: str,
+        *,
+        duration_minutes: int,
+        step_minutes: int,
+        required_user_ids: List[str],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        if duration_minutes <= 0 or duration_minutes > MINUTES_PER_DAY:
+            raise HTTPException(400, detail="Duration minutes must be in 1~1440")
+        if step_minutes <= 0 or MINUTES_PER_DAY % step_minutes:
+            raise HTTPException(
+                400, detail="Step minutes must divide a day (1440 minutes)"
+            )
+        if limit <= 0:
+            raise HTTPException(400, detail="Limit must be positive")
+
+        windows = best_windows(
+            self.get_minute_bits(db, table_id=table_id),
+            duration_minutes=duration_minutes,
+            step_minutes=step_minutes,
+            required_user_ids=required_user_ids,
+            limit=limit,
+        )
+        return [
+            {
+                "day": window.start // MINUTES_PER_DAY,
+                "start_time": window.start % MINUTES_PER_DAY // MINUTES_PER_HOUR,
+                "start_minute": window.start % MINUTES_PER_HOUR,
+                "end_time": (window.end - 1) % MINUTES_PER_DAY // MINUTES_PER_HOUR,
+                "end_minute": (window.end - 1) % MINUTES_PER_HOUR,
+                "duration_minutes": window.end - window.start,
+                "count": len(window.user_ids),
+                "user_ids": list(window.user_ids),
+            }
+            for window in windows
+        ]
+
+    def get_free_participants(
+        self,
+        db: Session,
+        table_id: str,
+        *,
+        day: int,
+        start_time: int,
+        start_minute: int,
+        end_time: int,
+        end_minute: int,
+    ) -> Dict[str, Any]:
+        """
+        한 요일의 구간을 모두 덮는 참여자와 일부만 겹치는 참여자
+        구간과 겹치는 블록 행만 GiST 인덱스(week_minutes)로 찾고, 칸은 그 요일의 마스크만 읽음
+        """
+        window = {
+            "day": day,
+            "start_time": start_time,
+            "start_minute": start_minute,
+            "end_time": end_time,
+            "end_minute": end_minute,
+        }
+        validate_block(window)
+        start, end = block_interval(
+            start_time=start_time,
+            start_minute=start_minute,
+            end_time=end_time,
+            end_minute=end_minute,
+        )
+
+        minute_bits: Dict[str, int] = {}
+        blocks = db.execute(
+            self._blocks_in_window,
+            {
+                "table_id": table_id,
+                "window_start": day * MINUTES_PER_DAY + start,
+                "window_end": day * MINUTES_PER_DAY + end,
+            },
+        )
+        for block in blocks:
+            minute_bits[block.user_id] = minute_bits.get(
+                block.user_id, 0
+            ) | minute_range_bits(
+                *block_interval(
+                    start_time=block.start_time,
+                    start_minute=block.start_minute,
+                    end_time=block.end_time,
+                    end_minute=block.end_minute,
+                )
+            )
+        cells = db.execute(
+            self._cells_in_window,
+            {
+                "table_id": table_id,
+                "day": day,
+                "window_hours": minute_range_bits(
+                    start // MINUTES_PER_HOUR, (end - 1) // MINUTES_PER_HOUR + 1
+                ),
+            },
+        )
+        for cell in cells:
+            minute_bits[cell.user_id] = minute_bits.get(
+                cell.user_id, 0
+            ) | cells_minute_bits([cell.mask])
+
+        covering, partial = window_participants(minute_bits, start, end)
+        return {
+            "table_id": table_id,
+            **window,
+            "duration_minutes": end - start,
+            "covering_user_ids": covering,
+            "partial_user_ids": partial,
+        }
+
+    def _replace_cells(
+        self,
+        db: Session,
+        *,
+        table_id: str,
+        user_id: str,
+        masks: List[int],
+        criteria: List[Any],
+        cut: Optional[Tuple[int, int]] = None,
+    ) -> List[Any]:
+        """
+        criteria 에 맞는 블록 행을 지우고 masks 칸을 모두 채우는 것을 한 트랜잭션으로 처리
+        커밋 전까지 다른 사람은 이전 상태만 보므로 빈 시간표가 중간에 보이지 않음
+        cut 을 주면 행을 지우는 대신 모든 요일의 행에서 그 분 범위를 잘라 냄
+        """
+        if cut is None:
+            self._delete_rows(db, table_id=table_id, user_id=user_id, criteria=criteria)
+        else:
+            self._cut_rows(db, table_id=table_id, user_id=user_id, cut=cut)
+        row = self._fill_cells(db, table_id=table_id, user_id=user_id, masks=masks)
+        blocks = self._get_blocks_by_user_id(db, table_id=table_id, user_id=user_id)
+        self._touch(db, table_id)
+        db.commit()
+        return blocks + self._expand_cells([row])
+
+    def replace_all_by_user_id(
+        self, db: Session, table_id: str, user_id: str
+    ) -> List[ScheduleBlock]:
+        return self._replace_cells(
+            db, table_id=table_id, user_id=user_id, masks=full_week(), criteria=[]
+        )
+
+    def replace_day_by_user_id(
+        self, db: Session, table_id: str, user_id: str, day: int
+    ) -> List[ScheduleBlock]:
+        validate_day(day)
+        masks = empty_week()
+        masks[day] = FULL_DAY
+        return self._replace_cells(
+            db,
+            table_id=table_id,
+            user_id=user_id,
+            masks=masks,
+            criteria=[self.model.day == day],
+        )
+
+    def replace_time_by_user_id(
+        self, db: Session, table_id: str, user_id: str, start_time: int
+    ) -> List[ScheduleBlock]:
+        validate_time(start_time)
+        return self._replace_cells(
+            db,
+            table_id=table_id,
+            user_id=user_id,
+            masks=[hour_bit(start_time)] * DAYS_PER_WEEK,
+            criteria=[self.model.start_time == start_time],
+            cut=self._hour_cut(start_time),
+        )
+
+    def delete_all_by_user_id(self, db: Session, table_id: str, user_id: str) -> Any:
+        cleared = self._clear_cells(
+            db, table_id=table_id, user_id=user_id, masks=full_week()
+        )
+        db_obj = self._delete_rows(db, table_id=table_id, user_id=user_id, criteria=[])
+
+        self._touch(db, table_id)
+        db.commit()
+
+        return db_obj + cleared
+
+    def delete_day_by_user_id(
+        self, db: Session, table_id: str, user_id: str, day: int
+    ) -> Any:
+        validate_day(day)
+        masks = empty_week()
+        masks[day] = FULL_DAY
+        cleared = self._clear_cells(db, table_id=table_id, user_id=user_id, masks=masks)
+        db_obj = self._delete_rows(
+            db, table_id=table_id, user_id=user_id, criteria=[self.model.day == day]
+        )
+
+        self._touch(db, table_id)
+        db.commit()
+
+        return db_obj + cleared
 
     def delete_time_by_user_id(
         self, db: Session, table_id: str, user_id: str, start_time: int
     ) -> Any:
-        db_obj = (
-            db.query(self.model)
-            .filter(
-                self.model.table_id == table_id,
-                self.model.user_id == user_id,
-                self.model.start_time == start_time,
+        validate_time(start_time)
+        masks = [hour_bit(start_time)] * DAYS_PER_WEEK
+        cleared = self._clear_cells(db, table_id=table_id, user_id=user_id, masks=masks)
+        cut = self._hour_cut(start_time)
+        if cut is None:
+            db_obj = self._delete_rows(
+                db,
+                table_id=table_id,
+                user_id=user_id,
+                criteria=[self.model.start_time == start_time],
             )
-            .delete()
-        )
+        else:
+            db_obj = self._cut_rows(db, table_id=table_id, user_id=user_id, cut=cut)
 
+        self._touch(db, table_id)
         db.commit()
 
-        return db_obj
+        return db_obj + cleared
+
+
+class AsyncCRUDScheduleblock(
+    ScheduleblockStatements,
+    AsyncCRUDBase[ScheduleBlock, ScheduleBlockCreate, ScheduleBlockUpdate],
+):
+    """
+    자주 불리는 조회/채우기 API 를 AsyncSession 으로 처리하는 버전
+    SQL 문은 CRUDScheduleblock 과 같은 것을 씀
+    """
+
+    model: Type[ScheduleBlock]
+
+    async def _fill_cells(
+        self, db: AsyncSession, *, table_id: str, user_id: str, masks: List[int]
+    ) -> Any:
+        result = await db.execute(
+            self._upsert_cells,
+            self._upsert_params(table_id=table_id, user_id=user_id, masks=masks),
+        )
+        row = result.one()
+        record_delta(db, table_id=table_id, user_id=user_id).add_hours(row.id, masks)
+        return row
+
+    async def _apply_changes(
+        self, db: AsyncSession, *, table_id: str, user_id: str, changes: RowChanges
+    ) -> None:
+        if changes.deleted:
+            await db.execute(self._delete_by_ids, {"ids": list(changes.deleted)})
+        if changes.updates:
+            await db.execute(self._bulk_update(changes.updates))
+        if changes.inserts:
+            await db.execute(
+                insert(self.model),
+                [{**values, "user_id": user_id} for values in changes.inserts],
+            )
+        self._record_changes(db, table_id=table_id, user_id=user_id, changes=changes)
+
+    async def _cut_rows(
+        self, db: AsyncSession, *, table_id: str, user_id: str, cut: Tuple[int, int]
+    ) -> int:
+        result = await db.execute(
+            self._rows_for_update, {"table_id": table_id, "user_id": user_id}
+        )
+        changes = self._plan_cut(result.all(), start=cut[0], end=cut[1])
+        await self._apply_changes(
+            db, table_id=table_id, user_id=user_id, changes=changes
+        )
+        return len(changes.deleted) + len(changes.updates)
+
+    async def get_all(self, db: AsyncSession, table_id: str) -> List[Any]:
+        params = {"table_id": table_id}
+        blocks = await db.execute(self._blocks_by_table, params)
+        availabilities = await db.execute(self._availabilities_by_table, params)
+        return blocks.all() + self._expand_cells(availabilities.all())
+
+    async def get_page(
+        self,
+        db: AsyncSession,
+        table_id: str,
+        *,
+        user_id: Optional[str] = None,
+        after: Optional[ScheduleKey] = None,
+        limit: int,
+    ) -> Tuple[List[Any], Optional[ScheduleKey]]:
+        result = await db.execute(
+            self._ordered(user_id),
+            self._ordered_params(
+                table_id=table_id, user_id=user_id, after=after, limit=limit + 1
+            ),
+        )
+        return self._page(result.all(), limit)
+
+    async def stream(
+        self,
+        db: AsyncSession,
+        table_id: str,
+        *,
+        user_id: Optional[str] = None,
+        after: Optional[ScheduleKey] = None,
+        batch_size: int = 1000,
+        expand: bool = False,
+    ) -> AsyncIterator[List[Any]]:
+        """
+        after 다음의 블록과 칸을 끝까지 batch_size 개씩 반환
+        서버 측 커서로 읽으므로 한 번에 batch_size 개의 행만 메모리에 있음
+        expand 이면 묶음마다 여러 시간에 걸친 블록을 시간 칸 조각으로 펼침
+        """
+        result = await db.stream(
+            self._ordered(user_id),
+            self._ordered_params(
+                table_id=table_id, user_id=user_id, after=after, limit=None
+            ),
+        )
+        # sqlalchemy2-stubs 는 async 제너레이터인 partitions 를 코루틴으로 적어 둠
+        async for rows in result.partitions(batch_size):  # type: ignore
+            yield self.expand_blocks(rows) if expand else rows
+
+    async def _get_blocks_by_user_id(
+        self, db: AsyncSession, table_id: str, user_id: str
+    ) -> List[Any]:
+        result = await db.execute(
+            self._blocks_by_user, {"table_id": table_id, "user_id": user_id}
+        )
+        return result.all()
+
+    async def get_all_by_user_id(
+        self, db: AsyncSession, table_id: str, user_id: str
+    ) -> List[Any]:
+        blocks = await self._get_blocks_by_user_id(
+            db, table_id=table_id, user_id=user_id
+        )
+        availabilities = await db.execute(
+            self._availabilities_by_user, {"table_id": table_id, "user_id": user_id}
+        )
+        return blocks + self._expand_cells(availabilities.all())
+
+    async def _replace_cells(
+        self,
+        db: AsyncSession,
+        *,
+        table_id: str,
+        user_id: str,
+        masks: List[int],
+        criteria: List[Any],
+        cut: Optional[Tuple[int, int]] = None,
+    ) -> List[Any]:
+        if cut is None:
+            deleted = await db.execute(
+                self._delete_blocks(
+                    table_id=table_id, user_id=user_id, criteria=criteria
+                )
+            )
+            self._record_deleted(
+                db, table_id=table_id, user_id=user_id, rows=deleted.all()
+            )
+        else:
+            await self._cut_rows(db, table_id=table_id, user_id=user_id, cut=cut)
+        row = await self._fill_cells(
+            db, table_id=table_id, user_id=user_id, masks=masks
+        )
+        blocks = await self._get_blocks_by_user_id(
+            db, table_id=table_id, user_id=user_id
+        )
+        versions = await db.execute(self._bump_versions([table_id]))
+        record_versions(db, versions.all())
+        await db.commit()
+        return blocks + self._expand_cells([row])
+
+    async def replace_all_by_user_id(
+        self, db: AsyncSession, table_id: str, user_id: str
+    ) -> List[Any]:
+        return await self._replace_cells(
+            db, table_id=table_id, user_id=user_id, masks=full_week(), criteria=[]
+        )
+
+    async def replace_day_by_user_id(
+        self, db: AsyncSession, table_id: str, user_id: str, day: int
+    ) -> List[Any]:
+        validate_day(day)
+        masks = empty_week()
+        masks[day] = FULL_DAY
+        return await self._replace_cells(
+            db,
+            table_id=table_id,
+            user_id=user_id,
+            masks=masks,
+            criteria=[self.model.day == day],
+        )
+
+    async def replace_time_by_user_id(
+        self, db: AsyncSession, table_id: str, user_id: str, start_time: int
+    ) -> List[Any]:
+        validate_time(start_time)
+        return await self._replace_cells(
+            db,
+            table_id=table_id,
+            user_id=user_id,
+            masks=[hour_bit(start_time)] * DAYS_PER_WEEK,
+            criteria=[self.model.start_time == start_time],
+            cut=self._hour_cut(start_time),
+        )
 
 
 scheduleblock = CRUDScheduleblock(ScheduleBlock)
+async_scheduleblock = AsyncCRUDScheduleblock(ScheduleBlock)
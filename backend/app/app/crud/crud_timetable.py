@@ -1,11 +1,29 @@
+from typing import Any, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Update
 
 from app.core.security import create_uuid
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.timetable import TimeTable
 from app.schemas.timetable import TimeTableCreate, TimeTableUpdate
 
 
+def bump_versions(*criteria: Any) -> Update:
+    """
+    스케쥴 블록 응답이 바뀌는 쓰기마다 커밋 직전에 같은 트랜잭션에서 실행해서 ETag 를 바꿈
+    타임테이블 행 잠금을 커밋까지 잡으므로 가능한 한 마지막에 실행함
+    """
+    return (
+        update(TimeTable)
+        .where(*criteria)
+        .values(version=TimeTable.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
 class CRUDTimeTable(CRUDBase[TimeTable, TimeTableCreate, TimeTableUpdate]):
     def create_with_user_id(
         self, db: Session, *, obj_in: TimeTableCreate, user_id: str
@@ -21,9 +39,38 @@ class CRUDTimeTable(CRUDBase[TimeTable, TimeTableCreate, TimeTableUpdate]):
         db.refresh(db_obj)
         return db_obj
 
-    def get_by_user_id(self, db: Session, *, user_id: str) -> TimeTable:
+    def get_by_user_id(self, db: Session, *, user_id: str) -> List[TimeTable]:
         db_obj = db.query(TimeTable).filter(TimeTable.create_user_id == user_id).all()
         return db_obj
 
 
+class AsyncCRUDTimeTable(AsyncCRUDBase[TimeTable, TimeTableCreate, TimeTableUpdate]):
+    async def create_with_user_id(
+        self, db: AsyncSession, *, obj_in: TimeTableCreate, user_id: str
+    ) -> TimeTable:
+        db_obj = TimeTable(
+            id=create_uuid(),
+            title=obj_in.title,
+            description=obj_in.description,
+            create_user_id=user_id,
+        )
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def get_by_user_id(
+        self, db: AsyncSession, *, user_id: str
+    ) -> List[TimeTable]:
+        result = await db.execute(
+            select(TimeTable).where(TimeTable.create_user_id == user_id)
+        )
+        return result.scalars().all()
+
+    async def get_version(self, db: AsyncSession, *, id: str) -> Optional[int]:
+        result = await db.execute(select(TimeTable.version).where(TimeTable.id == id))
+        return result.scalar()
+
+
 timetable = CRUDTimeTable(TimeTable)
+async_timetable = AsyncCRUDTimeTable(TimeTable)
@@ -1,21 +1,83 @@
+import secrets
 from random import randint
 from typing import Any, Dict, Optional, Union
 
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.sql import Update
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.rooms import manager
 from app.core.security import create_uuid, get_password_hash, verify_password
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.crud.crud_timetable import bump_versions
+from app.models.availability import Availability
+from app.models.scheduleblock import ScheduleBlock
+from app.models.timetable import TimeTable
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
+# 유저 id -> 컬럼 값. 세션에 묶인 객체 대신 값만 보관함
+user_cache: TTLCache[Dict[str, Any]] = TTLCache(
+    maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_user(user_id: str) -> None:
+    """
+    이 워커의 캐시에서 유저를 지우고, 다른 워커에도 backplane 으로 알림
+    알림을 받지 못한 워커(memory backplane, 연결이 끊긴 동안)는 USER_CACHE_TTL_SECONDS 안에 반영됨
+    """
+    user_cache.invalidate(user_id)
+    manager.publish_user_changed_threadsafe(user_id)
+
+
+def user_snapshot(user: User) -> Dict[str, Any]:
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+
+def detached_user(values: Dict[str, Any]) -> User:
+    """
+    캐시한 값으로 DB 조회 없이 세션에 merge(load=False) 할 수 있는 객체를 만듦
+    """
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+def bump_user_timetable_versions(user_id: str) -> Update:
+    """
+    스케쥴 블록 응답에 닉네임과 색상이 들어가므로 유저가 참여한 타임테이블의 ETag 를 바꿈
+    """
+    table_ids = union(
+        select(ScheduleBlock.table_id).where(ScheduleBlock.user_id == user_id),
+        select(Availability.table_id).where(Availability.user_id == user_id),
+    )
+    return bump_versions(TimeTable.id.in_(table_ids))
+
+
+# 이 필드가 바뀌면 스케쥴 블록 응답도 바뀜
+SCHEDULEBLOCK_USER_FIELDS = ("nickname", "color_id")
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    def get_cached(self, db: Session, *, id: str) -> Optional[User]:
+        values = user_cache.get(id)
+        if values is not None:
+            return db.merge(detached_user(values), load=False)
+        user = self.get(db, id=id)
+        if user is not None:
+            user_cache.set(id, user_snapshot(user))
+        return user
+
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
 
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
         if not obj_in.password:
-            obj_in.password = create_uuid()
+            obj_in.password = secrets.token_urlsafe(32)
         db_obj = User(
             email=obj_in.email,
             hashed_password=get_password_hash(obj_in.password),
@@ -40,7 +102,16 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
         update_data["is_active"] = True
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        if any(field in update_data for field in SCHEDULEBLOCK_USER_FIELDS):
+            db.execute(bump_user_timetable_versions(db_obj.id))
+        updated = super().update(db, db_obj=db_obj, obj_in=update_data)
+        invalidate_user(updated.id)
+        return updated
+
+    def remove(self, db: Session, *, id: Any) -> Optional[User]:
+        removed = super().remove(db, id=id)
+        invalidate_user(id)
+        return removed
 
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         user = self.get_by_email(db, email=email)
@@ -51,7 +122,10 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         return user
 
     def is_active(self, user: User) -> bool:
-        return user.is_active
+        return bool(user.is_active)
+
+    def is_superuser(self, user: User) -> bool:
+        return bool(user.is_superuser)
 
     def get_by_kakao_id(self, db: Session, *, kakao_id: int) -> Optional[User]:
         return db.query(User).filter(User.kakao_id == kakao_id).first()
@@ -62,7 +136,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         db_obj = User(
             id=create_uuid(),
             kakao_id=kakao_id,
-            hashed_password=get_password_hash(create_uuid()),
+            hashed_password=get_password_hash(secrets.token_urlsafe(32)),
             nickname=nickname,
             color_id=randint(0, 9),
         )
@@ -72,4 +146,71 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         return db_obj
 
 
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    async def get_cached(self, db: AsyncSession, *, id: str) -> Optional[User]:
+        values = user_cache.get(id)
+        if values is not None:
+            return await db.merge(detached_user(values), load=False)
+        user = await self.get(db, id=id)
+        if user is not None:
+            user_cache.set(id, user_snapshot(user))
+        return user
+
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+
+    async def get_by_kakao_id(
+        self, db: AsyncSession, *, kakao_id: int
+    ) -> Optional[User]:
+        result = await db.execute(select(User).where(User.kakao_id == kakao_id))
+        return result.scalars().first()
+
+    async def create_by_kakao_id(
+        self, db: AsyncSession, *, kakao_id: int, nickname: Optional[str]
+    ) -> User:
+        db_obj = User(
+            id=create_uuid(),
+            kakao_id=kakao_id,
+            hashed_password=get_password_hash(secrets.token_urlsafe(32)),
+            nickname=nickname,
+            color_id=randint(0, 9),
+        )
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]]
+    ) -> User:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        if update_data.get("password"):
+            hashed_password = get_password_hash(update_data["password"])
+            del update_data["password"]
+            update_data["hashed_password"] = hashed_password
+        update_data["is_active"] = True
+        if any(field in update_data for field in SCHEDULEBLOCK_USER_FIELDS):
+            await db.execute(bump_user_timetable_versions(db_obj.id))
+        updated = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        invalidate_user(updated.id)
+        return updated
+
+    async def remove(self, db: AsyncSession, *, id: Any) -> Optional[User]:
+        removed = await super().remove(db, id=id)
+        invalidate_user(id)
+        return removed
+
+    def is_active(self, user: User) -> bool:
+        return bool(user.is_active)
+
+
 user = CRUDUser(User)
+async_user = AsyncCRUDUser(User)
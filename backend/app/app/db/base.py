@@ -1,6 +1,9 @@
 # Import all the models, so that Base has them before being
 # imported by Alembic
 from app.db.base_class import Base  # noqa
+from app.models.availability import Availability  # noqa
+from app.models.availability_count import AvailabilityCount  # noqa
+from app.models.availability_count import ParticipantSlots  # noqa
 from app.models.color import Color  # noqa
 from app.models.scheduleblock import ScheduleBlock  # noqa
 from app.models.timetable import TimeTable  # noqa
@@ -3,7 +3,6 @@ from sqlalchemy.orm import Session
 from app import crud, schemas
 from app.core.config import settings
 from app.db import base  # noqa: F401
-from app.db.session import engine
 
 # make sure all SQL Alchemy models are imported (app.db.base) before initializing DB
 # otherwise, SQL Alchemy might fail to initialize relationships properly
@@ -11,10 +10,10 @@ from app.db.session import engine
 
 
 def init_db(db: Session) -> None:
-    # Tables should be created with Alembic migrations
+    # Tables should be created with Alembic migrations (prestart.sh)
     # But if you don't want to use migrations, create
     # the tables un-commenting the next line
-    base.Base.metadata.create_all(bind=engine)
+    # base.Base.metadata.create_all(bind=engine)
 
     user = crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER)
     if not user:
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Type
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+from app.core.config import settings
+
+# 대기 시간 백분위를 구할 최근 checkout 수
+RECENT_WAITS = 1000
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class PoolWaits:
+    """
+    커넥션 checkout 한 번에 걸린 시간(풀이 비기를 기다린 시간, pre ping, 새 연결 포함)
+    스레드 풀의 여러 요청이 같이 쓰므로 잠금으로 보호함
+    """
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=RECENT_WAITS)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, *, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self.recent.append(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            ordered = sorted(self.recent)
+            attempts = self.checkouts + self.timeouts
+            stats: Dict[str, Any] = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_mean_ms": self.total / attempts * 1000 if attempts else 0.0,
+                "wait_max_ms": self.max * 1000,
+            }
+        for percent in (50, 95, 99):
+            stats[f"wait_p{percent}_ms"] = (
+                _percentile(ordered, percent) * 1000 if ordered else 0.0
+            )
+        return stats
+
+
+class TimedPoolMixin:
+    waits: PoolWaits
+
+    def connect(self) -> Any:
+        started = time.perf_counter()
+        try:
+            connection = super().connect()  # type: ignore
+        except exc.TimeoutError:
+            self.waits.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.waits.record(time.perf_counter() - started)
+        return connection
+
+
+def timed_pool_class(pool_class: Type[Pool]) -> Type[Pool]:
+    """
+    checkout 대기 시간을 재는 풀 클래스
+    engine.dispose() 등으로 풀을 다시 만들어도 같은 클래스를 쓰므로 기록이 이어지도록 클래스마다 PoolWaits 를 둠
+    """
+    return type(
+        f"Timed{pool_class.__name__}",
+        (TimedPoolMixin, pool_class),
+        {"waits": PoolWaits()},
+    )
+
+
+def pool_stats(engine: Engine, *, max_overflow: Optional[int] = None) -> Dict[str, Any]:
+    """
+    이 워커의 풀 상태. overflow 는 pool_size 를 넘어 더 연 커넥션 수
+    QueuePool 은 max_overflow 를 공개하지 않으므로 주지 않으면 db.session 이 create_engine 에 넘긴
+    설정값을 씀. 기본값으로 두면 import 할 때의 값에 묶이므로 부를 때 읽음
+    """
+    if max_overflow is None:
+        max_overflow = settings.DB_MAX_OVERFLOW
+    pool: Any = engine.pool
+    stats: Dict[str, Any] = {
+        "pool_size": pool.size(),
+        "max_overflow": max_overflow,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "timeout_seconds": pool.timeout(),
+    }
+    waits = getattr(pool, "waits", None)
+    if waits is not None:
+        stats.update(waits.stats())
+    return stats
@@ -0,0 +1,30 @@
+import uuid
+from typing import Any, Optional
+
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.types import TypeDecorator
+
+
+class HexUUID(TypeDecorator):
+    """
+    DB 에는 16바이트 uuid 로 저장하고, 코드와 API 에는 지금처럼 하이픈 없는 32자 hex 문자열로 보여 줌
+
+    uuid 가 아닌 값으로 찾으면 NULL 로 바꿔서 에러 대신 아무 행도 찾지 못하게 함
+    (없는 id 로 요청하면 예전처럼 404)
+    """
+
+    impl = UUID(as_uuid=False)
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Optional[str]:
+        if value is None:
+            return None
+        try:
+            return str(uuid.UUID(str(value)))
+        except ValueError:
+            return None
+
+    def process_result_value(self, value: Any, dialect: Any) -> Optional[str]:
+        if value is None:
+            return None
+        return str(value).replace("-", "")
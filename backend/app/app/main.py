@@ -2,7 +2,11 @@ from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.api_v1.api import api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.kakao import kakao_client
+from app.core.rooms import manager
+from app.crud.crud_user import user_cache
 
 app = FastAPI(
     title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json"
@@ -17,6 +21,34 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # 페이지를 나눈 스케쥴 블록 응답의 다음 페이지 주소와, If-None-Match 로 다시 보낼 ETag
+        expose_headers=["Link", "ETag"],
+    )
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        content_types=settings.COMPRESSION_CONTENT_TYPES,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+
+
+@app.on_event("startup")
+async def start_connection_manager() -> None:
+    # 다른 워커에서 바뀌거나 지워진 유저를 이 워커의 캐시에서도 지움
+    manager.user_changed = user_cache.invalidate
+    await manager.start()
+
+
+@app.on_event("shutdown")
+async def close_kakao_client() -> None:
+    await kakao_client.close()
+
+
+@app.on_event("shutdown")
+async def stop_connection_manager() -> None:
+    await manager.stop()
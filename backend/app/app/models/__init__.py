@@ -1,3 +1,5 @@
+from .availability import Availability
+from .availability_count import AvailabilityCount, ParticipantSlots
 from .color import Color
 from .scheduleblock import ScheduleBlock
 from .timetable import TimeTable
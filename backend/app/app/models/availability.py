@@ -0,0 +1,37 @@
+from typing import TYPE_CHECKING, List
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+from app.db.types import HexUUID
+
+if TYPE_CHECKING:
+    from .timetable import TimeTable  # noqa: F401
+    from .user import User  # noqa: F401
+
+
+class Availability(Base):
+    """
+    타임테이블 참여자 한 명의 한 주 가용 시간 비트맵
+
+    `hours[day]` 의 `hour` 번째 비트가 1이면 해당 요일/시간 칸이 채워진 상태
+    """
+
+    id: str = Column(HexUUID, primary_key=True)
+    table_id: str = Column(HexUUID, ForeignKey("timetable.id"), nullable=False)
+    user_id: str = Column(HexUUID, ForeignKey("user.id"), nullable=False)
+    hours: List[int] = Column(ARRAY(Integer, zero_indexes=True), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+    timetable: "TimeTable" = relationship("TimeTable")
+    user: "User" = relationship("User")
+
+    __table_args__ = (
+        UniqueConstraint("table_id", "user_id", name="uc_availability"),
+        # 유저가 참여한 타임테이블 찾기. table_id 로 찾는 것은 uc_availability 가 맡음
+        Index("ix_availability_user_id_table_id", "user_id", "table_id"),
+    )
@@ -0,0 +1,43 @@
+from typing import List
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, SmallInteger
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+from app.db.types import HexUUID
+
+
+class AvailabilityCount(Base):
+    """
+    타임테이블의 slot_minutes 단위 칸마다 가능한 참여자 수
+
+    `counts[slot]` 은 한 주의 slot 번째 칸(일요일 0시부터)을 모두 채운 참여자 수
+    스케쥴 블록이 바뀌는 트랜잭션 안에서 바뀐 참여자 몫만 고침
+    """
+
+    table_id: str = Column(
+        HexUUID, ForeignKey("timetable.id", ondelete="CASCADE"), primary_key=True
+    )
+    slot_minutes: int = Column(SmallInteger, nullable=False)
+    counts: List[int] = Column(ARRAY(Integer, zero_indexes=True), nullable=False)
+    participant_count: int = Column(Integer, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class ParticipantSlots(Base):
+    """
+    AvailabilityCount 에 더해 둔 참여자 한 명의 칸 비트셋(little endian 바이트)
+    참여자의 블록이 바뀌면 새 비트셋과 비교해서 달라진 칸의 수만 고침
+    행이 있으면 참여자로 셈
+    """
+
+    table_id: str = Column(
+        HexUUID, ForeignKey("timetable.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: str = Column(
+        HexUUID, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    slots: bytes = Column(LargeBinary, nullable=False)
@@ -2,35 +2,51 @@ from typing import TYPE_CHECKING
 
 from sqlalchemy import (
     Column,
+    Computed,
     DateTime,
     ForeignKey,
+    Index,
     SmallInteger,
     String,
     UniqueConstraint,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import INT4RANGE
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
 from app.db.base_class import Base
+from app.db.types import HexUUID
 
 if TYPE_CHECKING:
     from .timetable import TimeTable  # noqa: F401
     from .user import User  # noqa: F401
 
 
+# 블록이 덮는 한 주의 [시작, 끝) 분. core.availability.block_interval 과 같이 자정을 넘는 블록은 그 날 끝까지로 자름
+# alembic 이 DB 의 식과 비교할 수 있도록 PostgreSQL 이 보여 주는 식과 같은 줄로 나눔
+WEEK_MINUTES_SQL = """int4range(day * 1440 + start_time * 60 + start_minute, day * 1440 +
+CASE
+    WHEN end_time * 60 + end_minute + 1 <= start_time * 60 + start_minute THEN 1440
+    ELSE end_time * 60 + end_minute + 1
+END)"""
+
+
 class ScheduleBlock(Base):
-    id = Column(String, primary_key=True, index=True)
-    table_id = Column(String, ForeignKey("timetable.id"))
-    user_id = Column(String, ForeignKey("user.id"))
-    start_time = Column(SmallInteger)
-    start_minute = Column(SmallInteger)
-    end_time = Column(SmallInteger)
-    end_minute = Column(SmallInteger)
-    day = Column(SmallInteger)
+    id: str = Column(HexUUID, primary_key=True)
+    # 컬럼은 NULL 을 허용하지만 블록을 만들 때 항상 채우므로 값이 있는 타입으로 적음
+    table_id: str = Column(HexUUID, ForeignKey("timetable.id"))
+    user_id: str = Column(HexUUID, ForeignKey("user.id"))
+    start_time: int = Column(SmallInteger)
+    start_minute: int = Column(SmallInteger)
+    end_time: int = Column(SmallInteger)
+    end_minute: int = Column(SmallInteger)
+    day: int = Column(SmallInteger)
     label = Column(String)
+    # 시간 구간 조회용. 행을 읽을 때는 쓰지 않으므로 필요할 때만 읽음
+    week_minutes = deferred(Column(INT4RANGE, Computed(WEEK_MINUTES_SQL)))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    timetable = relationship("TimeTable", back_populates="scheduleblocks")
-    user = relationship("User", backref="scheduleblocks")
+    timetable: "TimeTable" = relationship("TimeTable", back_populates="scheduleblocks")
+    user: "User" = relationship("User", backref="scheduleblocks")
 
     __table_args__ = (
         UniqueConstraint(
@@ -43,4 +59,19 @@ class ScheduleBlock(Base):
             "day",
             name="uc_time_table",
         ),
+        # uc_time_table 이 table_id, (table_id, user_id), (table_id, user_id, start_time)
+        # 조회를 맡고, 요일 삭제와 ScheduleKey 순서로 페이지 읽기, 유저가 참여한 타임테이블 찾기는
+        # 아래 인덱스가 맡음
+        Index(
+            "ix_scheduleblock_table_id_user_id_day_start_time",
+            "table_id",
+            "user_id",
+            "day",
+            "start_time",
+            "id",
+        ),
+        Index("ix_scheduleblock_user_id_table_id", "user_id", "table_id"),
+        # 주어진 시간 구간과 겹치는 블록 찾기. table_id 까지 넣으려면 btree_gist 확장이 필요해서
+        # 넣지 않고, 타임테이블 조건은 uc_time_table 로 찾아 BitmapAnd 로 합침
+        Index("ix_scheduleblock_week_minutes", "week_minutes", postgresql_using="gist"),
     )
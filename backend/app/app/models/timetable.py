@@ -1,10 +1,11 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List
 
-from sqlalchemy import Column, DateTime, ForeignKey, String
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.db.base_class import Base
+from app.db.types import HexUUID
 
 if TYPE_CHECKING:
     from .scheduleblock import ScheduleBlock  # noqa: F401
@@ -12,10 +13,15 @@ if TYPE_CHECKING:
 
 
 class TimeTable(Base):
-    id = Column(String, primary_key=True, index=True)
-    title = Column(String, index=True)
-    description = Column(String, index=True)
-    create_user_id = Column(String, ForeignKey("user.id"))
+    id: str = Column(HexUUID, primary_key=True)
+    title = Column(String)
+    description = Column(String)
+    # 내 타임테이블 목록
+    create_user_id = Column(HexUUID, ForeignKey("user.id"), index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    owner = relationship("User", back_populates="timetables")
-    scheduleblocks = relationship("ScheduleBlock", back_populates="timetable")
+    # 스케쥴 블록 응답이 바뀌는 쓰기마다 1씩 올림. ETag 로 씀
+    version: int = Column(Integer, nullable=False, default=0, server_default="0")
+    owner: "User" = relationship("User", back_populates="timetables")
+    scheduleblocks: List["ScheduleBlock"] = relationship(
+        "ScheduleBlock", back_populates="timetable"
+    )
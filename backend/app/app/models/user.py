@@ -1,9 +1,10 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List
 
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, BigInteger
+from sqlalchemy import BigInteger, Boolean, Column, ForeignKey, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
+from app.db.types import HexUUID
 
 if TYPE_CHECKING:
     from .timetable import TimeTable  # noqa: F401
@@ -11,13 +12,14 @@ if TYPE_CHECKING:
 
 
 class User(Base):
-    id = Column(String, primary_key=True, index=True)
+    id: str = Column(HexUUID, primary_key=True)
     email = Column(String, unique=True, index=True, nullable=True)
     hashed_password = Column(String, nullable=True)
-    kakao_id = Column(BigInteger, nullable=True)
+    # 카카오 로그인마다 찾음
+    kakao_id = Column(BigInteger, nullable=True, index=True)
     color_id = Column(Integer, ForeignKey("color.id"))
     nickname = Column(String, nullable=True)
     is_active = Column(Boolean(), default=False)
     is_superuser = Column(Boolean(), default=False)
-    timetables = relationship("TimeTable", back_populates="owner")
-    color = relationship("Color")
+    timetables: List["TimeTable"] = relationship("TimeTable", back_populates="owner")
+    color: "Color" = relationship("Color")
@@ -1,6 +1,22 @@
+from .availability import (
+    Availability,
+    AvailabilityCountDay,
+    AvailabilityCounts,
+    AvailabilityDay,
+    AvailabilitySlot,
+    FreeParticipants,
+    MeetingWindow,
+)
 from .kakao_user import KakaoUser
 from .msg import Msg
-from .scheduleblock import ScheduleBlock, ScheduleBlockCreate, ScheduleBlockUpdate
+from .scheduleblock import (
+    ScheduleBlock,
+    ScheduleBlockColumns,
+    ScheduleBlockCreate,
+    ScheduleBlockParticipants,
+    ScheduleBlockTable,
+    ScheduleBlockUpdate,
+)
 from .timetable import TimeTable, TimeTableCreate, TimeTableUpdate
 from .token import Authorization, Code, Token, TokenPayload
 from .user import User, UserCreate, UserInDB, UserUpdate
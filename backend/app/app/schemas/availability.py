@@ -0,0 +1,127 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class AvailabilitySlot(BaseModel):
+    start_time: int
+    start_minute: int
+    count: int
+    user_ids: List[str]
+
+
+class AvailabilityDay(BaseModel):
+    day: int
+    slots: List[AvailabilitySlot]
+
+
+# API 반환 데이터
+class Availability(BaseModel):
+    table_id: str
+    slot_minutes: int
+    participant_count: int
+    days: List[AvailabilityDay]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "table_id": "450416ccb189c194b2c3bf4c7665725d",
+                "slot_minutes": 60,
+                "participant_count": 2,
+                "days": [
+                    {
+                        "day": 0,
+                        "slots": [
+                            {
+                                "start_time": 0,
+                                "start_minute": 0,
+                                "count": 2,
+                                "user_ids": [
+                                    "450416ccb189c194b2c3bf4c7665725e",
+                                    "550416ccb189c194b2c3bf4c7665725e",
+                                ],
+                            }
+                        ],
+                    }
+                ],
+            }
+        }
+
+
+class AvailabilityCountDay(BaseModel):
+    day: int
+    counts: List[int]
+
+
+# 미리 세어 둔 칸별 참여자 수. counts[slot] 은 그 날 slot * slot_minutes 분부터의 칸
+class AvailabilityCounts(BaseModel):
+    table_id: str
+    slot_minutes: int
+    participant_count: int
+    days: List[AvailabilityCountDay]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "table_id": "450416ccb189c194b2c3bf4c7665725d",
+                "slot_minutes": 60,
+                "participant_count": 2,
+                "days": [{"day": 0, "counts": [0] * 9 + [2, 2, 1] + [0] * 12}],
+            }
+        }
+
+
+class MeetingWindow(BaseModel):
+    day: int
+    start_time: int
+    start_minute: int
+    end_time: int
+    end_minute: int
+    duration_minutes: int
+    count: int
+    user_ids: List[str]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "day": 2,
+                "start_time": 14,
+                "start_minute": 0,
+                "end_time": 15,
+                "end_minute": 59,
+                "duration_minutes": 120,
+                "count": 2,
+                "user_ids": [
+                    "450416ccb189c194b2c3bf4c7665725e",
+                    "550416ccb189c194b2c3bf4c7665725e",
+                ],
+            }
+        }
+
+
+# 한 요일의 구간을 모두 덮는 참여자(covering)와 일부만 겹치는 참여자(partial)
+class FreeParticipants(BaseModel):
+    table_id: str
+    day: int
+    start_time: int
+    start_minute: int
+    end_time: int
+    end_minute: int
+    duration_minutes: int
+    covering_user_ids: List[str]
+    partial_user_ids: List[str]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "table_id": "450416ccb189c194b2c3bf4c7665725d",
+                "day": 2,
+                "start_time": 14,
+                "start_minute": 10,
+                "end_time": 15,
+                "end_minute": 39,
+                "duration_minutes": 90,
+                "covering_user_ids": ["450416ccb189c194b2c3bf4c7665725e"],
+                "partial_user_ids": ["550416ccb189c194b2c3bf4c7665725e"],
+            }
+        }
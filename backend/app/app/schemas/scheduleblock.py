@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -57,3 +57,51 @@ class ScheduleBlock(ScheduleBlockInDBBase):
 # DB에만 있는 데이터
 class ScheduleBlockInDB(ScheduleBlockInDBBase):
     created_at: datetime
+
+
+# 참여자 목록. 블록의 participant 는 이 목록의 인덱스
+class ScheduleBlockParticipants(BaseModel):
+    user_id: List[str]
+    nickname: List[Optional[str]]
+    color: List[Optional[str]]
+
+
+# 블록 필드별 배열. 같은 인덱스끼리 블록 하나를 이룸
+class ScheduleBlockColumns(BaseModel):
+    id: List[str]
+    participant: List[int]
+    day: List[int]
+    start_time: List[int]
+    start_minute: List[int]
+    end_time: List[int]
+    end_minute: List[int]
+    label: List[Optional[str]]
+
+
+# format=columns 또는 msgpack 으로 받는 스케쥴 블록 목록
+class ScheduleBlockTable(BaseModel):
+    table_id: str
+    participants: ScheduleBlockParticipants
+    blocks: ScheduleBlockColumns
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "table_id": "450416ccb189c194b2c3bf4c7665725d",
+                "participants": {
+                    "user_id": ["450416ccb189c194b2c3bf4c7665725e"],
+                    "nickname": ["우동역전13"],
+                    "color": ["#112233"],
+                },
+                "blocks": {
+                    "id": ["550416ccb189c194b2c3bf4c7665725d", "650416ccb1-0-9"],
+                    "participant": [0, 0],
+                    "day": [0, 0],
+                    "start_time": [12, 9],
+                    "start_minute": [0, 0],
+                    "end_time": [15, 9],
+                    "end_minute": [30, 59],
+                    "label": ["학교 시험이 있어요", None],
+                },
+            }
+        }
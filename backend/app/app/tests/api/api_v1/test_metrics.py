@@ -0,0 +1,74 @@
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from app import crud
+from app.core.config import settings
+from app.db.pool import pool_stats, timed_pool_class
+from app.db.session import engine
+from app.schemas.user import UserCreate
+from app.tests.utils.user import get_auth_header
+from app.tests.utils.utils import random_email
+
+
+def test_get_db_pool_metrics(client: TestClient, db: Session) -> None:
+    user = crud.user.create(db, obj_in=UserCreate(email=random_email()))
+    r = client.get(
+        f"{settings.API_V1_STR}/metrics/db-pool",
+        headers=get_auth_header(user_id=user.id),
+    )
+    assert r.status_code == 403
+
+    superuser = crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER)
+    assert superuser is not None
+    r = client.get(
+        f"{settings.API_V1_STR}/metrics/db-pool",
+        headers=get_auth_header(user_id=superuser.id),
+    )
+    assert r.status_code == 200
+    sync = r.json()["sync"]
+    assert sync["pool_size"] == settings.DB_POOL_SIZE
+    assert sync["max_overflow"] == settings.DB_MAX_OVERFLOW
+    assert sync["checkouts"] > 0
+    assert {"checked_out", "idle", "overflow", "timeouts", "wait_p99_ms"} <= set(sync)
+    assert set(r.json()["async"]) == set(sync)
+
+
+def test_pool_records_checkout_timeouts() -> None:
+    engine = create_engine(
+        str(settings.SQLALCHEMY_DATABASE_URI),
+        poolclass=timed_pool_class(QueuePool),
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.1,
+    )
+    try:
+        first, second = engine.connect(), engine.connect()
+        stats = pool_stats(engine, max_overflow=1)
+        assert stats["max_overflow"] == 1
+        assert stats["checked_out"] == 2
+        assert stats["overflow"] == 1
+
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        stats = pool_stats(engine)
+        assert stats["checkouts"] == 2
+        assert stats["timeouts"] == 1
+        assert stats["wait_max_ms"] >= 100
+
+        first.close()
+        second.close()
+        stats = pool_stats(engine)
+        assert stats["checked_out"] == 0
+        assert stats["idle"] == 1
+    finally:
+        engine.dispose()
+
+
+def test_pool_stats_reads_max_overflow_when_called(monkeypatch: Any) -> None:
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", settings.DB_MAX_OVERFLOW + 1)
+    assert pool_stats(engine)["max_overflow"] == settings.DB_MAX_OVERFLOW
@@ -0,0 +1,301 @@
+import asyncio
+import json
+from typing import List
+
+import aiohttp
+import fakeredis
+import fakeredis.aioredis
+import pytest
+import requests
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.benchmarks.server import run_server
+from app.core.backplane import (
+    POSTGRES,
+    POSTGRES_PAYLOAD_LIMIT,
+    MemoryBackplane,
+    MemoryHub,
+    RedisBackplane,
+    create_backplane,
+)
+from app.core.config import settings
+from app.core.deltas import REFETCH_EVENT_TYPE, ScheduleDelta
+from app.core.rooms import DROP_OLDEST, EVICT, ConnectionManager, RoomClient
+from app.core.security import create_uuid
+from app.tests.utils.user import get_auth_header
+from app.tests.utils.utils import random_lower_string
+
+
+def test_room_client_overflow() -> None:
+    async def fill() -> None:
+        client = RoomClient(None, "timetable", queue_size=2)  # type: ignore
+        for message in ("a", "b", "c"):
+            assert client.put(message, overflow=DROP_OLDEST)
+        assert client.dropped == 1
+        assert [client.queue.get_nowait() for _ in range(2)] == ["b", "c"]
+
+        client.put("a", overflow=EVICT)
+        client.put("b", overflow=EVICT)
+        assert not client.put("c", overflow=EVICT)
+
+    asyncio.get_event_loop().run_until_complete(fill())
+
+
+class RecordingWebSocket:
+    def __init__(self) -> None:
+        self.sent: List[str] = []
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, message: str) -> None:
+        self.sent.append(message)
+
+
+def test_memory_backplane() -> None:
+    hub = MemoryHub()
+    managers = [
+        ConnectionManager(
+            queue_size=8,
+            send_timeout=1,
+            overflow=DROP_OLDEST,
+            backplane=MemoryBackplane(channel="test", hub=hub),
+        )
+        for _ in range(2)
+    ]
+    sockets = [RecordingWebSocket() for _ in range(3)]
+
+    async def talk() -> None:
+        for manager in managers:
+            await manager.start()
+        clients = [
+            await managers[0].connect(sockets[0], "a"),  # type: ignore
+            await managers[1].connect(sockets[1], "a"),  # type: ignore
+            await managers[1].connect(sockets[2], "b"),  # type: ignore
+        ]
+        await managers[0].publish("a", "hello")
+        await asyncio.sleep(0.01)
+        for manager, client in zip(managers + managers[1:], clients):
+            manager.disconnect(client)
+        for manager in managers:
+            await manager.stop()
+
+    asyncio.get_event_loop().run_until_complete(talk())
+    assert [socket.sent for socket in sockets] == [["hello"], ["hello"], []]
+    assert managers[0].backplane.published == 1
+    assert managers[1].backplane.received == 1
+    assert not hub.subscribers["test"]
+
+
+def test_user_changed_reaches_other_workers() -> None:
+    hub = MemoryHub()
+    changed: List[List[str]] = [[], []]
+    managers = [
+        ConnectionManager(
+            queue_size=8,
+            send_timeout=1,
+            overflow=DROP_OLDEST,
+            backplane=MemoryBackplane(channel="test", hub=hub),
+            user_changed=changed[i].append,
+        )
+        for i in range(2)
+    ]
+
+    async def talk() -> None:
+        for manager in managers:
+            await manager.start()
+        managers[0].publish_user_changed_threadsafe("user")
+        await asyncio.sleep(0.01)
+        for manager in managers:
+            await manager.stop()
+
+    asyncio.get_event_loop().run_until_complete(talk())
+    # 보낸 워커는 이미 자기 캐시를 지웠으므로 다시 받지 않음
+    assert changed == [[], ["user"]]
+
+
+def test_postgres_backplane_oversized_payload() -> None:
+    delta = ScheduleDelta(create_uuid(), create_uuid())
+    delta.version = 3
+    for _ in range(100):
+        delta.add_block(
+            {
+                "id": create_uuid(),
+                "day": 1,
+                "start_time": 9,
+                "start_minute": 0,
+                "end_time": 9,
+                "end_minute": 29,
+                "label": random_lower_string(),
+            }
+        )
+    message = delta.to_message()
+    assert len(message.encode()) > POSTGRES_PAYLOAD_LIMIT
+
+    channel = "test_" + random_lower_string()
+    managers = [
+        ConnectionManager(
+            queue_size=8,
+            send_timeout=1,
+            overflow=DROP_OLDEST,
+            backplane=create_backplane(POSTGRES, channel=channel),
+        )
+        for _ in range(2)
+    ]
+    sockets = [RecordingWebSocket() for _ in range(2)]
+
+    async def talk() -> None:
+        for manager in managers:
+            await manager.start()
+        clients = [
+            await manager.connect(socket, delta.table_id)  # type: ignore
+            for manager, socket in zip(managers, sockets)
+        ]
+        await managers[0].publish(delta.table_id, message, delta.to_refetch_message())
+        # fallback 이 없으면 다른 워커로 보내지 못함
+        await managers[0].publish(delta.table_id, message)
+        for _ in range(50):
+            if len(sockets[0].sent) == 2 and sockets[1].sent:
+                break
+            await asyncio.sleep(0.1)
+        for manager, client in zip(managers, clients):
+            manager.disconnect(client)
+        for manager in managers:
+            await manager.stop()
+
+    asyncio.get_event_loop().run_until_complete(talk())
+    assert sockets[0].sent == [message, message]
+    assert [json.loads(sent) for sent in sockets[1].sent] == [
+        {
+            "type": REFETCH_EVENT_TYPE,
+            "timetable_id": delta.table_id,
+            "user_id": delta.user_id,
+            "version": 3,
+        }
+    ]
+    backplane = managers[0].backplane
+    assert (backplane.published, backplane.fallbacks, backplane.errors) == (1, 1, 1)
+
+
+def test_redis_backplane() -> None:
+    # 같은 가짜 Redis 서버에 붙은 두 워커
+    server = fakeredis.FakeServer()
+    managers = [
+        ConnectionManager(
+            queue_size=8,
+            send_timeout=1,
+            overflow=DROP_OLDEST,
+            backplane=RedisBackplane(
+                url="redis://localhost",
+                channel="test",
+                reconnect_seconds=0.1,
+                client=fakeredis.aioredis.FakeRedis(
+                    server=server, decode_responses=True
+                ),
+            ),
+        )
+        for _ in range(2)
+    ]
+    sockets = [RecordingWebSocket() for _ in range(3)]
+
+    async def talk() -> None:
+        for manager in managers:
+            await manager.start()
+        assert all(manager.backplane.stats()["connected"] for manager in managers)
+        clients = [
+            await managers[0].connect(sockets[0], "a"),  # type: ignore
+            await managers[1].connect(sockets[1], "a"),  # type: ignore
+            await managers[1].connect(sockets[2], "b"),  # type: ignore
+        ]
+        await managers[0].publish("a", "hello")
+        await managers[1].publish("b", "안녕")
+        for _ in range(50):
+            if sockets[1].sent and sockets[2].sent:
+                break
+            await asyncio.sleep(0.01)
+        for manager, client in zip(managers + managers[1:], clients):
+            manager.disconnect(client)
+        for manager in managers:
+            await manager.stop()
+
+    asyncio.get_event_loop().run_until_complete(talk())
+    assert [socket.sent for socket in sockets] == [["hello"], ["hello"], ["안녕"]]
+    assert [manager.backplane.published for manager in managers] == [1, 1]
+    assert [manager.backplane.received for manager in managers] == [1, 1]
+    assert [manager.backplane.errors for manager in managers] == [0, 0]
+
+
+def test_ws_rooms(db: Session) -> None:
+    superuser = crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER)
+    assert superuser is not None
+    auth_header = get_auth_header(user_id=superuser.id)
+
+    async def talk(host: str) -> None:
+        url = f"ws://{host}{settings.API_V1_STR}/ws"
+        async with aiohttp.ClientSession() as session:
+            a1 = await session.ws_connect(f"{url}/a")
+            a2 = await session.ws_connect(f"{url}/a")
+            b1 = await session.ws_connect(f"{url}/b")
+
+            await a1.send_str("hello")
+            assert await a1.receive_str(timeout=5) == "a: hello"
+            assert await a2.receive_str(timeout=5) == "a: hello"
+            with pytest.raises(asyncio.TimeoutError):
+                await b1.receive_str(timeout=0.3)
+
+            await a1.close()
+            await a2.send_str("bye")
+            assert await a2.receive_str(timeout=5) == "a: bye"
+            await a2.close()
+            await b1.close()
+
+    with run_server() as host:
+        asyncio.get_event_loop().run_until_complete(talk(host))
+        metrics_url = f"http://{host}{settings.API_V1_STR}/metrics/websocket"
+        for _ in range(50):
+            metrics = requests.get(metrics_url, headers=auth_header).json()
+            if metrics["connections"] == 0:
+                break
+            asyncio.get_event_loop().run_until_complete(asyncio.sleep(0.1))
+        assert metrics["connections"] == 0
+        assert metrics["rooms"] == 0
+
+
+def test_ws_rooms_across_workers(db: Session) -> None:
+    superuser = crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER)
+    assert superuser is not None
+    auth_header = get_auth_header(user_id=superuser.id)
+    env = {"BROADCAST_BACKEND": "postgres"}
+
+    async def talk(first: str, second: str) -> None:
+        async with aiohttp.ClientSession() as session:
+            a1 = await session.ws_connect(f"ws://{first}{settings.API_V1_STR}/ws/a")
+            a2 = await session.ws_connect(f"ws://{second}{settings.API_V1_STR}/ws/a")
+            b1 = await session.ws_connect(f"ws://{second}{settings.API_V1_STR}/ws/b")
+
+            await a1.send_str("hello")
+            assert await a1.receive_str(timeout=5) == "a: hello"
+            assert await a2.receive_str(timeout=5) == "a: hello"
+            await a2.send_str("hi")
+            assert await a1.receive_str(timeout=5) == "a: hi"
+            assert await a2.receive_str(timeout=5) == "a: hi"
+            with pytest.raises(asyncio.TimeoutError):
+                await b1.receive_str(timeout=0.3)
+            # 같은 워커에서 보낸 메시지를 backplane 으로 한 번 더 받지 않음
+            with pytest.raises(asyncio.TimeoutError):
+                await a1.receive_str(timeout=0.3)
+
+            for ws in (a1, a2, b1):
+                await ws.close()
+
+    with run_server(env=env) as first, run_server(env=env) as second:
+        asyncio.get_event_loop().run_until_complete(talk(first, second))
+        for host in (first, second):
+            metrics = requests.get(
+                f"http://{host}{settings.API_V1_STR}/metrics/websocket",
+                headers=auth_header,
+            ).json()
+            assert metrics["backplane"]["backend"] == "postgres"
+            assert metrics["backplane"]["published"] == 1
+            assert metrics["backplane"]["received"] == 1
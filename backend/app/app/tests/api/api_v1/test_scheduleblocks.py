@@ -0,0 +1,517 @@
+import asyncio
+import json
+import zlib
+from typing import List, Optional
+
+import aiohttp
+import msgpack
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.types import Message, Receive, Scope, Send
+
+from app import crud, schemas
+from app.api.formats import COLUMNS_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, NDJSON_MEDIA_TYPE
+from app.benchmarks.server import run_server
+from app.core import compression
+from app.core.availability import FULL_DAY
+from app.core.config import settings
+from app.models.availability_count import AvailabilityCount
+from app.tests.utils.db import AsyncRunner
+from app.tests.utils.timetable import create_random_timetable
+from app.tests.utils.user import create_random_user, get_auth_header
+from app.tests.utils.utils import random_lower_string
+
+
+def test_create_all_scheduleblocks(client: TestClient, db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    auth_header = get_auth_header(user_id=user.id)
+
+    r = client.post(
+        f"{settings.API_V1_STR}/scheduleblocks/all",
+        headers=auth_header,
+        params={"timetable_id": timetable.id},
+    )
+    assert r.status_code == 201
+    scheduleblocks = r.json()
+    assert len(scheduleblocks) == 7 * 24
+    assert all(block["user_id"] == user.id for block in scheduleblocks)
+
+
+def test_patch_and_delete_bitmap_cell(client: TestClient, db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    auth_header = get_auth_header(user_id=user.id)
+
+    r = client.post(
+        f"{settings.API_V1_STR}/scheduleblocks/day",
+        headers=auth_header,
+        params={"timetable_id": timetable.id, "day": 1},
+    )
+    cell = r.json()[0]
+
+    data = [{**cell, "start_time": 8, "end_time": 9, "end_minute": 30}]
+    r = client.patch(
+        f"{settings.API_V1_STR}/scheduleblocks", headers=auth_header, json=data
+    )
+    assert r.status_code == 201
+    updated = r.json()[0]
+    assert updated["end_time"] == 9
+    assert updated["id"] != cell["id"]
+
+    r = client.delete(
+        f"{settings.API_V1_STR}/scheduleblocks/{updated['id']}", headers=auth_header
+    )
+    assert r.status_code == 200
+
+    r = client.get(f"{settings.API_V1_STR}/timetables/{timetable.id}/scheduleblocks")
+    assert len(r.json()) == 24 - 1
+
+
+def test_get_availability(client: TestClient, db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    auth_header = get_auth_header(user_id=user.id)
+    client.post(
+        f"{settings.API_V1_STR}/scheduleblocks/time",
+        headers=auth_header,
+        params={"timetable_id": timetable.id, "start_time": 13},
+    )
+
+    r = client.get(f"{settings.API_V1_STR}/timetables/{timetable.id}/availability")
+    assert r.status_code == 200
+    availability = r.json()
+    assert availability["participant_count"] == 1
+    for day in availability["days"]:
+        assert len(day["slots"]) == 24
+        assert day["slots"][13]["user_ids"] == [user.id]
+        assert day["slots"][12]["count"] == 0
+
+    r = client.get(
+        f"{settings.API_V1_STR}/timetables/{timetable.id}/availability",
+        params={"slot_minutes": 30},
+        headers={"If-None-Match": r.headers["etag"]},
+    )
+    assert r.status_code == 200
+    assert len(r.json()["days"][0]["slots"]) == 48
+
+
+def test_get_scheduleblocks_not_modified(client: TestClient, db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    auth_header = get_auth_header(user_id=user.id)
+    url = f"{settings.API_V1_STR}/timetables/{timetable.id}/scheduleblocks"
+
+    r = client.get(url)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+    assert not r.content
+
+    client.post(
+        f"{settings.API_V1_STR}/scheduleblocks/time",
+        headers=auth_header,
+        params={"timetable_id": timetable.id, "start_time": 10},
+    )
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert len(r.json()) == 7
+    assert r.headers["etag"] != etag
+
+    r = client.get(f"{url}/me", headers=auth_header)
+    etag = r.headers["etag"]
+    r = client.get(f"{url}/me", headers={**auth_header, "If-None-Match": etag})
+    assert r.status_code == 304
+    client.patch(
+        f"{settings.API_V1_STR}/users/me", headers=auth_header, json={"nickname": "a"}
+    )
+    r = client.get(f"{url}/me", headers={**auth_header, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()[0]["nickname"] == "a"
+
+
+def test_get_scheduleblocks_matches_response_model(
+    client: TestClient, db: Session
+) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    auth_header = get_auth_header(user_id=user.id)
+    client.post(
+        f"{settings.API_V1_STR}/scheduleblocks/time",
+        headers=auth_header,
+        params={"timetable_id": timetable.id, "start_time": 9},
+    )
+    client.post(
+        f"{settings.API_V1_STR}/scheduleblocks",
+        headers=auth_header,
+        json={
+            "table_id": timetable.id,
+            "start_time": 12,
+            "start_minute": 30,
+            "end_time": 13,
+            "end_minute": 0,
+            "day": 4,
+            "label": "점심",
+        },
+    )
+
+    r = client.get(f"{settings.API_V1_STR}/timetables/{timetable.id}/scheduleblocks")
+    assert r.headers["content-type"] == "application/json"
+    expected = [
+        schemas.ScheduleBlock.from_orm(block).dict()
+        for block in crud.scheduleblock.get_all(db, table_id=timetable.id)
+    ]
+    assert sorted(r.json(), key=lambda block: block["id"]) == sorted(
+        expected, key=lambda block: block["id"]
+    )
+    assert list(r.json()[0]) == list(schemas.ScheduleBlock.__fields__)
+
+
+def test_get_scheduleblocks_columns(client: TestClient, db: Session) -> None:
+    timetable = create_random_timetable(db)
+    users = [create_random_user(db) for _ in range(2)]
+    for user, day in zip(users, (1, 2)):
+        client.post(
+            f"{settings.API_V1_STR}/scheduleblocks/day",
+            headers=get_auth_header(user_id=user.id),
+            params={"timetable_id": timetable.id, "day": day},
+        )
+    url = f"{settings.API_V1_STR}/timetables/{timetable.id}/scheduleblocks"
+    blocks = client.get(url).json()
+
+    r = client.get(url, headers={"Accept": COLUMNS_MEDIA_TYPE})
+    assert r.headers["content-type"] == COLUMNS_MEDIA_TYPE
+    assert "Accept" in r.headers["vary"].split(", ")
+    table = r.json()
+    assert table["table_id"] == timetable.id
+    participants = table["participants"]
+    assert sorted(participants["user_id"]) == sorted(user.id for user in users)
+    columns = table["blocks"]
+    assert len(columns["id"]) == len(blocks) == 48
+    rebuilt = [
+        {
+            **{field: values[i] for field, values in columns.items()},
+            "table_id": table["table_id"],
+            **{
+                field: values[columns["participant"][i]]
+                for field, values in participants.items()
+            },
+        }
+        for i in range(len(columns["id"]))
+    ]
+    for block in rebuilt:
+        del block["participant"]
+    assert rebuilt == blocks
+
+    r = client.get(url, params={"format": "msgpack"})
+    assert r.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert msgpack.unpackb(r.content) == table
+    assert len(r.content) * 4 < len(client.get(url).content)
+
+    etag = r.headers["etag"]
+    assert etag != client.get(url).headers["etag"]
+    r = client.get(url, params={"format": "msgpack"}, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    r = client.get(
+        f"{url}/me",
+        headers={**get_auth_header(user_id=users[0].id), "Accept": COLUMNS_MEDIA_TYPE},
+    )
+    assert r.json()["participants"]["user_id"] == [users[0].id]
+    assert r.json()["blocks"]["day"] == [1] * 24
+
+    assert client.get(url, params={"format": "xml"}).status_code == 422
+
+
+def test_get_scheduleblocks_compressed(client: TestClient, db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    client.post(
+        f"{settings.API_V1_STR}/scheduleblocks/all",
+        headers=get_auth_header(user_id=user.id),
+        params={"timetable_id": timetable.id},
+    )
+    url = f"{settings.API_V1_STR}/timetables/{timetable.id}/scheduleblocks"
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    r = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept, Accept-Encoding"
+    assert int(r.headers["content-length"]) * 10 < len(plain.content)
+    assert r.json() == plain.json()
+    if compression.brotli is not None:
+        r = client.get(url, headers={"Accept-Encoding": "gzip, br"})
+        assert r.headers["content-encoding"] == "br"
+        assert r.json() == plain.json()
+        r = client.get(url, headers={"Accept-Encoding": "gzip, br;q=0"})
+        assert r.headers["content-encoding"] == "gzip"
+
+    r = client.get(
+        url, headers={"Accept-Encoding": "gzip", "If-None-Match": r.headers["etag"]}
+    )
+    assert r.status_code == 304
+    assert "content-encoding" not in r.headers
+
+    r = client.get(
+        f"{settings.API_V1_STR}/timetables/{timetable.id}",
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert r.status_code == 200
+    assert "content-encoding" not in r.headers
+
+
+def test_compression_flushes_each_streamed_chunk() -> None:
+    # 스트리밍 응답의 조각마다 압축한 것을 바로 보내서, 받는 쪽이 다음 조각을 기다리지 않고 풀 수 있어야 함
+    chunks = [json.dumps({"n": n}).encode() + b"\n" for n in range(3)]
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", NDJSON_MEDIA_TYPE.encode())],
+            }
+        )
+        for n, chunk in enumerate(chunks):
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": n < len(chunks) - 1,
+                }
+            )
+
+    middleware = compression.CompressionMiddleware(
+        app,
+        minimum_size=1024,
+        content_types=[NDJSON_MEDIA_TYPE],
+        gzip_level=6,
+        brotli_quality=4,
+    )
+    encodings = [compression.GZIP]
+    if compression.brotli is not None:
+        encodings.append(compression.BROTLI)
+    for encoding in encodings:
+        sent: List[Message] = []
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        scope = {"type": "http", "headers": [(b"accept-encoding", encoding.encode())]}
+        asyncio.get_event_loop().run_until_complete(
+            middleware(scope, None, send)  # type: ignore
+        )
+        headers = Headers(raw=sent[0]["headers"])
+        assert headers["content-encoding"] == encoding
+        assert "content-length" not in headers
+        assert len(sent) == len(chunks) + 1
+        if encoding == compression.GZIP:
+            decompress = zlib.decompressobj(31).decompress
+        else:
+            decompress = compression.brotli.Decompressor().process
+        for chunk, message in zip(chunks, sent[1:]):
+            assert decompress(message["body"]) == chunk
+
+
+def test_scheduleblock_writes_push_deltas(db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    auth_header = get_auth_header(user_id=user.id)
+
+    async def watch(host: str) -> None:
+        url = f"http://{host}{settings.API_V1_STR}/scheduleblocks/day"
+        params = {"timetable_id": timetable.id, "day": 3}
+        async with aiohttp.ClientSession(headers=auth_header) as session:
+            ws = await session.ws_connect(
+                f"ws://{host}{settings.API_V1_STR}/ws/{timetable.id}"
+            )
+            async with session.post(url, params=params) as r:
+                assert r.status == 201
+            filled = json.loads(await ws.receive_str(timeout=5))
+            async with session.delete(url, params=params) as r:
+                assert r.status == 202
+            cleared = json.loads(await ws.receive_str(timeout=5))
+            await ws.close()
+
+        day = [0, 0, 0, FULL_DAY, 0, 0, 0]
+        assert filled["timetable_id"] == cleared["timetable_id"] == timetable.id
+        assert filled["user_id"] == user.id
+        assert filled["added"] == {"hours": day}
+        assert cleared["removed"] == {"hours": day}
+        assert cleared["version"] == filled["version"] + 1
+
+    with run_server() as host:
+        asyncio.get_event_loop().run_until_complete(watch(host))
+
+
+def test_get_availability_counts(client: TestClient, db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    auth_header = get_auth_header(user_id=user.id)
+    url = f"{settings.API_V1_STR}/timetables/{timetable.id}/availability/counts"
+
+    r = client.get(url)
+    assert r.status_code == 200
+    assert r.json()["participant_count"] == 0
+    etag = r.headers["etag"]
+    # 미리 센 값이 없던 조회는 응답 뒤에 집계를 저장함
+    assert db.get(AvailabilityCount, timetable.id) is not None
+
+    client.post(
+        f"{settings.API_V1_STR}/scheduleblocks/time",
+        headers=auth_header,
+        params={"timetable_id": timetable.id, "start_time": 13},
+    )
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    counts = r.json()
+    assert counts["participant_count"] == 1
+    for day in counts["days"]:
+        assert len(day["counts"]) == 24
+        assert day["counts"][13] == 1
+        assert day["counts"][12] == 0
+
+    r = client.get(url, headers={"If-None-Match": r.headers["etag"]})
+    assert r.status_code == 304
+
+
+def test_get_scheduleblocks_pages(
+    client: TestClient, db: Session, run_async: AsyncRunner
+) -> None:
+    timetable = create_random_timetable(db)
+    for _ in range(2):
+        user = create_random_user(db)
+        run_async(
+            lambda async_db: crud.async_scheduleblock.replace_day_by_user_id(
+                async_db, table_id=timetable.id, user_id=user.id, day=0
+            )
+        )
+    url = f"{settings.API_V1_STR}/timetables/{timetable.id}/scheduleblocks"
+
+    blocks = []
+    next_url: Optional[str] = f"{url}?limit=20"
+    while next_url:
+        r = client.get(next_url)
+        assert r.status_code == 200
+        blocks += r.json()
+        next_url = r.links.get("next", {}).get("url")
+    assert len(blocks) == 48
+    assert sorted(blocks, key=lambda block: block["id"]) == sorted(
+        client.get(url).json(), key=lambda block: block["id"]
+    )
+
+    r = client.get(url, params={"limit": 20, "cursor": "not-a-cursor"})
+    assert r.status_code == 400
+
+    # 페이지와 limit 마다 ETag 가 달라서 다른 페이지의 ETag 로 304 를 받지 않음
+    first = client.get(url, params={"limit": 20})
+    second_url = first.links["next"]["url"]
+    etag = first.headers["etag"]
+    assert etag != client.get(url).headers["etag"]
+    r = client.get(url, params={"limit": 20}, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    r = client.get(second_url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()
+    r = client.get(second_url, headers={"If-None-Match": r.headers["etag"]})
+    assert r.status_code == 304
+    r = client.get(url, params={"limit": 10}, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+
+
+def test_stream_scheduleblocks_ndjson(
+    client: TestClient, db: Session, run_async: AsyncRunner
+) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    run_async(
+        lambda async_db: crud.async_scheduleblock.replace_all_by_user_id(
+            async_db, table_id=timetable.id, user_id=user.id
+        )
+    )
+    url = f"{settings.API_V1_STR}/timetables/{timetable.id}/scheduleblocks"
+
+    r = client.get(
+        url, params={"format": "ndjson"}, headers={"Accept-Encoding": "identity"}
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"] == NDJSON_MEDIA_TYPE
+    compressed = client.get(
+        url, params={"format": "ndjson"}, headers={"Accept-Encoding": "gzip"}
+    )
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.content == r.content
+    lines = r.content.decode().splitlines()
+    blocks = [json.loads(line) for line in lines]
+    assert len(blocks) == 7 * 24
+    assert [(block["day"], block["start_time"]) for block in blocks] == [
+        (day, hour) for day in range(7) for hour in range(24)
+    ]
+    assert sorted(blocks, key=lambda block: block["id"]) == sorted(
+        client.get(url).json(), key=lambda block: block["id"]
+    )
+
+
+def test_get_scheduleblocks_expand(client: TestClient, db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    scheduleblock_in = schemas.ScheduleBlockCreate(
+        table_id=timetable.id,
+        start_time=9,
+        start_minute=30,
+        end_time=11,
+        end_minute=59,
+        day=4,
+        label=random_lower_string(),
+    )
+    block = crud.scheduleblock.create_with_user_id(
+        db, obj_in=scheduleblock_in, user_id=user.id
+    )
+    url = f"{settings.API_V1_STR}/timetables/{timetable.id}/scheduleblocks"
+
+    r = client.get(url)
+    assert [item["id"] for item in r.json()] == [block.id]
+    expanded = client.get(url, params={"expand": True})
+    assert expanded.status_code == 200
+    assert expanded.headers["etag"] != r.headers["etag"]
+    assert [
+        (item["id"], item["start_time"], item["start_minute"], item["end_time"])
+        for item in expanded.json()
+    ] == [
+        (f"{block.id}-{hour}", hour, 30 if hour == 9 else 0, hour)
+        for hour in (9, 10, 11)
+    ]
+
+    lines = client.get(url, params={"expand": True, "format": "ndjson"}).content
+    assert [json.loads(line) for line in lines.decode().splitlines()] == expanded.json()
+
+
+def test_get_free_participants(
+    client: TestClient, db: Session, run_async: AsyncRunner
+) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    run_async(
+        lambda async_db: crud.async_scheduleblock.replace_time_by_user_id(
+            async_db, table_id=timetable.id, user_id=user.id, start_time=14
+        )
+    )
+    url = f"{settings.API_V1_STR}/timetables/{timetable.id}/availability/free"
+    window = {"day": 2, "start_time": 14, "start_minute": 10, "end_minute": 39}
+
+    r = client.get(url, params={**window, "end_time": 14})
+    assert r.status_code == 200
+    assert r.json()["covering_user_ids"] == [user.id]
+    assert r.json()["duration_minutes"] == 30
+
+    r = client.get(url, params={**window, "end_time": 15})
+    assert r.json()["covering_user_ids"] == []
+    assert r.json()["partial_user_ids"] == [user.id]
+
+    r = client.get(url, params={**window, "end_time": 24})
+    assert r.status_code == 400
@@ -1,8 +1,17 @@
+import asyncio
+import time
+from typing import Generator
+
+import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app import crud
+from app.api import deps
+from app.benchmarks.fake_kakao import FakeKakaoServer, FakeKakaoState, kakao_id
 from app.core.config import settings
+from app.core.kakao import KakaoClient
+from app.main import app
 from app.schemas.user import UserCreate
 from app.tests.utils.user import get_auth_header
 from app.tests.utils.utils import random_email, random_lower_string
@@ -49,3 +58,118 @@ def test_patch_user_me_empty_nickname(client: TestClient, db: Session) -> None:
     r = client.patch(f"{settings.API_V1_STR}/users/me", headers=auth_header, json=data)
 
     assert r.status_code == 400
+
+
+@pytest.fixture
+def fake_kakao() -> Generator:
+    server = FakeKakaoServer(FakeKakaoState()).start()
+    kakao_client = KakaoClient(
+        app_key=settings.KAKAO_APP_KEY,
+        auth_host=server.url,
+        api_host=server.url,
+        connect_timeout=1.0,
+        timeout=1.0,
+        max_connections=10,
+        retries=1,
+        retry_backoff=0.01,
+        circuit_failures=2,
+        circuit_reset_seconds=60.0,
+    )
+    app.dependency_overrides[deps.get_kakao_client] = lambda: kakao_client
+    yield server, kakao_client
+    del app.dependency_overrides[deps.get_kakao_client]
+    asyncio.get_event_loop().run_until_complete(kakao_client.close())
+    server.stop()
+
+
+def test_login_with_kakao(client: TestClient, db: Session, fake_kakao: tuple) -> None:
+    code = random_lower_string()
+    data = {"code": code, "redirect_uri": "http://localhost/login"}
+
+    r = client.post(f"{settings.API_V1_STR}/users/login", json=data)
+    assert r.status_code == 200
+    assert r.json()["token_type"] == "bearer"
+    user = crud.user.get_by_kakao_id(db, kakao_id=kakao_id(code))
+    assert user
+
+    r = client.post(
+        f"{settings.API_V1_STR}/users/login", json={**data, "code": "invalid-" + code}
+    )
+    assert r.status_code == 401
+
+
+def test_login_with_kakao_unavailable(client: TestClient, fake_kakao: tuple) -> None:
+    server, kakao_client = fake_kakao
+    server.stop()
+    data = {"code": random_lower_string(), "redirect_uri": "http://localhost/login"}
+
+    for _ in range(2):
+        r = client.post(f"{settings.API_V1_STR}/users/login", json=data)
+        assert r.status_code == 503
+    assert kakao_client.circuit.state == "open"
+    r = client.post(f"{settings.API_V1_STR}/users/login", json=data)
+    assert r.status_code == 503
+
+
+def test_kakao_circuit_cancelled_trial(fake_kakao: tuple) -> None:
+    server, kakao_client = fake_kakao
+    circuit = kakao_client.circuit
+    circuit.opened_at = time.monotonic() - circuit.reset_seconds
+    code = random_lower_string()
+
+    async def cancel_trial() -> None:
+        server.state.latency = 0.5
+        trial = asyncio.ensure_future(
+            kakao_client.get_user_by_code(code, "http://localhost/login")
+        )
+        await asyncio.sleep(0.1)
+        assert circuit.trial
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(cancel_trial())
+    assert circuit.state == "half-open"
+    assert not circuit.trial
+
+    # 취소된 시험 요청 다음 요청이 다시 시험하고, 성공하면 닫힘
+    server.state.latency = 0.0
+    kakao_user = loop.run_until_complete(
+        kakao_client.get_user_by_code(code, "http://localhost/login")
+    )
+    assert kakao_user["id"] == kakao_id(code)
+    assert circuit.state == "closed"
+
+
+def test_patch_user_me_refreshes_cached_user(client: TestClient, db: Session) -> None:
+    user = crud.user.create(db, obj_in=UserCreate(email=random_email()))
+    auth_header = get_auth_header(user_id=user.id)
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=auth_header)
+    assert r.json()["nickname"] is None
+
+    nickname = random_lower_string()
+    data = {"nickname": nickname}
+    r = client.patch(f"{settings.API_V1_STR}/users/me", headers=auth_header, json=data)
+    assert 200 <= r.status_code < 300
+
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=auth_header)
+    assert r.json()["nickname"] == nickname
+
+
+def test_get_user_cache_metrics(client: TestClient, db: Session) -> None:
+    user = crud.user.create(db, obj_in=UserCreate(email=random_email()))
+    r = client.get(
+        f"{settings.API_V1_STR}/metrics/user-cache",
+        headers=get_auth_header(user_id=user.id),
+    )
+    assert r.status_code == 403
+
+    superuser = crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER)
+    assert superuser is not None
+    r = client.get(
+        f"{settings.API_V1_STR}/metrics/user-cache",
+        headers=get_auth_header(user_id=superuser.id),
+    )
+    assert r.status_code == 200
+    assert {"hits", "misses", "size", "maxsize", "ttl_seconds"} <= set(r.json())
@@ -5,6 +5,7 @@ from fastapi.testclient import TestClient
 
 from app.db.session import SessionLocal
 from app.main import app
+from app.tests.utils.db import AsyncRunner
 
 
 @pytest.fixture(scope="session")
@@ -16,3 +17,10 @@ def db() -> Generator:
 def client() -> Generator:
     with TestClient(app) as c:
         yield c
+
+
+@pytest.fixture
+def run_async() -> Generator:
+    runner = AsyncRunner()
+    yield runner
+    runner.close()
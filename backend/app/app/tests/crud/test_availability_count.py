@@ -0,0 +1,259 @@
+import threading
+from typing import List
+
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.security import create_uuid
+from app.db.session import SessionLocal
+from app.models.availability_count import AvailabilityCount
+from app.models.scheduleblock import ScheduleBlock
+from app.schemas.scheduleblock import ScheduleBlockCreate
+from app.tests.utils.db import AsyncRunner
+from app.tests.utils.timetable import create_random_timetable
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+def heatmap_counts(db: Session, table_id: str) -> List[List[int]]:
+    heatmap = crud.scheduleblock.get_heatmap(
+        db, table_id=table_id, slot_minutes=crud.availability_count.slot_minutes
+    )
+    return [[slot["count"] for slot in day["slots"]] for day in heatmap["days"]]
+
+
+def stored_counts(db: Session, table_id: str) -> List[List[int]]:
+    counts = crud.availability_count.get(db, table_id=table_id)
+    return [day["counts"] for day in counts["days"]]
+
+
+def test_counts_follow_writes(db: Session, run_async: AsyncRunner) -> None:
+    timetable = create_random_timetable(db)
+    user_1 = create_random_user(db)
+    user_2 = create_random_user(db)
+    run_async(
+        lambda async_db: crud.async_scheduleblock.replace_day_by_user_id(
+            async_db, table_id=timetable.id, user_id=user_1.id, day=1
+        )
+    )
+    assert stored_counts(db, timetable.id) == heatmap_counts(db, timetable.id)
+
+    scheduleblock_in = ScheduleBlockCreate(
+        table_id=timetable.id,
+        start_time=9,
+        start_minute=0,
+        end_time=11,
+        end_minute=59,
+        day=2,
+        label=random_lower_string(),
+    )
+    block = crud.scheduleblock.create_with_user_id(
+        db, obj_in=scheduleblock_in, user_id=user_2.id
+    )
+    counts = crud.availability_count.get(db, table_id=timetable.id)
+    assert counts["participant_count"] == 2
+    assert counts["days"][1]["counts"] == [1] * 24
+    assert counts["days"][2]["counts"][9:12] == [1, 1, 1]
+    assert stored_counts(db, timetable.id) == heatmap_counts(db, timetable.id)
+
+    crud.scheduleblock.delete_day_by_user_id(
+        db, table_id=timetable.id, user_id=user_1.id, day=1
+    )
+    crud.scheduleblock.remove(db, id=block.id)
+    assert stored_counts(db, timetable.id) == heatmap_counts(db, timetable.id)
+
+    async def replace_time(async_db: AsyncSession) -> None:
+        await crud.async_scheduleblock.replace_time_by_user_id(
+            async_db, table_id=timetable.id, user_id=user_2.id, start_time=13
+        )
+
+    run_async(replace_time)
+    counts = crud.availability_count.get(db, table_id=timetable.id)
+    assert all(day["counts"][13] == 1 for day in counts["days"])
+    assert stored_counts(db, timetable.id) == heatmap_counts(db, timetable.id)
+    assert not crud.availability_count.check(db, table_id=timetable.id)["drift"]
+
+
+def test_check_reports_and_repairs_drift(db: Session, run_async: AsyncRunner) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    report = crud.availability_count.check(db, table_id=timetable.id)
+    assert report["stale"] and not report["drift"]
+
+    run_async(
+        lambda async_db: crud.async_scheduleblock.replace_time_by_user_id(
+            async_db, table_id=timetable.id, user_id=user.id, start_time=10
+        )
+    )
+    db.execute(
+        update(AvailabilityCount)
+        .where(AvailabilityCount.table_id == timetable.id)
+        .values(counts=[0] * crud.availability_count.count, participant_count=3)
+    )
+    db.commit()
+
+    report = crud.availability_count.check(db, table_id=timetable.id)
+    assert report["drift"] and not report["repaired"]
+    assert report["drifted_slots"] == [day * 24 + 10 for day in range(7)]
+    assert report["stored_participant_count"] == 3
+    assert report["expected_participant_count"] == 1
+
+    report = crud.availability_count.check(db, table_id=timetable.id, repair=True)
+    assert report["repaired"]
+    assert not crud.availability_count.check(db, table_id=timetable.id)["drift"]
+    assert stored_counts(db, timetable.id) == heatmap_counts(db, timetable.id)
+
+
+def test_get_stale_counts_does_not_write(db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    db.execute(
+        insert(ScheduleBlock).values(
+            id=create_uuid(),
+            table_id=timetable.id,
+            user_id=user.id,
+            day=3,
+            start_time=9,
+            start_minute=0,
+            end_time=9,
+            end_minute=29,
+        )
+    )
+    db.commit()
+
+    stale: List[str] = []
+    counts = crud.availability_count.get(
+        db, table_id=timetable.id, on_stale=stale.append
+    )
+    assert counts["participant_count"] == 1
+    assert counts["days"][3]["counts"][9] == 0
+    assert stale == [timetable.id]
+    db.rollback()
+    assert db.get(AvailabilityCount, timetable.id) is None
+
+
+def test_refresh_reads_only_changed_days(db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+
+    def add_block(day: int, hour: int) -> None:
+        scheduleblock_in = ScheduleBlockCreate(
+            table_id=timetable.id,
+            start_time=hour,
+            start_minute=0,
+            end_time=hour,
+            end_minute=59,
+            day=day,
+            label=random_lower_string(),
+        )
+        crud.scheduleblock.create_with_user_id(
+            db, obj_in=scheduleblock_in, user_id=user.id
+        )
+
+    add_block(1, 9)
+    # 변경을 남기지 않고 넣은 행은 그 요일이 다시 바뀌기 전까지 집계에 들어가지 않음
+    db.execute(
+        insert(ScheduleBlock).values(
+            id=create_uuid(),
+            table_id=timetable.id,
+            user_id=user.id,
+            day=3,
+            start_time=14,
+            start_minute=0,
+            end_time=14,
+            end_minute=59,
+        )
+    )
+    db.commit()
+    add_block(1, 11)
+
+    counts = stored_counts(db, timetable.id)
+    assert counts[1][9] == counts[1][11] == 1
+    assert counts[3][14] == 0
+    report = crud.availability_count.check(db, table_id=timetable.id)
+    assert report["drifted_slots"] == [3 * 24 + 14]
+
+    add_block(3, 16)
+    assert not crud.availability_count.check(db, table_id=timetable.id)["drift"]
+
+
+def test_short_block_on_other_day_keeps_participant(db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    short_in = ScheduleBlockCreate(
+        table_id=timetable.id,
+        start_time=9,
+        start_minute=0,
+        end_time=9,
+        end_minute=9,
+        day=2,
+        label=random_lower_string(),
+    )
+    crud.scheduleblock.create_with_user_id(db, obj_in=short_in, user_id=user.id)
+    block_in = ScheduleBlockCreate(
+        table_id=timetable.id,
+        start_time=10,
+        start_minute=0,
+        end_time=10,
+        end_minute=59,
+        day=1,
+        label=random_lower_string(),
+    )
+    block = crud.scheduleblock.create_with_user_id(db, obj_in=block_in, user_id=user.id)
+    crud.scheduleblock.remove(db, id=block.id)
+
+    counts = crud.availability_count.get(db, table_id=timetable.id)
+    assert counts["participant_count"] == 1
+    assert not any(any(day["counts"]) for day in counts["days"])
+    assert not crud.availability_count.check(db, table_id=timetable.id)["drift"]
+
+
+def test_rebuild_does_not_deadlock_with_writers(db: Session) -> None:
+    # 집계를 다시 만드는 쓰기가 잡는 타임테이블 잠금은, 블록을 넣어 외래 키로 KEY SHARE 를 잡은 채
+    # 버전을 올리려고 기다리는 다른 쓰기와 충돌하지 않아야 함
+    timetable = create_random_timetable(db)
+    users = [create_random_user(db) for _ in range(2)]
+    writer = SessionLocal()
+    rebuilder = SessionLocal()
+    errors: List[Exception] = []
+
+    def rebuild() -> None:
+        # 집계 행이 없으므로 커밋할 때 refresh 가 rebuild 로 다시 만듦
+        try:
+            crud.scheduleblock.replace_time_by_user_id(
+                rebuilder, table_id=timetable.id, user_id=users[1].id, start_time=10
+            )
+        except Exception as e:
+            errors.append(e)
+            rebuilder.rollback()
+
+    try:
+        writer.execute(
+            insert(ScheduleBlock).values(
+                id=create_uuid(),
+                table_id=timetable.id,
+                user_id=users[0].id,
+                day=1,
+                start_time=9,
+                start_minute=0,
+                end_time=9,
+                end_minute=29,
+            )
+        )
+        thread = threading.Thread(target=rebuild)
+        thread.start()
+        thread.join(timeout=1.0)
+        try:
+            writer.execute(crud.scheduleblock._bump_versions([timetable.id]))
+            writer.commit()
+        except Exception as e:
+            errors.append(e)
+            writer.rollback()
+        thread.join()
+    finally:
+        writer.close()
+        rebuilder.close()
+    assert errors == []
+    assert stored_counts(db, timetable.id) == heatmap_counts(db, timetable.id)
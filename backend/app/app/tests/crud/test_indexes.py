@@ -0,0 +1,217 @@
+import random
+import re
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ClauseElement
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from app import crud
+from app.core.availability import DAYS_PER_WEEK, MINUTES_PER_DAY, interval_fields
+from app.core.security import create_uuid
+from app.crud.crud_scheduleblock import ScheduleKey
+from app.crud.crud_user import bump_user_timetable_versions
+from app.db.base import Base
+from app.models.scheduleblock import ScheduleBlock
+from app.models.timetable import TimeTable
+from app.models.user import User
+
+TABLE_ID = create_uuid()
+USER_ID = create_uuid()
+
+# 로그인, 내 타임테이블, 스케쥴 블록 조회/삭제처럼 요청마다 실행되는 문
+HOT_QUERIES = {
+    "user_by_kakao_id": select(User).where(User.kakao_id == 1),
+    "user_by_email": select(User).where(User.email == "a@example.com"),
+    "timetables_by_user_id": select(TimeTable).where(
+        TimeTable.create_user_id == USER_ID
+    ),
+    "timetable_version": select(TimeTable.version).where(TimeTable.id == TABLE_ID),
+    "blocks_by_table_id": crud.scheduleblock._blocks_by_table.params(table_id=TABLE_ID),
+    "blocks_by_user_id": crud.scheduleblock._blocks_by_user.params(
+        table_id=TABLE_ID, user_id=USER_ID
+    ),
+    "blocks_by_ids": crud.scheduleblock._blocks_by_ids.params(
+        ids=[create_uuid(), create_uuid()]
+    ),
+    "availabilities_by_table_id": crud.scheduleblock._availabilities_by_table.params(
+        table_id=TABLE_ID
+    ),
+    "availabilities_by_user_id": crud.scheduleblock._availabilities_by_user.params(
+        table_id=TABLE_ID, user_id=USER_ID
+    ),
+    "availability_by_id": crud.scheduleblock._availability_by_id.params(
+        availability_id=create_uuid()
+    ),
+    "ordered_by_table": crud.scheduleblock._ordered_by_table.params(
+        **crud.scheduleblock._ordered_params(
+            table_id=TABLE_ID, user_id=None, after=None, limit=100
+        )
+    ),
+    "ordered_by_user": crud.scheduleblock._ordered_by_user.params(
+        **crud.scheduleblock._ordered_params(
+            table_id=TABLE_ID, user_id=USER_ID, after=None, limit=100
+        )
+    ),
+    "ordered_by_table_after": crud.scheduleblock._ordered_by_table.params(
+        **crud.scheduleblock._ordered_params(
+            table_id=TABLE_ID,
+            user_id=None,
+            after=ScheduleKey(USER_ID, 2, 9, ""),
+            limit=100,
+        )
+    ),
+    "blocks_in_window": crud.scheduleblock._blocks_in_window.params(
+        table_id=TABLE_ID, window_start=2 * 1440 + 850, window_end=2 * 1440 + 940
+    ),
+    "cells_in_window": crud.scheduleblock._cells_in_window.params(
+        table_id=TABLE_ID, day=2, window_hours=0b11 << 14
+    ),
+    "upsert_cells": crud.scheduleblock._upsert_cells.params(
+        **crud.scheduleblock._upsert_params(
+            table_id=TABLE_ID, user_id=USER_ID, masks=[1] * 7
+        )
+    ),
+    "lock_availability": crud.scheduleblock._lock_availability(
+        table_id=TABLE_ID, user_id=USER_ID
+    ),
+    "delete_all_blocks": crud.scheduleblock._delete_blocks(
+        table_id=TABLE_ID, user_id=USER_ID, criteria=[]
+    ),
+    "delete_day_blocks": crud.scheduleblock._delete_blocks(
+        table_id=TABLE_ID, user_id=USER_ID, criteria=[ScheduleBlock.day == 1]
+    ),
+    "delete_time_blocks": crud.scheduleblock._delete_blocks(
+        table_id=TABLE_ID, user_id=USER_ID, criteria=[ScheduleBlock.start_time == 9]
+    ),
+    "bump_versions": crud.scheduleblock._bump_versions([TABLE_ID]),
+    "bump_user_timetable_versions": bump_user_timetable_versions(USER_ID),
+}
+
+
+INDEX_SCANS = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+
+def plan_nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(db: Session, stmt: ClauseElement) -> List[Dict[str, Any]]:
+    """
+    seq scan 을 끈 채로 실행 계획을 봄
+    테스트 DB 의 행이 적어도, 쓸 수 있는 인덱스가 없을 때만 seq scan 이 남음
+    EXPLAIN 은 실행하지 않으므로 DELETE/UPDATE 도 데이터를 바꾸지 않음
+    """
+    connection = db.connection()
+    compiled = stmt.compile(
+        dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    try:
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        result = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        )
+        return list(plan_nodes(result.scalar_one()[0]["Plan"]))
+    finally:
+        db.rollback()
+
+
+def leading_column(db: Session, index_name: str) -> str:
+    return db.execute(
+        text("SELECT pg_get_indexdef(CAST(:name AS regclass), 1, true)"),
+        {"name": index_name},
+    ).scalar_one()
+
+
+def is_full_scan(db: Session, node: Dict[str, Any]) -> bool:
+    """
+    seq scan 을 끄면 맞는 인덱스가 없을 때 다른 인덱스를 처음부터 끝까지 읽는 계획이 나옴
+    인덱스의 첫 컬럼에 조건이 걸리지 않은 인덱스 스캔도 seq scan 과 같이 봄
+    """
+    if node["Node Type"] == "Seq Scan":
+        return True
+    if node["Node Type"] not in INDEX_SCANS:
+        return False
+    column = leading_column(db, node["Index Name"])
+    return not re.search(rf"\({column}[\s)]", node.get("Index Cond", ""))
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_queries_use_indexes(db: Session, name: str) -> None:
+    nodes = explain(db, HOT_QUERIES[name])
+    full_scans = [
+        node.get("Index Name", node.get("Relation Name"))
+        for node in nodes
+        if is_full_scan(db, node)
+    ]
+    assert not full_scans, f"{name} scans {full_scans}"
+
+
+def test_migrations_match_models(db: Session) -> None:
+    context = MigrationContext.configure(db.connection(), opts={"compare_type": True})
+    try:
+        assert compare_metadata(context, Base.metadata) == []
+    finally:
+        db.rollback()
+
+
+def test_blocks_in_window_combines_table_and_week_minutes(db: Session) -> None:
+    """
+    week_minutes GiST 인덱스에는 table_id 가 없음 (uuid 를 GiST 에 넣으려면 btree_gist 확장이 필요)
+    타임테이블이 여럿이면 두 조건을 각각 인덱스로 찾아 BitmapAnd 로 합치는지 확인
+    """
+    user_ids = [create_uuid() for _ in range(100)]
+    table_ids = [create_uuid() for _ in range(40)]
+    db.execute(insert(User), [{"id": user_id} for user_id in user_ids])
+    db.execute(
+        insert(TimeTable),
+        [{"id": table_id, "create_user_id": user_ids[0]} for table_id in table_ids],
+    )
+    blocks = []
+    for table_id in table_ids:
+        for user_id in user_ids:
+            # 요일을 겹치지 않게 골라서 같은 유저의 블록이 uc_time_table 에 걸리지 않게 함
+            for day in random.sample(range(DAYS_PER_WEEK), 5):
+                start = random.randrange(MINUTES_PER_DAY - 240)
+                blocks.append(
+                    {
+                        "id": create_uuid(),
+                        "table_id": table_id,
+                        "user_id": user_id,
+                        "day": day,
+                        "label": "index",
+                        **interval_fields(start, start + random.randint(10, 240)),
+                    }
+                )
+    db.execute(insert(ScheduleBlock), blocks)
+    db.commit()
+    try:
+        # explain 이 롤백하므로 통계가 남도록 커밋함
+        db.execute(text("ANALYZE scheduleblock"))
+        db.commit()
+        nodes = explain(
+            db,
+            crud.scheduleblock._blocks_in_window.params(
+                table_id=table_ids[0],
+                window_start=2 * 1440 + 850,
+                window_end=2 * 1440 + 940,
+            ),
+        )
+        bitmap_and = [node for node in nodes if node["Node Type"] == "BitmapAnd"]
+        assert bitmap_and, [node.get("Index Name") for node in nodes]
+        indexes = {
+            leading_column(db, node["Index Name"])
+            for node in plan_nodes(bitmap_and[0])
+            if node["Node Type"] == "Bitmap Index Scan"
+        }
+        assert indexes == {"table_id", "week_minutes"}
+    finally:
+        db.execute(delete(ScheduleBlock).where(ScheduleBlock.table_id.in_(table_ids)))
+        db.execute(delete(TimeTable).where(TimeTable.id.in_(table_ids)))
+        db.execute(delete(User).where(User.id.in_(user_ids)))
+        db.commit()
@@ -1,10 +1,19 @@
+import json
+from typing import Any, List
+
 import pytest
 from fastapi import HTTPException
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app import crud
-from app.schemas.scheduleblock import ScheduleBlockCreate
+from app import crud, schemas
+from app.core import deltas
+from app.core.availability import hour_bit
+from app.models.availability import Availability
+from app.models.scheduleblock import ScheduleBlock
+from app.schemas.scheduleblock import ScheduleBlockCreate, ScheduleBlockUpdate
+from app.tests.utils.db import AsyncRunner
 from app.tests.utils.timetable import create_random_timetable
 from app.tests.utils.user import create_random_user
 from app.tests.utils.utils import random_lower_string
@@ -65,7 +74,7 @@ def test_create_scheduleblock_with_user_id_time_range_exception(db: Session) ->
     )
 
     with pytest.raises(HTTPException):
-        scheduleblock = crud.scheduleblock.create_with_user_id(
+        crud.scheduleblock.create_with_user_id(
             db, obj_in=scheduleblock_in, user_id=user.id
         )
 
@@ -83,7 +92,7 @@ def test_create_scheduleblock_with_user_id_minute_range_exception(db: Session) -
         label=random_lower_string(),
     )
     with pytest.raises(HTTPException):
-        scheduleblock = crud.scheduleblock.create_with_user_id(
+        crud.scheduleblock.create_with_user_id(
             db, obj_in=scheduleblock_in, user_id=user.id
         )
 
@@ -101,7 +110,7 @@ def test_create_scheduleblock_with_user_id_day_range_exception(db: Session) -> N
         label=random_lower_string(),
     )
     with pytest.raises(HTTPException):
-        scheduleblock = crud.scheduleblock.create_with_user_id(
+        crud.scheduleblock.create_with_user_id(
             db, obj_in=scheduleblock_in, user_id=user.id
         )
 
@@ -212,3 +221,639 @@ def test_get_all_by_user_id(db: Session) -> None:
     assert scheduleblock_2 is not None
     assert scheduleblock_3 is not None
     assert jsonable_encoder(scheduleblocks)
+
+
+def test_replace_all_by_user_id_stores_single_bitmap_row(
+    db: Session, run_async: AsyncRunner
+) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+
+    scheduleblocks = run_async(
+        lambda async_db: crud.async_scheduleblock.replace_all_by_user_id(
+            async_db, table_id=timetable.id, user_id=user.id
+        )
+    )
+
+    assert len(scheduleblocks) == 7 * 24
+    assert (
+        db.query(Availability)
+        .filter(Availability.table_id == timetable.id, Availability.user_id == user.id)
+        .count()
+        == 1
+    )
+    assert (
+        db.query(ScheduleBlock).filter(ScheduleBlock.table_id == timetable.id).count()
+        == 0
+    )
+
+
+def test_hour_cell_round_trips_through_bitmap(db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    scheduleblock_in = ScheduleBlockCreate(
+        table_id=timetable.id,
+        start_time=9,
+        start_minute=0,
+        end_time=9,
+        end_minute=59,
+        day=2,
+    )
+
+    scheduleblock = crud.scheduleblock.create_with_user_id(
+        db, obj_in=scheduleblock_in, user_id=user.id
+    )
+    get_scheduleblock = crud.scheduleblock.get(db, id=scheduleblock.id)
+
+    assert get_scheduleblock == scheduleblock
+    assert get_scheduleblock.user_id == user.id
+    assert get_scheduleblock.day == 2
+
+    updated = crud.scheduleblock.update(
+        db, db_obj=get_scheduleblock, obj_in={"start_time": 10, "end_time": 10}
+    )
+    assert updated.start_time == 10
+    assert crud.scheduleblock.get(db, id=scheduleblock.id) is None
+
+    crud.scheduleblock.remove(db, id=updated.id)
+    assert crud.scheduleblock.get_all(db, table_id=timetable.id) == []
+    assert crud.scheduleblock.remove(db, id=updated.id) is None
+    assert crud.scheduleblock.remove(db, id="not-a-block") is None
+
+
+def test_delete_day_by_user_id_clears_bitmap_and_rows(
+    db: Session, run_async: AsyncRunner
+) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    run_async(
+        lambda async_db: crud.async_scheduleblock.replace_all_by_user_id(
+            async_db, table_id=timetable.id, user_id=user.id
+        )
+    )
+    scheduleblock_in = ScheduleBlockCreate(
+        table_id=timetable.id,
+        start_time=9,
+        start_minute=30,
+        end_time=11,
+        end_minute=0,
+        day=3,
+        label=random_lower_string(),
+    )
+    crud.scheduleblock.create_with_user_id(db, obj_in=scheduleblock_in, user_id=user.id)
+
+    deleted = crud.scheduleblock.delete_day_by_user_id(
+        db, table_id=timetable.id, user_id=user.id, day=3
+    )
+    scheduleblocks = crud.scheduleblock.get_all_by_user_id(
+        db, table_id=timetable.id, user_id=user.id
+    )
+
+    assert deleted == 24 + 1
+    assert len(scheduleblocks) == 6 * 24
+    assert all(scheduleblock.day != 3 for scheduleblock in scheduleblocks)
+
+
+def test_get_heatmap(db: Session, run_async: AsyncRunner) -> None:
+    timetable = create_random_timetable(db)
+    user_1 = create_random_user(db)
+    user_2 = create_random_user(db)
+    run_async(
+        lambda async_db: crud.async_scheduleblock.replace_day_by_user_id(
+            async_db, table_id=timetable.id, user_id=user_1.id, day=1
+        )
+    )
+    scheduleblock_in = ScheduleBlockCreate(
+        table_id=timetable.id,
+        start_time=9,
+        start_minute=30,
+        end_time=11,
+        end_minute=59,
+        day=1,
+        label=random_lower_string(),
+    )
+    crud.scheduleblock.create_with_user_id(
+        db, obj_in=scheduleblock_in, user_id=user_2.id
+    )
+
+    heatmap = crud.scheduleblock.get_heatmap(db, table_id=timetable.id, slot_minutes=30)
+    slots = heatmap["days"][1]["slots"]
+
+    assert heatmap["participant_count"] == 2
+    assert len(slots) == 48
+    assert slots[18]["count"] == 1
+    assert slots[19]["count"] == 2
+    assert set(slots[23]["user_ids"]) == {user_1.id, user_2.id}
+    assert slots[24]["user_ids"] == [user_1.id]
+    assert all(slot["count"] == 0 for slot in heatmap["days"][2]["slots"])
+
+
+def test_get_heatmap_slot_minutes_exception(db: Session) -> None:
+    timetable = create_random_timetable(db)
+
+    with pytest.raises(HTTPException):
+        crud.scheduleblock.get_heatmap(db, table_id=timetable.id, slot_minutes=7)
+
+
+def test_get_best_windows(db: Session, run_async: AsyncRunner) -> None:
+    timetable = create_random_timetable(db)
+    user_1 = create_random_user(db)
+    user_2 = create_random_user(db)
+    user_3 = create_random_user(db)
+    run_async(
+        lambda async_db: crud.async_scheduleblock.replace_day_by_user_id(
+            async_db, table_id=timetable.id, user_id=user_1.id, day=4
+        )
+    )
+    for user, start_time, end_time in [(user_2, 10, 13), (user_3, 12, 16)]:
+        scheduleblock_in = ScheduleBlockCreate(
+            table_id=timetable.id,
+            start_time=start_time,
+            start_minute=0,
+            end_time=end_time,
+            end_minute=59,
+            day=4,
+            label=random_lower_string(),
+        )
+        crud.scheduleblock.create_with_user_id(
+            db, obj_in=scheduleblock_in, user_id=user.id
+        )
+
+    windows = crud.scheduleblock.get_best_windows(
+        db,
+        table_id=timetable.id,
+        duration_minutes=90,
+        step_minutes=30,
+        required_user_ids=[],
+        limit=3,
+    )
+
+    assert windows[0]["count"] == 3
+    assert (
+        windows[0]["day"],
+        windows[0]["start_time"],
+        windows[0]["start_minute"],
+    ) == (4, 12, 0)
+    assert (windows[0]["end_time"], windows[0]["end_minute"]) == (13, 59)
+    assert windows[0]["duration_minutes"] == 120
+    assert all(window["count"] == 2 for window in windows[1:])
+
+    windows = crud.scheduleblock.get_best_windows(
+        db,
+        table_id=timetable.id,
+        duration_minutes=180,
+        step_minutes=60,
+        required_user_ids=[user_3.id],
+        limit=5,
+    )
+
+    assert len(windows) == 1
+    assert set(windows[0]["user_ids"]) == {user_1.id, user_3.id}
+    assert windows[0]["duration_minutes"] == 300
+
+
+def test_replace_day_by_user_id(db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    for day in (3, 4):
+        scheduleblock_in = ScheduleBlockCreate(
+            table_id=timetable.id,
+            start_time=9,
+            start_minute=30,
+            end_time=11,
+            end_minute=0,
+            day=day,
+            label=random_lower_string(),
+        )
+        crud.scheduleblock.create_with_user_id(
+            db, obj_in=scheduleblock_in, user_id=user.id
+        )
+
+    scheduleblocks = crud.scheduleblock.replace_day_by_user_id(
+        db, table_id=timetable.id, user_id=user.id, day=3
+    )
+
+    assert len(scheduleblocks) == 24 + 1
+    assert [block.day for block in scheduleblocks if block.label] == [4]
+    assert scheduleblocks == crud.scheduleblock.get_all_by_user_id(
+        db, table_id=timetable.id, user_id=user.id
+    )
+
+
+def test_async_replace_time_by_user_id(db: Session, run_async: AsyncRunner) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    scheduleblock_in = ScheduleBlockCreate(
+        table_id=timetable.id,
+        start_time=9,
+        start_minute=30,
+        end_time=9,
+        end_minute=45,
+        day=2,
+        label=random_lower_string(),
+    )
+    crud.scheduleblock.create_with_user_id(db, obj_in=scheduleblock_in, user_id=user.id)
+
+    async def replace_time(async_db: AsyncSession) -> tuple:
+        replaced = await crud.async_scheduleblock.replace_time_by_user_id(
+            async_db, table_id=timetable.id, user_id=user.id, start_time=9
+        )
+        stored = await crud.async_scheduleblock.get_all_by_user_id(
+            async_db, table_id=timetable.id, user_id=user.id
+        )
+        return replaced, stored
+
+    replaced, stored = run_async(replace_time)
+
+    assert len(replaced) == 7
+    assert all(block.start_time == 9 and not block.label for block in replaced)
+    assert replaced == stored
+    assert stored == crud.scheduleblock.get_all_by_user_id(
+        db, table_id=timetable.id, user_id=user.id
+    )
+
+
+def test_update_many_by_user_id(db: Session, run_async: AsyncRunner) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    cells = run_async(
+        lambda async_db: crud.async_scheduleblock.replace_day_by_user_id(
+            async_db, table_id=timetable.id, user_id=user.id, day=0
+        )
+    )
+    rows = [
+        crud.scheduleblock.create_with_user_id(
+            db,
+            obj_in=ScheduleBlockCreate(
+                table_id=timetable.id,
+                start_time=start_time,
+                start_minute=30,
+                end_time=start_time + 1,
+                end_minute=0,
+                day=5,
+                label=random_lower_string(),
+            ),
+            user_id=user.id,
+        )
+        for start_time in (8, 12)
+    ]
+
+    objs_in = [
+        ScheduleBlockUpdate(**{**cells[0]._asdict(), "day": 6}),
+        ScheduleBlockUpdate(**{**cells[1]._asdict(), "end_minute": 30}),
+        ScheduleBlockUpdate(
+            **{
+                **schemas.ScheduleBlock.from_orm(rows[0]).dict(),
+                "start_time": 9,
+                "end_time": 10,
+            }
+        ),
+        ScheduleBlockUpdate(
+            **{
+                **schemas.ScheduleBlock.from_orm(rows[1]).dict(),
+                "start_minute": 0,
+                "end_minute": 59,
+                "end_time": 12,
+                "label": None,
+            }
+        ),
+    ]
+    updated = crud.scheduleblock.update_many_by_user_id(
+        db, objs_in=objs_in, user_id=user.id
+    )
+
+    assert [(block.day, block.start_time, block.end_minute) for block in updated] == [
+        (6, 0, 59),
+        (0, 1, 30),
+        (5, 9, 0),
+        (5, 12, 59),
+    ]
+    assert updated[0].id != cells[0].id
+    assert updated[2].id == rows[0].id
+    scheduleblocks = crud.scheduleblock.get_all_by_user_id(
+        db, table_id=timetable.id, user_id=user.id
+    )
+    assert len(scheduleblocks) == 24 + 2
+    assert {block.id for block in updated} <= {block.id for block in scheduleblocks}
+
+
+def test_update_many_by_user_id_is_all_or_nothing(
+    db: Session, run_async: AsyncRunner
+) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    other_user = create_random_user(db)
+    cells = run_async(
+        lambda async_db: crud.async_scheduleblock.replace_day_by_user_id(
+            async_db, table_id=timetable.id, user_id=user.id, day=0
+        )
+    )
+    other_cells = run_async(
+        lambda async_db: crud.async_scheduleblock.replace_day_by_user_id(
+            async_db, table_id=timetable.id, user_id=other_user.id, day=0
+        )
+    )
+
+    objs_in = [
+        ScheduleBlockUpdate(**{**cells[0]._asdict(), "day": 6}),
+        ScheduleBlockUpdate(**{**other_cells[0]._asdict(), "day": 6}),
+    ]
+    with pytest.raises(HTTPException) as exc_info:
+        crud.scheduleblock.update_many_by_user_id(db, objs_in=objs_in, user_id=user.id)
+    db.rollback()
+
+    assert exc_info.value.status_code == 403
+    assert crud.scheduleblock.get(db, id=cells[0].id) == cells[0]
+
+
+def test_writes_bump_timetable_version(db: Session) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+
+    def version() -> int:
+        stored = crud.timetable.get(db, id=timetable.id)
+        assert stored is not None
+        return stored.version
+
+    start = version()
+    scheduleblock_in = ScheduleBlockCreate(
+        table_id=timetable.id,
+        start_time=9,
+        start_minute=0,
+        end_time=9,
+        end_minute=59,
+        day=1,
+    )
+    cell = crud.scheduleblock.create_with_user_id(
+        db, obj_in=scheduleblock_in, user_id=user.id
+    )
+    db.expire_all()
+    assert version() == start + 1
+
+    crud.scheduleblock.remove(db, id=cell.id)
+    db.expire_all()
+    assert version() == start + 2
+
+    crud.scheduleblock.delete_all_by_user_id(db, table_id=timetable.id, user_id=user.id)
+    db.expire_all()
+    assert version() == start + 3
+
+
+def test_committed_writes_publish_deltas(
+    db: Session, monkeypatch: Any, run_async: AsyncRunner
+) -> None:
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    events: List[Any] = []
+    monkeypatch.setattr(
+        deltas.manager,
+        "publish_threadsafe",
+        lambda timetable_id, message, fallback=None: events.append(
+            (timetable_id, json.loads(message))
+        ),
+    )
+
+    block = crud.scheduleblock.create_with_user_id(
+        db,
+        obj_in=ScheduleBlockCreate(
+            table_id=timetable.id,
+            start_time=9,
+            start_minute=30,
+            end_time=10,
+            end_minute=0,
+            day=2,
+            label="lunch",
+        ),
+        user_id=user.id,
+    )
+    block_data = schemas.ScheduleBlock.from_orm(block).dict()
+    cells = [
+        cell
+        for cell in run_async(
+            lambda async_db: crud.async_scheduleblock.replace_time_by_user_id(
+                async_db, table_id=timetable.id, user_id=user.id, start_time=8
+            )
+        )
+        if cell.id != block_data["id"]
+    ]
+    crud.scheduleblock.update_many_by_user_id(
+        db,
+        objs_in=[
+            ScheduleBlockUpdate(
+                **{**cells[0]._asdict(), "start_time": 11, "end_time": 11}
+            )
+        ],
+        user_id=user.id,
+    )
+    crud.scheduleblock.delete_day_by_user_id(
+        db, table_id=timetable.id, user_id=user.id, day=2
+    )
+    with pytest.raises(HTTPException):
+        crud.scheduleblock.update_many_by_user_id(
+            db,
+            objs_in=[ScheduleBlockUpdate(**{**block_data, "day": 1})],
+            user_id=create_random_user(db).id,
+        )
+    db.rollback()
+
+    assert [timetable_id for timetable_id, _ in events] == [timetable.id] * 4
+    created, filled, moved, deleted = [event for _, event in events]
+    assert created["type"] == "scheduleblocks"
+    assert created["user_id"] == user.id
+    assert created["added"]["blocks"] == [
+        {
+            "id": block_data["id"],
+            "day": 2,
+            "start_time": 9,
+            "start_minute": 30,
+            "end_time": 10,
+            "end_minute": 0,
+            "label": "lunch",
+        }
+    ]
+    assert created["removed"] == {}
+    assert filled["added"] == {"hours": [hour_bit(8)] * 7}
+    assert filled["availability_id"] == cells[0].id.split("-")[0]
+    assert filled["version"] == created["version"] + 1
+
+    sunday = [hour_bit(8)] + [0] * 6
+    assert moved["removed"] == {"hours": sunday}
+    assert moved["added"] == {"hours": [hour_bit(11)] + [0] * 6}
+
+    tuesday = [0, 0, hour_bit(8), 0, 0, 0, 0]
+    assert deleted["removed"] == {"hours": tuesday, "block_ids": [block_data["id"]]}
+    assert deleted["added"] == {}
+
+
+def test_get_page(db: Session, run_async: AsyncRunner) -> None:
+    timetable = create_random_timetable(db)
+    user_1 = create_random_user(db)
+    user_2 = create_random_user(db)
+    run_async(
+        lambda async_db: crud.async_scheduleblock.replace_day_by_user_id(
+            async_db, table_id=timetable.id, user_id=user_1.id, day=3
+        )
+    )
+    for user in (user_1, user_2):
+        scheduleblock_in = ScheduleBlockCreate(
+            table_id=timetable.id,
+            start_time=9,
+            start_minute=30,
+            end_time=9,
+            end_minute=45,
+            day=3,
+            label=random_lower_string(),
+        )
+        crud.scheduleblock.create_with_user_id(
+            db, obj_in=scheduleblock_in, user_id=user.id
+        )
+
+    pages = []
+    after = None
+    while True:
+        page, after = crud.scheduleblock.get_page(
+            db, table_id=timetable.id, after=after, limit=10
+        )
+        pages.append(page)
+        if after is None:
+            break
+    rows = [row for page in pages for row in page]
+    keys = [(row.user_id, row.day, row.start_time, row.id) for row in rows]
+
+    assert [len(page) for page in pages] == [10, 10, 6]
+    assert keys == sorted(keys)
+    assert sorted(rows) == sorted(crud.scheduleblock.get_all(db, timetable.id))
+
+    page, after = crud.scheduleblock.get_page(
+        db, table_id=timetable.id, user_id=user_2.id, limit=10
+    )
+    assert after is None
+    assert [row.user_id for row in page] == [user_2.id]
+
+
+def test_compaction_merges_and_splits_blocks(
+    db: Session, monkeypatch: Any, run_async: AsyncRunner
+) -> None:
+    monkeypatch.setattr(crud.scheduleblock, "compaction", True)
+    monkeypatch.setattr(crud.async_scheduleblock, "compaction", True)
+    timetable = create_random_timetable(db)
+    user = create_random_user(db)
+    label = random_lower_string()
+    for start_time in (10, 9, 11):
+        scheduleblock_in = ScheduleBlockCreate(
+            table_id=timetable.id,
+            start_time=start_time,
+            start_minute=0,
+            end_time=start_time,
+            end_minute=59,
+            day=2,
+            label=label,
+        )
+        block = crud.scheduleblock.create_with_user_id(
+            db, obj_in=scheduleblock_in, user_id=user.id
+        )
+
+    def intervals() -> List[tuple]:
+        return sorted(
+            (row.start_time, row.start_minute, row.end_time, row.end_minute)
+            for row in crud.scheduleblock.get_all_by_user_id(
+                db, table_id=timetable.id, user_id=user.id
+            )
+        )
+
+    assert (block.start_time, block.end_time, block.end_minute) == (9, 11, 59)
+    assert intervals() == [(9, 0, 11, 59)]
+
+    pieces = crud.scheduleblock.expand_blocks(
+        crud.scheduleblock.get_all_by_user_id(
+            db, table_id=timetable.id, user_id=user.id
+        )
+    )
+    assert [(piece.start_time, piece.end_time) for piece in pieces] == [
+        (9, 9),
+        (10, 10),
+        (11, 11),
+    ]
+    assert crud.scheduleblock.get(db, id=pieces[1].id) == pieces[1]
+
+    crud.scheduleblock.remove(db, id=pieces[1].id)
+    assert intervals() == [(9, 0, 9, 59), (11, 0, 11, 59)]
+
+    crud.scheduleblock.delete_time_by_user_id(
+        db, table_id=timetable.id, user_id=user.id, start_time=11
+    )
+    assert intervals() == [(9, 0, 9, 59)]
+
+    async def replace_time(async_db: AsyncSession) -> None:
+        await crud.async_scheduleblock.replace_time_by_user_id(
+            async_db, table_id=timetable.id, user_id=user.id, start_time=9
+        )
+
+    scheduleblock_in.start_time = 8
+    crud.scheduleblock.create_with_user_id(db, obj_in=scheduleblock_in, user_id=user.id)
+    assert intervals() == [(8, 0, 11, 59)]
+    run_async(replace_time)
+    assert [interval for interval in intervals() if interval[0] != 9] == [
+        (8, 0, 8, 59),
+        (10, 0, 11, 59),
+    ]
+    assert not crud.availability_count.check(db, table_id=timetable.id)["drift"]
+
+
+def test_get_free_participants(db: Session, run_async: AsyncRunner) -> None:
+    timetable = create_random_timetable(db)
+    covering_block = create_random_user(db)
+    covering_cells = create_random_user(db)
+    partial = create_random_user(db)
+    other_day = create_random_user(db)
+    for user, day, start, end in (
+        (covering_block, 2, (14, 0), (16, 29)),
+        (partial, 2, (15, 30), (17, 59)),
+        (other_day, 3, (14, 0), (16, 29)),
+    ):
+        scheduleblock_in = ScheduleBlockCreate(
+            table_id=timetable.id,
+            start_time=start[0],
+            start_minute=start[1],
+            end_time=end[0],
+            end_minute=end[1],
+            day=day,
+            label=random_lower_string(),
+        )
+        crud.scheduleblock.create_with_user_id(
+            db, obj_in=scheduleblock_in, user_id=user.id
+        )
+    for start_time in (14, 15):
+        run_async(
+            lambda async_db: crud.async_scheduleblock.replace_time_by_user_id(
+                async_db,
+                table_id=timetable.id,
+                user_id=covering_cells.id,
+                start_time=start_time,
+            )
+        )
+
+    free = crud.scheduleblock.get_free_participants(
+        db,
+        table_id=timetable.id,
+        day=2,
+        start_time=14,
+        start_minute=10,
+        end_time=15,
+        end_minute=39,
+    )
+    assert free["duration_minutes"] == 90
+    assert free["covering_user_ids"] == sorted([covering_block.id, covering_cells.id])
+    assert free["partial_user_ids"] == [partial.id]
+
+    free = crud.scheduleblock.get_free_participants(
+        db,
+        table_id=timetable.id,
+        day=2,
+        start_time=16,
+        start_minute=30,
+        end_time=16,
+        end_minute=59,
+    )
+    assert free["covering_user_ids"] == [partial.id]
+    assert free["partial_user_ids"] == []
@@ -1,7 +1,6 @@
 from sqlalchemy.orm import Session
 
 from app import crud
-from app.api.api_v1.endpoints.timetables import get_timetable_by_id
 from app.schemas.timetable import TimeTableCreate, TimeTableUpdate
 from app.tests.utils.user import create_random_user
 from app.tests.utils.utils import random_lower_string
@@ -61,12 +60,26 @@ def test_get_timetables_by_user_id(db: Session) -> None:
         title = random_lower_string()
         description = random_lower_string()
         timetable_in = TimeTableCreate(title=title, description=description)
-        timetable_db = crud.timetable.create_with_user_id(
-            db, obj_in=timetable_in, user_id=user.id
-        )
+        crud.timetable.create_with_user_id(db, obj_in=timetable_in, user_id=user.id)
 
     my_timetable = crud.timetable.get_by_user_id(db, user_id=user.id)
 
     assert my_timetable is not None
     assert len(my_timetable) == 20
     assert my_timetable[0].create_user_id == user.id
+
+
+def test_timetable_ids_are_time_ordered(db: Session) -> None:
+    user = create_random_user(db)
+    ids = [
+        crud.timetable.create_with_user_id(
+            db, obj_in=TimeTableCreate(title=random_lower_string()), user_id=user.id
+        ).id
+        for _ in range(3)
+    ]
+
+    assert all(len(id) == 32 and id[12] == "7" for id in ids)
+    assert [id[:12] for id in ids] == sorted(id[:12] for id in ids)
+    first = crud.timetable.get(db, id=ids[0])
+    assert first is not None and first.id == ids[0]
+    assert crud.timetable.get(db, id="not-a-uuid") is None
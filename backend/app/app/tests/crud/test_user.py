@@ -1,9 +1,13 @@
 from random import randint
+from typing import Any, List
 
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from app import crud
+from app.crud.crud_user import user_cache
+from app.db.session import SessionLocal, engine
 from app.schemas.user import UserCreate, UserUpdate
 from app.tests.utils.utils import random_email, random_lower_string
 
@@ -59,3 +63,54 @@ def test_update_user(db: Session) -> None:
     assert user_2 is not None
     assert user.email == user_2.email
     assert user.nickname == user_2.nickname
+
+
+def test_get_cached_user(db: Session) -> None:
+    user_in = UserCreate(email=random_email())
+    user = crud.user.create(db, obj_in=user_in)
+    misses = user_cache.misses
+    assert crud.user.get_cached(db, id=user.id) == user
+    assert user_cache.misses == misses + 1
+
+    statements: List[str] = []
+
+    def count(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    other = SessionLocal()
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        hits = user_cache.hits
+        cached = crud.user.get_cached(other, id=user.id)
+        assert user_cache.hits == hits + 1
+        assert cached is not None
+        assert cached.email == user.email
+        assert cached.is_superuser == user.is_superuser
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert statements == []
+
+    nickname = random_lower_string()
+    crud.user.update(db, db_obj=user, obj_in=UserUpdate(nickname=nickname))
+    fresh = SessionLocal()
+    try:
+        refreshed = crud.user.get_cached(fresh, id=user.id)
+        assert refreshed is not None
+        assert refreshed.nickname == nickname
+    finally:
+        fresh.close()
+        other.close()
+
+
+def test_remove_user_invalidates_cache(db: Session) -> None:
+    user = crud.user.create(db, obj_in=UserCreate(email=random_email()))
+    assert crud.user.get_cached(db, id=user.id) == user
+    assert user_cache.get(user.id) is not None
+
+    crud.user.remove(db, id=user.id)
+    assert user_cache.get(user.id) is None
+    fresh = SessionLocal()
+    try:
+        assert crud.user.get_cached(fresh, id=user.id) is None
+    finally:
+        fresh.close()
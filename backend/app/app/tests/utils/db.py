@@ -0,0 +1,35 @@
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+T = TypeVar("T")
+
+
+class AsyncRunner:
+    """
+    AsyncSession 을 받는 코루틴 함수를 이 러너의 이벤트 루프에서 실행함
+    모듈의 async_engine 풀에는 TestClient 의 루프에서 연 asyncpg 연결이 남아 있어서
+    다른 루프에서 쓰면 "attached to a different loop" 가 나므로, 연결을 두지 않는 엔진을 따로 씀
+    """
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.engine = create_async_engine(
+            settings.ASYNC_SQLALCHEMY_DATABASE_URI, poolclass=NullPool
+        )
+
+    def __call__(self, work: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        return self.loop.run_until_complete(self._run(work))
+
+    async def _run(self, work: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        async with AsyncSessionLocal(bind=self.engine) as async_db:
+            return await work(async_db)
+
+    def close(self) -> None:
+        self.loop.run_until_complete(self.engine.dispose())
+        self.loop.close()